@@ -1,40 +1,128 @@
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
+from flask import Flask, Response
 from flask_cors import CORS
+from flask_migrate import Migrate
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import Config
 from models import db  # import db từ models.py
-from routes import appointment, services, insurance, prescription, payment, auth
+from db_pool import engine_options, pool_status
+from replicas import init_replicas
+from cache import init_catalog_cache
+from utils import init_token_cache, internal_only
+from metrics import init_metrics, render_metrics
+from rate_limit import init_rate_limiter
+from json_provider import init_json_provider
+from compression import init_compression
 
-# Khởi tạo ứng dụng Flask
-app = Flask(__name__)
+# Flask-Migrate quản lý schema (chạy 'flask db upgrade' để tạo/cập nhật bảng)
+migrate = Migrate()
 
-# Nạp cấu hình từ tệp config.py
-app.config.from_object(Config)
+# Hàm đăng ký các Blueprint (API routes) từ thư mục routes/
+def register_blueprints(app):
+    # Các route được import khi tạo ứng dụng chứ không phải khi import module này
+    from routes import appointment, services, insurance, prescription, payment, auth, availability, billing, patient, reports, search
 
-# Kết nối SQLAlchemy với ứng dụng Flask
-db.init_app(app)
+    for module in (appointment, services, insurance, prescription, payment, auth, availability, billing, patient, reports,
+                   search):
+        app.register_blueprint(module.bp, url_prefix='/api')
 
-# Tạo bảng dữ liệu nếu chưa có
-with app.app_context():
-    db.create_all()
-    print("Database tables created successfully.")
+# Hàm tạo ứng dụng Flask (application factory)
+def create_app(config=None):
+    """
+    Tạo và cấu hình một ứng dụng Flask mới. 'config' (dict hoặc object) ghi đè lên cấu hình mặc định.
+    Không mở kết nối database hay tạo schema khi khởi động: kết nối, chỉ mục lịch trống
+    và pool mã hóa mật khẩu chỉ được tạo khi có request đầu tiên cần đến.
+    """
+    app = Flask(__name__)
 
-# Kích hoạt CORS để cho phép React frontend tương tác với Flask backend
-CORS(app)
+    # Nạp cấu hình từ tệp config.py, sau đó áp dụng cấu hình ghi đè (nếu có)
+    app.config.from_object(Config)
+    if isinstance(config, dict):
+        app.config.update(config)
+    elif config is not None:
+        app.config.from_object(config)
+    # Tùy chọn connection pool phụ thuộc vào loại database
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config['SQLALCHEMY_DATABASE_URI']))
 
-# Đăng ký các Blueprint (API routes) từ thư mục routes/
-app.register_blueprint(appointment.bp, url_prefix='/api')
-app.register_blueprint(services.bp, url_prefix='/api')
-app.register_blueprint(insurance.bp, url_prefix='/api')
-app.register_blueprint(prescription.bp, url_prefix='/api')
-app.register_blueprint(payment.bp, url_prefix='/api')
-app.register_blueprint(auth.bp, url_prefix='/api')
+    # Bộ mã hóa JSON dùng cho jsonify, NDJSON và cache danh mục
+    init_json_provider(app)
 
-# Route kiểm tra xem ứng dụng backend có hoạt động không
-@app.route('/')
-def index():
-    return {"message": "Welcome to the Healthcare API!"}
+    # Kết nối SQLAlchemy và Flask-Migrate với ứng dụng Flask
+    db.init_app(app)
+    migrate.init_app(app, db, render_as_batch=True)
+
+    # Khởi tạo các read replica (nếu có cấu hình DATABASE_REPLICA_URLS)
+    init_replicas(app)
+
+    # Cache của từng ứng dụng (không dùng chung giữa các ứng dụng trong cùng tiến trình)
+    init_token_cache(app)
+    init_catalog_cache(app)
+
+    # Giới hạn số lần đăng nhập/đăng ký theo IP và username
+    init_rate_limiter(app)
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+
+    # Đo thời gian, mã trạng thái và số câu SQL của từng request (đăng ký trước mọi hook khác)
+    init_metrics(app)
+
+    # Nén phản hồi (gzip, br) theo Accept-Encoding của client
+    init_compression(app)
+
+    # Kích hoạt CORS để cho phép React frontend tương tác với Flask backend
+    # (các header được đọc từ phía trình duyệt: CORS_EXPOSE_HEADERS trong config.py)
+    CORS(app)
+
+    register_blueprints(app)
+
+    # Route kiểm tra xem ứng dụng backend có hoạt động không
+    @app.route('/')
+    def index():
+        return {"message": "Welcome to the Healthcare API!"}
+
+    # Route kiểm tra trạng thái connection pool của database (API nội bộ, xem INTERNAL_API_TOKEN)
+    @app.route('/health/db-pool')
+    @internal_only
+    def db_pool_health():
+        return pool_status(db.engine.pool)
+
+    # Route xuất số liệu theo định dạng Prometheus (tổng của mọi worker nếu có cấu hình METRICS_DIR)
+    @app.route('/metrics')
+    @internal_only
+    def metrics():
+        return Response(render_metrics(app.extensions['metrics'].collect()),
+                        mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+    return app
+
+# Hàm gọi trong tiến trình con ngay sau khi fork (gunicorn --preload, multiprocessing)
+def reset_after_fork(app):
+    """
+    Bỏ các kết nối database kế thừa từ tiến trình cha mà không đóng chúng (close=False),
+    để mỗi worker tự mở kết nối riêng và không dùng chung socket MySQL với tiến trình khác.
+    Pool mã hóa mật khẩu được tạo lại khi cần vì các thread của nó không tồn tại sau fork.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    app.extensions['replicas'].dispose(close=False)
+    app.extensions.pop('hashing_pool', None)
+    app.extensions['metrics'].reset()
+
+# Hàm giải phóng tài nguyên khi tiến trình dừng
+def shutdown_app(app):
+    """
+    Đóng các kết nối database (primary và replica), dừng pool mã hóa mật khẩu
+    và ghi số liệu cuối cùng của tiến trình (nếu có METRICS_DIR).
+    """
+    app.extensions['metrics'].flush()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    app.extensions['replicas'].dispose()
+    hashing_pool = app.extensions.pop('hashing_pool', None)
+    if hashing_pool is not None:
+        hashing_pool.shutdown(wait=False)
 
 # Điểm khởi động ứng dụng
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
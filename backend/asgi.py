@@ -0,0 +1,9 @@
+from a2wsgi import WSGIMiddleware
+from app import create_app
+from async_api import AsyncAPI
+
+# Điểm vào ASGI (chế độ bất đồng bộ, tùy chọn), ví dụ:
+#     uvicorn asgi:app --workers 4
+# Các API chỉ đọc chạy bất đồng bộ (async_api.py), các API còn lại chạy trong pool thread của ứng dụng Flask.
+flask_app = create_app()
+app = AsyncAPI(flask_app, WSGIMiddleware(flask_app, workers=flask_app.config['ASGI_WSGI_THREADS']))
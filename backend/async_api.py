@@ -0,0 +1,214 @@
+import asyncio
+import re
+from urllib.parse import parse_qsl
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Map, Rule, RoutingException
+from models import *
+from db_pool import engine_options
+from utils import authenticate
+from pagination import PaginationError, page_limit, keyset_query, page_query, split_page
+from serializers import (exists_query,
+                         patient_appointments_query, serialize_patient_appointment,
+                         doctor_appointments_query, serialize_doctor_appointment,
+                         patient_payments_query, serialize_patient_payment,
+                         payment_detail_query, serialize_payment_detail,
+                         patient_prescriptions_query, serialize_patient_prescription,
+                         prescription_detail_query, serialize_prescription_detail,
+                         patient_services_query, serialize_patient_service,
+                         patient_insurances_query, serialize_patient_insurance)
+from overview import (OVERVIEW_SECTIONS, patient_summary_query, serialize_patient_summary,
+                      section_limits, section_query, serialize_section)
+
+# Driver bất đồng bộ tương ứng với từng loại database
+ASYNC_DRIVERS = {'mysql': 'aiomysql', 'sqlite': 'aiosqlite', 'postgresql': 'asyncpg'}
+
+# Các API danh sách chạy bất đồng bộ:
+# endpoint -> (đường dẫn, cột khóa của chủ sở hữu, thông báo 404, truy vấn, khóa phân trang, hàm serialize)
+ASYNC_LISTINGS = {
+    'patient_appointments': ('/api/appointments/patient/<int:owner_id>', Patient.patient_id, "Patient not found",
+                             patient_appointments_query, [Appointment.appointment_date, Appointment.appointment_id],
+                             serialize_patient_appointment),
+    'doctor_appointments': ('/api/appointments/doctor/<int:owner_id>', Doctor.doctor_id, "Doctor not found",
+                            doctor_appointments_query, [Appointment.appointment_date, Appointment.appointment_id],
+                            serialize_doctor_appointment),
+    'patient_payments': ('/api/payments/patient/<int:owner_id>', Patient.patient_id, "Patient not found",
+                         patient_payments_query, [Payment.payment_date, Payment.payment_id],
+                         serialize_patient_payment),
+    'patient_prescriptions': ('/api/prescriptions/patient/<int:owner_id>', Patient.patient_id, "Patient not found",
+                              patient_prescriptions_query, [Prescription.prescription_id],
+                              serialize_patient_prescription),
+    'patient_services': ('/api/services/patient/<int:owner_id>', Patient.patient_id, "Patient not found",
+                         patient_services_query, [PatientService.id], serialize_patient_service),
+    'patient_insurances': ('/api/insurance/patient/<int:owner_id>', Patient.patient_id, "Patient not found",
+                           patient_insurances_query, [PatientInsurance.id], serialize_patient_insurance),
+}
+
+# Các API chi tiết chạy bất đồng bộ: endpoint -> (đường dẫn, truy vấn, thông báo 404, hàm serialize)
+ASYNC_DETAILS = {
+    'payment_detail': ('/api/payments/<int:record_id>', payment_detail_query, "Payment not found",
+                       serialize_payment_detail),
+    'prescription_detail': ('/api/prescriptions/<int:record_id>', prescription_detail_query, "Prescription not found",
+                            serialize_prescription_detail),
+}
+
+# Hàm chuyển URI database sang driver bất đồng bộ
+def async_database_uri(uri):
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database '{backend}'")
+    return url.set(drivername=f'{backend}+{ASYNC_DRIVERS[backend]}').render_as_string(hide_password=False)
+
+# Hàm khởi tạo engine bất đồng bộ cho ứng dụng
+def init_async_db(app):
+    uri = app.config['ASYNC_DATABASE_URI'] or async_database_uri(app.config['SQLALCHEMY_DATABASE_URI'])
+    options = engine_options(uri)
+    # InstrumentedQueuePool chỉ dùng được cho engine đồng bộ
+    options.pop('poolclass', None)
+    engine = create_async_engine(uri, **options)
+    app.extensions['async_engine'] = engine
+    app.extensions['async_session'] = async_sessionmaker(engine, expire_on_commit=False)
+
+class AsyncAPI:
+    """
+    Ứng dụng ASGI: các API chỉ đọc (danh sách và chi tiết) chạy bất đồng bộ trên AsyncSession,
+    dùng chung model, truy vấn, phân trang và cách xác thực token với các Blueprint.
+    Mọi request khác (ghi dữ liệu, NDJSON, danh mục, ...) được chuyển cho ứng dụng Flask qua 'fallback'.
+    """
+
+    def __init__(self, flask_app, fallback):
+        self.flask_app = flask_app
+        self.fallback = fallback
+        init_async_db(flask_app)
+        self.sessions = flask_app.extensions['async_session']
+        rules = [Rule(path, endpoint=name, methods=['GET']) for name, (path, *_) in ASYNC_LISTINGS.items()]
+        rules += [Rule(path, endpoint=name, methods=['GET']) for name, (path, *_) in ASYNC_DETAILS.items()]
+        rules.append(Rule('/api/patients/<int:patient_id>/overview', endpoint='patient_overview', methods=['GET']))
+        self.url_map = Map(rules).bind('localhost')
+        # Số liệu /metrics dùng tên endpoint của Blueprint tương ứng để giống hệt chế độ WSGI
+        flask_urls = flask_app.url_map.bind('localhost')
+        self.metrics = flask_app.extensions['metrics']
+        self.metric_endpoints = {
+            rule.endpoint: flask_urls.match(re.sub(r'<int:\w+>', '1', rule.rule), method='GET')[0] for rule in rules
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        route = self._match(scope) if scope['type'] == 'http' else None
+        if route is None:
+            await self.fallback(scope, receive, send)
+            return
+
+        endpoint, values = route
+        args = dict(parse_qsl(scope['query_string'].decode('latin-1')))
+        headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+        if args.get('format') == 'ndjson':
+            # Stream NDJSON vẫn do ứng dụng Flask xử lý
+            await self.fallback(scope, receive, send)
+            return
+
+        state = self.metrics.start_request()
+        status = 500
+        try:
+            status, data, extra_headers = await self._handle(endpoint, values, args, headers)
+            await self._respond(send, status, data, extra_headers, headers.get('origin'), headers.get('accept-encoding'))
+        finally:
+            self.metrics.finish_request(state, scope['method'], self.metric_endpoints[endpoint], status)
+
+    def _match(self, scope):
+        try:
+            return self.url_map.match(scope['path'], method=scope['method'])
+        except (HTTPException, RoutingException):
+            return None
+
+    async def _handle(self, endpoint, values, args, headers):
+        # Xác thực giống token_required (cần app context để đọc SECRET_KEY và cache token)
+        with self.flask_app.app_context():
+            _, error = authenticate(headers.get('authorization'))
+        if error:
+            return 401, {'message': error}, {}
+
+        if endpoint == 'patient_overview':
+            return await self._overview(values['patient_id'], args)
+
+        async with self.sessions() as session:
+            if endpoint in ASYNC_DETAILS:
+                _, query, not_found_message, serialize = ASYNC_DETAILS[endpoint]
+                row = (await session.execute(query(values['record_id']))).first()
+                if row is None:
+                    return 404, {"message": not_found_message}, {}
+                return 200, serialize(row), {}
+
+            _, owner_column, not_found_message, query, keys, serialize = ASYNC_LISTINGS[endpoint]
+            owner_id = values['owner_id']
+            if (await session.execute(exists_query(owner_column, owner_id))).first() is None:
+                return 404, {"message": not_found_message}, {}
+
+            config = self.flask_app.config
+            try:
+                limit = page_limit(args, config)
+                statement = keyset_query(query(owner_id), keys, args.get('cursor'))
+            except PaginationError as e:
+                return 400, {"message": str(e)}, {}
+
+            rows = (await session.execute(page_query(statement, limit))).all()
+        rows, next_cursor = split_page(rows, keys, limit)
+        return 200, [serialize(row) for row in rows], {'X-Next-Cursor': next_cursor} if next_cursor else {}
+
+    async def _overview(self, patient_id, args):
+        try:
+            limits = section_limits(args, self.flask_app.config)
+        except PaginationError as e:
+            return 400, {"message": str(e)}, {}
+
+        async with self.sessions() as session:
+            patient = (await session.execute(patient_summary_query(patient_id))).first()
+        if patient is None:
+            return 404, {"message": "Patient not found"}, {}
+
+        async def fetch(section):
+            # Mỗi phần một session (một kết nối) riêng để các truy vấn chạy đồng thời
+            async with self.sessions() as session:
+                return (await session.execute(section_query(section, patient_id, limits[section[0]]))).all()
+
+        results = await asyncio.gather(*(fetch(section) for section in OVERVIEW_SECTIONS))
+        overview = {"patient": serialize_patient_summary(patient)}
+        for section, rows in zip(OVERVIEW_SECTIONS, results):
+            overview[section[0]] = serialize_section(section, rows, limits[section[0]])
+        return 200, overview, {}
+
+    async def _respond(self, send, status, data, extra_headers, origin, accept_encoding):
+        # Dùng JSON provider của ứng dụng Flask để phản hồi giống hệt jsonify
+        response = self.flask_app.json.response(data)
+        response.status_code = status
+        response.headers.update(extra_headers)
+        if origin:
+            # Giống cấu hình CORS của ứng dụng Flask (CORS(app) với CORS_EXPOSE_HEADERS: trả lại origin của request)
+            response.headers['Access-Control-Allow-Origin'] = origin
+            response.headers['Access-Control-Expose-Headers'] = ', '.join(sorted(self.flask_app.config['CORS_EXPOSE_HEADERS']))
+            response.vary.add('Origin')
+        # Nén giống ứng dụng Flask (compression.init_compression)
+        self.flask_app.extensions['compression'].compress_response(response, accept_encoding)
+        body = response.get_data()
+        response.headers['Content-Length'] = str(len(body))
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.headers.items()]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.flask_app.extensions['async_engine'].dispose()
+                self.metrics.flush()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
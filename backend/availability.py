@@ -0,0 +1,358 @@
+import heapq
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from itertools import islice
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from models import db, Doctor, Appointment
+
+class DoctorSchedule:
+    """
+    Lịch bận của một bác sĩ, lưu dưới dạng các khoảng [start, end) đã được gộp liền nhau
+    và sắp xếp tăng dần, nên tìm slot trống kế tiếp chỉ cần một lần tìm kiếm nhị phân.
+    """
+    __slots__ = ('doctor_id', 'name', 'specialization', 'starts', 'ends')
+
+    def __init__(self, doctor_id, name, specialization):
+        self.doctor_id = doctor_id
+        self.name = name
+        self.specialization = specialization
+        self.starts = []
+        self.ends = []
+
+    def _run_index(self, t):
+        # Vị trí của khoảng bận chứa thời điểm t, hoặc -1 nếu t đang trống
+        i = bisect_right(self.starts, t) - 1
+        if i >= 0 and self.ends[i] > t:
+            return i
+        return -1
+
+    def book(self, slot_start, slot_length):
+        if self._run_index(slot_start) >= 0:
+            return
+        slot_end = slot_start + slot_length
+        i = bisect_right(self.starts, slot_start)
+        # Gộp với khoảng bận liền trước và/hoặc liền sau
+        joins_prev = i > 0 and self.ends[i - 1] == slot_start
+        joins_next = i < len(self.starts) and self.starts[i] == slot_end
+        if joins_prev and joins_next:
+            self.ends[i - 1] = self.ends[i]
+            del self.starts[i]
+            del self.ends[i]
+        elif joins_prev:
+            self.ends[i - 1] = slot_end
+        elif joins_next:
+            self.starts[i] = slot_start
+        else:
+            self.starts.insert(i, slot_start)
+            self.ends.insert(i, slot_end)
+
+    def release(self, slot_start, slot_length):
+        i = self._run_index(slot_start)
+        if i < 0:
+            return
+        slot_end = slot_start + slot_length
+        run_start, run_end = self.starts[i], self.ends[i]
+        del self.starts[i]
+        del self.ends[i]
+        # Tách khoảng bận thành phần trước và phần sau slot vừa được giải phóng
+        if slot_end < run_end:
+            self.starts.insert(i, slot_end)
+            self.ends.insert(i, run_end)
+        if run_start < slot_start:
+            self.starts.insert(i, run_start)
+            self.ends.insert(i, slot_start)
+
+    def next_free(self, t):
+        """
+        Thời điểm trống sớm nhất >= t (nhảy qua cả khoảng bận nếu t đang bận).
+        """
+        i = self._run_index(t)
+        return self.ends[i] if i >= 0 else t
+
+    def free_slots(self, start, end, slot_length, open_time, close_time):
+        """
+        Sinh lần lượt các slot trống trong [start, end), chỉ trong giờ làm việc [open_time, close_time).
+        """
+        t = start
+        while t < end:
+            day_open = datetime.combine(t.date(), open_time)
+            day_close = datetime.combine(t.date(), close_time)
+            if t < day_open:
+                t = day_open
+                continue
+            if t + slot_length > day_close:
+                t = day_open + timedelta(days=1)
+                continue
+            free = self.next_free(t)
+            if free != t:
+                t = free
+                continue
+            yield t
+            t += slot_length
+
+class AvailabilityIndex:
+    """
+    Chỉ mục trong bộ nhớ cho lịch trống của bác sĩ: mỗi bác sĩ một DoctorSchedule,
+    các bác sĩ được nhóm theo chuyên khoa. Mọi lịch hẹn còn giữ slot_start (Scheduled hoặc Completed) chiếm slot,
+    giống ràng buộc unique (doctor_id, slot_start); lịch hẹn bị hủy được bỏ slot_start nên không chiếm slot.
+    Nếu có 'since', chỉ mục chỉ chứa các slot từ thời điểm đó trở đi và không trả về slot trống trước đó.
+    """
+
+    def __init__(self, slot_minutes, open_hour, close_hour, since=None):
+        self.slot_length = timedelta(minutes=slot_minutes)
+        self.open_time = datetime.min.time().replace(hour=open_hour)
+        self.close_time = datetime.min.time().replace(hour=close_hour) if close_hour < 24 else datetime.max.time()
+        self.since = since
+        self.lock = threading.RLock()
+        self.doctors = {}
+        self.by_specialization = {}
+        self.loaded_at = None
+        # Các thay đổi được ghi lại trong khi chỉ mục thay thế đang được xây dựng, và chỉ mục thay thế
+        self.recorded = None
+        self.replaced_by = None
+
+    def load(self, doctors, bookings):
+        """
+        Xây dựng lại toàn bộ chỉ mục từ danh sách (doctor_id, name, specialization)
+        và danh sách (doctor_id, slot_start) của các lịch hẹn đang giữ slot.
+        """
+        with self.lock:
+            self.doctors = {}
+            self.by_specialization = {}
+            for doctor_id, name, specialization in doctors:
+                self.add_doctor(doctor_id, name, specialization)
+            for doctor_id, slot_start in sorted(bookings, key=lambda b: (b[0], b[1])):
+                self.book(doctor_id, slot_start)
+            self.loaded_at = time.monotonic()
+
+    def add_doctor(self, doctor_id, name, specialization):
+        with self.lock:
+            self.remove_doctor(doctor_id)
+            schedule = DoctorSchedule(doctor_id, name, specialization)
+            self.doctors[doctor_id] = schedule
+            self.by_specialization.setdefault(specialization.lower(), set()).add(doctor_id)
+
+    def update_doctor(self, doctor_id, name, specialization):
+        with self.lock:
+            schedule = self.doctors.get(doctor_id)
+            if schedule is None:
+                self.add_doctor(doctor_id, name, specialization)
+                return
+            self.by_specialization.get(schedule.specialization.lower(), set()).discard(doctor_id)
+            schedule.name = name
+            schedule.specialization = specialization
+            self.by_specialization.setdefault(specialization.lower(), set()).add(doctor_id)
+
+    def remove_doctor(self, doctor_id):
+        with self.lock:
+            schedule = self.doctors.pop(doctor_id, None)
+            if schedule is not None:
+                self.by_specialization.get(schedule.specialization.lower(), set()).discard(doctor_id)
+
+    def book(self, doctor_id, slot_start):
+        with self.lock:
+            schedule = self.doctors.get(doctor_id)
+            if schedule is not None:
+                schedule.book(slot_start, self.slot_length)
+
+    def release(self, doctor_id, slot_start):
+        with self.lock:
+            schedule = self.doctors.get(doctor_id)
+            if schedule is not None:
+                schedule.release(slot_start, self.slot_length)
+
+    def apply(self, changes):
+        """
+        Áp dụng danh sách thay đổi (op, doctor_id, value) với op là 'book', 'release', 'doctor' hoặc 'remove_doctor'.
+        """
+        with self.lock:
+            if self.replaced_by is not None:
+                # Chỉ mục đã được thay thế sau khi người gọi lấy ra: áp dụng vào chỉ mục mới
+                self.replaced_by.apply(changes)
+                return
+            if self.recorded is not None:
+                self.recorded.extend(changes)
+            for op, doctor_id, value in changes:
+                if op == 'book':
+                    self.book(doctor_id, value)
+                elif op == 'release':
+                    self.release(doctor_id, value)
+                elif op == 'doctor':
+                    self.update_doctor(doctor_id, *value)
+                elif op == 'remove_doctor':
+                    self.remove_doctor(doctor_id)
+
+    def _align(self, t):
+        # Làm tròn lên đầu slot kế tiếp (các slot được tính từ 00:00 mỗi ngày)
+        slot_minutes = int(self.slot_length.total_seconds() // 60)
+        aligned = Appointment.slot_for(t, slot_minutes)
+        return aligned if aligned >= t else aligned + self.slot_length
+
+    def _tagged_free_slots(self, schedule, start, end):
+        for slot in schedule.free_slots(start, end, self.slot_length, self.open_time, self.close_time):
+            yield slot, schedule.doctor_id, schedule
+
+    def earliest_free(self, start, end, limit, doctor_id=None, specialization=None):
+        """
+        Trả về tối đa 'limit' slot trống sớm nhất trong [start, end) dưới dạng (slot_start, DoctorSchedule),
+        lọc theo bác sĩ hoặc chuyên khoa (không lọc nếu cả hai đều None).
+        """
+        with self.lock:
+            if doctor_id is not None:
+                schedule = self.doctors.get(doctor_id)
+                schedules = [schedule] if schedule is not None else []
+            elif specialization is not None:
+                ids = self.by_specialization.get(specialization.lower(), ())
+                schedules = [self.doctors[i] for i in sorted(ids)]
+            else:
+                schedules = [self.doctors[i] for i in sorted(self.doctors)]
+
+            # Gộp các luồng slot trống của từng bác sĩ (đã sắp xếp) để lấy N slot sớm nhất
+            start = self._align(start if self.since is None else max(start, self.since))
+            streams = [self._tagged_free_slots(schedule, start, end) for schedule in schedules]
+            merged = heapq.merge(*streams, key=lambda item: (item[0], item[1]))
+            return [(slot, schedule) for slot, _, schedule in islice(merged, limit)]
+
+_index_lock = threading.Lock()
+
+def _loaded_index():
+    # Chỉ mục của ứng dụng hiện tại, hoặc None nếu chưa được xây dựng
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('availability_index')
+
+def _expired(index):
+    ttl = current_app.config['AVAILABILITY_INDEX_TTL']
+    return ttl > 0 and time.monotonic() - index.loaded_at > ttl
+
+def _build_index(current):
+    """
+    Xây dựng chỉ mục mới từ database mà không giữ lock của chỉ mục hiện tại (các commit vẫn cập nhật được chỉ mục cũ),
+    chỉ nạp các lịch hẹn từ slot hiện tại trở đi. Các thay đổi được commit trong lúc xây dựng được ghi lại và
+    áp dụng lại vào chỉ mục mới trước khi thay thế.
+    """
+    config = current_app.config
+    index = AvailabilityIndex(
+        config['APPOINTMENT_SLOT_MINUTES'],
+        config['CLINIC_OPEN_HOUR'],
+        config['CLINIC_CLOSE_HOUR'],
+        since=Appointment.slot_for(datetime.now(), config['APPOINTMENT_SLOT_MINUTES'])
+    )
+    if current is not None:
+        with current.lock:
+            current.recorded = []
+    try:
+        doctors = db.session.query(Doctor.doctor_id, Doctor.name, Doctor.specialization).all()
+        bookings = db.session.query(Appointment.doctor_id, Appointment.slot_start).filter(
+            Appointment.slot_start >= index.since
+        ).all()
+        index.load(doctors, bookings)
+    except Exception:
+        if current is not None:
+            with current.lock:
+                current.recorded = None
+        raise
+
+    if current is None:
+        current_app.extensions['availability_index'] = index
+        return index
+    with current.lock:
+        index.apply(current.recorded)
+        current.recorded = None
+        current.replaced_by = index
+        current_app.extensions['availability_index'] = index
+    return index
+
+def get_availability_index():
+    """
+    Lấy chỉ mục lịch trống; xây dựng từ database ở lần gọi đầu tiên
+    (và định kỳ nếu AVAILABILITY_INDEX_TTL > 0, để đồng bộ với các tiến trình khác).
+    Trong lúc một thread xây dựng lại chỉ mục, các thread khác tiếp tục dùng chỉ mục cũ.
+    """
+    current = current_app.extensions.get('availability_index')
+    if current is not None and not _expired(current):
+        return current
+    if not _index_lock.acquire(blocking=current is None):
+        return current
+    try:
+        current = current_app.extensions.get('availability_index')
+        if current is not None and not _expired(current):
+            return current
+        return _build_index(current)
+    finally:
+        _index_lock.release()
+
+# Hàm cập nhật chỉ mục cho các lịch hẹn được thêm bằng câu lệnh INSERT trực tiếp (không qua ORM session)
+def index_bookings(bookings):
+    """
+    Đánh dấu các slot (doctor_id, slot_start) là đã bận; gọi sau khi transaction đã commit.
+    """
+    index = _loaded_index()
+    if index is not None:
+        index.apply([('book', doctor_id, slot_start) for doctor_id, slot_start in bookings])
+
+# Hàm cập nhật chỉ mục cho các lịch hẹn được bỏ slot bằng câu lệnh UPDATE trực tiếp (không qua ORM session)
+def release_bookings(bookings):
+    """
+    Đánh dấu các slot (doctor_id, slot_start) là trống; gọi sau khi transaction đã commit.
+    """
+    index = _loaded_index()
+    if index is not None:
+        index.apply([('release', doctor_id, slot_start) for doctor_id, slot_start in bookings])
+
+def _old_value(state, attr):
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else getattr(state.object, attr)
+
+# Lịch hẹn chiếm slot khi còn giữ slot_start, bất kể trạng thái (đúng như ràng buộc unique trong database)
+def _occupies(slot_start):
+    return slot_start is not None
+
+# Ghi nhận các thay đổi của Appointment/Doctor trong session, chỉ áp dụng vào chỉ mục sau khi commit
+@event.listens_for(Session, 'after_flush')
+def _collect_availability_changes(session, flush_context):
+    changes = session.info.setdefault('availability_changes', [])
+    for obj in session.new:
+        if isinstance(obj, Appointment) and _occupies(obj.slot_start):
+            changes.append(('book', obj.doctor_id, obj.slot_start))
+        elif isinstance(obj, Doctor):
+            changes.append(('doctor', obj.doctor_id, (obj.name, obj.specialization)))
+    for obj in session.dirty:
+        if isinstance(obj, Appointment):
+            state = inspect(obj)
+            old = (_old_value(state, 'doctor_id'), _old_value(state, 'slot_start'))
+            new = (obj.doctor_id, obj.slot_start)
+            if old == new:
+                continue
+            if _occupies(old[1]):
+                changes.append(('release', old[0], old[1]))
+            if _occupies(new[1]):
+                changes.append(('book', new[0], new[1]))
+        elif isinstance(obj, Doctor):
+            changes.append(('doctor', obj.doctor_id, (obj.name, obj.specialization)))
+    for obj in session.deleted:
+        if isinstance(obj, Appointment):
+            state = inspect(obj)
+            old_slot = _old_value(state, 'slot_start')
+            if _occupies(old_slot):
+                changes.append(('release', _old_value(state, 'doctor_id'), old_slot))
+        elif isinstance(obj, Doctor):
+            changes.append(('remove_doctor', obj.doctor_id, None))
+
+@event.listens_for(Session, 'after_commit')
+def _apply_availability_changes(session):
+    changes = session.info.pop('availability_changes', None)
+    index = _loaded_index()
+    if not changes or index is None:
+        return
+    index.apply(changes)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_availability_changes(session):
+    session.info.pop('availability_changes', None)
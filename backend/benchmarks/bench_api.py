@@ -0,0 +1,423 @@
+"""
+Đo độ trễ (p50/p95/p99) và throughput của từng API trên bộ dữ liệu tạo bởi generate_data.py.
+Chạy trong tiến trình qua Flask test client (--mode client, dùng DATABASE_URL) hoặc qua một server thật
+(--mode http --url http://127.0.0.1:8000, ví dụ gunicorn/uvicorn chạy trên cùng database).
+Kết quả được ghi ra JSON (kèm commit, cấu hình và quy mô dữ liệu) để so sánh giữa các commit bằng --compare.
+Với --mode http, chạy server với RATE_LIMIT_ENABLED=false để đo được API đăng nhập/đăng ký.
+
+Chạy từ thư mục backend:
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/generate_data.py --patients 100000 --reset
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/bench_api.py --requests 300
+    python benchmarks/bench_api.py --mode http --url http://127.0.0.1:8000 --concurrency 16 \\
+        --compare benchmarks/results/<kết quả trước>.json
+"""
+import argparse
+import fnmatch
+import http.client
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit, quote
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from generate_data import FIRST_NAMES, MIDDLE_NAMES, LAST_NAMES, MEDICATION_NAMES
+from search import normalize
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, 'benchmarks', 'results')
+DEFAULT_MANIFEST = os.path.join(RESULTS_DIR, 'dataset.json')
+# Các API mã hóa mật khẩu (PBKDF2) chậm hơn hàng trăm lần nên được đo với số request nhỏ hơn (--auth-requests)
+PASSWORD_ROUTES = {'auth.login', 'auth.signup'}
+
+class Scenario:
+    """
+    Sinh request cho các API. Các API đọc dùng id ngẫu nhiên trong 90% đầu của mỗi bảng,
+    các API xóa dùng lần lượt các id từ cuối bảng nên không làm ảnh hưởng đến API đọc
+    (khi đã xóa hết 10% cuối thì cần tạo lại dữ liệu bằng generate_data.py).
+    """
+
+    def __init__(self, manifest, seed):
+        self.counts = manifest["counts"]
+        self.user = manifest["user"]
+        self.seed = seed
+        self.local = threading.local()
+        self.sequence = itertools.count(1)  # next() là thao tác nguyên tử, dùng chung giữa các thread
+        self.run_id = f'{os.getpid()}{int(time.time())}'
+        # Id tiếp theo sẽ bị xóa được lưu lại trong manifest để lần chạy sau trên cùng database không xóa lại
+        next_delete = manifest.get("next_delete", {})
+        self.deleted = {table: itertools.count(next_delete.get(table, self.counts[table]), -1)
+                        for table in ('appointments', 'prescriptions', 'payments')}
+        # Lịch hẹn mới được đặt sau toàn bộ dữ liệu có sẵn, mỗi request một slot riêng
+        self.booking_start = datetime.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=400)
+
+    def bind(self, route, worker):
+        # Mỗi (API, thread) một bộ sinh số ngẫu nhiên riêng nên các lần chạy với cùng --seed gửi cùng request
+        self.local.rng = random.Random(f'{self.seed}-{route}-{worker}')
+
+    @property
+    def rng(self):
+        return self.local.rng
+
+    def id(self, table):
+        return self.rng.randint(1, max(1, self.counts[table] * 9 // 10))
+
+    def ids(self, table, count):
+        # Danh sách id cho các API chuyển trạng thái hàng loạt (sau vài lần chạy phần lớn sẽ là 'skipped')
+        return [self.id(table) for _ in range(count)]
+
+    def deleted_id(self, table):
+        return next(self.deleted[table])
+
+    def next_delete(self):
+        return {table: next(counter) for table, counter in self.deleted.items()}
+
+    def booking(self):
+        # Mỗi lần gọi một slot chưa có lịch hẹn (sau dữ liệu có sẵn, trong giờ làm việc)
+        n = next(self.sequence)
+        day, slot = divmod(n, 16)
+        value = self.booking_start + timedelta(days=day, hours=8, minutes=30 * slot)
+        return {"patient_id": self.id('patients'), "doctor_id": self.rng.randint(1, self.counts['doctors']),
+                "appointment_date": value.strftime('%Y-%m-%d %H:%M')}
+
+    def search_query(self):
+        # Câu tìm kiếm giống người dùng gõ: họ tên có hoặc không dấu (có thể chỉ gõ phần đầu của từ cuối),
+        # đầu số điện thoại hoặc phần đầu tên thuốc
+        kind = self.rng.random()
+        if kind < 0.6:
+            words = [self.rng.choice(LAST_NAMES), self.rng.choice(MIDDLE_NAMES), self.rng.choice(FIRST_NAMES)]
+            words = words[self.rng.randint(0, 2):] if self.rng.random() < 0.5 else [words[0], words[2]]
+            query = ' '.join(words)
+            if self.rng.random() < 0.5:
+                query = normalize(query)
+            if self.rng.random() < 0.5:
+                query = query[:max(1, len(query) - self.rng.randint(0, 2))]
+        elif kind < 0.8:
+            query = f'09{self.rng.randrange(10 ** 4):04d}'
+        else:
+            query = self.rng.choice(MEDICATION_NAMES)[:self.rng.randint(3, 6)]
+        return quote(query)
+
+    def prescription_csv(self, rows):
+        lines = ['patient_id,medication_id,dosage,quantity']
+        lines += [f'{self.id("patients")},{self.rng.randint(1, self.counts["medications"])},1 time a day,'
+                  f'{self.rng.randint(1, 30)}' for _ in range(rows)]
+        return '\n'.join(lines) + '\n'
+
+def routes(scenario):
+    """
+    Danh sách API cần đo: (tên endpoint, method, hàm sinh (đường dẫn, body JSON hoặc (content type, body)),
+    các mã trạng thái hợp lệ). Tên giống tên endpoint của Blueprint (giống nhãn 'endpoint' trong /metrics).
+    """
+    s = scenario
+    return [
+        ('index', 'GET', lambda: ('/', None), {200}),
+        # Lịch hẹn
+        ('appointment.get_patient_appointments', 'GET',
+         lambda: (f'/api/appointments/patient/{s.id("patients")}', None), {200}),
+        ('appointment.get_doctor_appointments', 'GET',
+         # Bác sĩ bận nhất (Zipf) được gọi nhiều hơn
+         lambda: (f'/api/appointments/doctor/{min(s.counts["doctors"], int(s.rng.paretovariate(1.0)))}', None), {200}),
+        ('appointment.create_appointment', 'POST', lambda: ('/api/appointments', s.booking()), {201, 409}),
+        ('appointment.create_appointments_bulk', 'POST',
+         lambda: ('/api/appointments/bulk', [s.booking() for _ in range(50)]), {200}),
+        ('appointment.update_appointment_status', 'PUT',
+         lambda: (f'/api/appointments/{s.id("appointments")}', {"status": s.rng.choice(['Scheduled', 'Completed'])}),
+         {200}),
+        ('appointment.update_appointments_status_bulk', 'PUT',
+         lambda: ('/api/appointments/bulk', {"status": 'Completed', "ids": s.ids('appointments', 50)}), {200}),
+        ('appointment.delete_appointment', 'DELETE',
+         lambda: (f'/api/appointments/{s.deleted_id("appointments")}', None), {200}),
+        ('availability.get_availability', 'GET',
+         lambda: (f'/api/availability?doctor_id={s.rng.randint(1, s.counts["doctors"])}', None), {200}),
+        # Danh mục và đăng ký dịch vụ/bảo hiểm
+        ('services.get_all_services', 'GET', lambda: ('/api/services', None), {200}),
+        ('services.get_service_by_id', 'GET', lambda: (f'/api/services/{s.id("services")}', None), {200}),
+        ('services.get_patient_services', 'GET', lambda: (f'/api/services/patient/{s.id("patients")}', None), {200}),
+        ('services.register_service', 'POST',
+         lambda: ('/api/services/register', {"patient_id": s.id('patients'),
+                                             "service_id": s.rng.randint(1, s.counts['services'])}),
+         # 400: bệnh nhân đã đăng ký dịch vụ này
+         {201, 400}),
+        ('services.update_patient_service_status', 'PUT',
+         lambda: (f'/api/services/{s.id("patient_services")}', {"status": s.rng.choice(['Pending', 'Completed'])}),
+         {200}),
+        ('services.update_patient_services_status_bulk', 'PUT',
+         lambda: ('/api/services/bulk', {"status": 'Completed', "ids": s.ids('patient_services', 50)}), {200}),
+        ('insurance.get_all_insurance', 'GET', lambda: ('/api/insurance', None), {200}),
+        ('insurance.get_insurance_by_id', 'GET', lambda: (f'/api/insurance/{s.id("insurances")}', None), {200}),
+        ('insurance.get_patient_insurances', 'GET',
+         lambda: (f'/api/insurance/patient/{s.id("patients")}', None), {200}),
+        ('insurance.register_insurance', 'POST',
+         lambda: ('/api/insurance/register', {"patient_id": s.id('patients'),
+                                              "insurance_id": s.rng.randint(1, s.counts['insurances'])}),
+         {201, 400}),
+        ('insurance.update_patient_insurance_status', 'PUT',
+         lambda: (f'/api/insurance/{s.id("patient_insurances")}', {"status": s.rng.choice(['Active', 'Expired'])}),
+         {200}),
+        ('insurance.update_patient_insurances_status_bulk', 'PUT',
+         lambda: ('/api/insurance/bulk', {"status": 'Expired', "ids": s.ids('patient_insurances', 50)}), {200}),
+        # Đơn thuốc
+        ('prescription.get_patient_prescriptions', 'GET',
+         lambda: (f'/api/prescriptions/patient/{s.id("patients")}', None), {200}),
+        ('prescription.get_prescription_by_id', 'GET',
+         lambda: (f'/api/prescriptions/{s.id("prescriptions")}', None), {200}),
+        ('prescription.create_prescription', 'POST',
+         lambda: ('/api/prescriptions', {"patient_id": s.id('patients'),
+                                         "medication_id": s.rng.randint(1, s.counts['medications']),
+                                         "dosage": '2 times a day', "quantity": s.rng.randint(1, 30)}), {201}),
+        ('prescription.update_prescription', 'PUT',
+         lambda: (f'/api/prescriptions/{s.id("prescriptions")}', {"dosage": '1 time a day', "quantity": 10}), {200}),
+        ('prescription.delete_prescription', 'DELETE',
+         lambda: (f'/api/prescriptions/{s.deleted_id("prescriptions")}', None), {200}),
+        ('prescription.import_prescriptions_file', 'POST',
+         lambda: ('/api/prescriptions/import', ('text/csv', s.prescription_csv(200))), {200}),
+        # Thanh toán, công nợ, tổng quan, báo cáo
+        ('payment.get_patient_payments', 'GET', lambda: (f'/api/payments/patient/{s.id("patients")}', None), {200}),
+        ('payment.get_payment_by_id', 'GET', lambda: (f'/api/payments/{s.id("payments")}', None), {200}),
+        ('payment.create_payment', 'POST',
+         lambda: ('/api/payments', {"patient_id": s.id('patients'), "amount": s.rng.randint(5, 500),
+                                    "description": 'Benchmark'}), {201}),
+        ('payment.update_payment_status', 'PUT',
+         lambda: (f'/api/payments/{s.id("payments")}', {"status": s.rng.choice(['Paid', 'Pending'])}), {200}),
+        ('payment.update_payments_status_bulk', 'PUT',
+         lambda: ('/api/payments/bulk', {"status": 'Paid', "ids": s.ids('payments', 50)}), {200}),
+        ('payment.delete_payment', 'DELETE', lambda: (f'/api/payments/{s.deleted_id("payments")}', None), {200}),
+        ('billing.get_patient_balance', 'GET', lambda: (f'/api/patients/{s.id("patients")}/balance', None), {200}),
+        ('patient.get_patient_overview', 'GET', lambda: (f'/api/patients/{s.id("patients")}/overview', None), {200}),
+        ('reports.get_daily_revenue', 'GET', lambda: ('/api/reports/revenue/daily', None), {200}),
+        ('reports.get_monthly_revenue', 'GET', lambda: ('/api/reports/revenue/monthly', None), {200}),
+        ('reports.get_revenue_by_status', 'GET', lambda: ('/api/reports/revenue/status', None), {200}),
+        # Tìm kiếm
+        ('search.search_all', 'GET', lambda: (f'/api/search?q={s.search_query()}&limit=10', None), {200}),
+        ('search.search_kind', 'GET', lambda: (f'/api/search/patients?q={s.search_query()}', None), {200}),
+        # Xác thực (đăng nhập và đăng ký tốn CPU vì phải mã hóa mật khẩu)
+        ('auth.get_current_user', 'GET', lambda: ('/api/me', None), {200}),
+        ('auth.verify_token', 'POST', lambda: ('/api/verify-token', {"token": s.token}), {200}),
+        ('auth.login', 'POST', lambda: ('/api/login', s.user), {200}),
+        ('auth.signup', 'POST',
+         lambda: ('/api/signup', {"username": f'bench_{s.run_id}_{next(s.sequence)}', "password": 'bench-password',
+                                  "role": 'Patient'}), {201}),
+    ]
+
+class TestClientTransport:
+    # Gọi API trong tiến trình qua Flask test client (mỗi thread một client)
+    def __init__(self):
+        from app import create_app
+        # Mọi request đến từ cùng một IP nên tắt giới hạn đăng nhập/đăng ký để đo được chi phí thật của chúng
+        self.app = create_app({'RATE_LIMIT_ENABLED': False})
+        self.local = threading.local()
+
+    def request(self, method, path, body, headers):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        kwargs = _body_kwargs(body)
+        response = client.open(path, method=method, headers={**headers, **kwargs.pop('headers', {})}, **kwargs)
+        response.get_data()
+        return response.status_code, response.get_json(silent=True)
+
+class HTTPTransport:
+    # Gọi API qua HTTP (mỗi thread một kết nối keep-alive)
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.local = threading.local()
+
+    def request(self, method, path, body, headers):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        kwargs = _body_kwargs(body)
+        data = kwargs.get('data') if 'data' in kwargs else json.dumps(kwargs['json']) if 'json' in kwargs else None
+        request_headers = {**headers, **kwargs.get('headers', {})}
+        if 'json' in kwargs:
+            request_headers['Content-Type'] = 'application/json'
+        try:
+            conn.request(method, path, body=data, headers=request_headers)
+            response = conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self.local.conn = None
+            return 0, None
+        try:
+            return response.status, json.loads(payload)
+        except ValueError:
+            return response.status, None
+
+def _body_kwargs(body):
+    if body is None:
+        return {}
+    if isinstance(body, tuple):
+        content_type, data = body
+        return {"data": data, "headers": {'Content-Type': content_type}}
+    return {"json": body}
+
+def percentile(samples, q):
+    # Phân vị theo nearest-rank trên danh sách đã sắp xếp
+    index = max(0, min(len(samples) - 1, int(round(q / 100 * len(samples) + 0.5)) - 1))
+    return samples[index]
+
+def measure(scenario, transport, headers, name, method, make_request, expected, requests, warmup, concurrency):
+    scenario.bind(name, 'warmup')
+    for _ in range(warmup):
+        transport.request(method, *make_request(), headers)
+
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    remaining = itertools.count()
+
+    def worker(index):
+        scenario.bind(name, index)
+        local_latencies, local_statuses = [], {}
+        while next(remaining) < requests:
+            path, body = make_request()
+            start = time.perf_counter()
+            status, _ = transport.request(method, path, body, headers)
+            local_latencies.append(time.perf_counter() - start)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "method": method,
+        "requests": len(latencies),
+        "errors": sum(count for status, count in statuses.items() if status not in expected),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1)
+    }
+
+def git_revision():
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], cwd=BACKEND_DIR, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {"commit": git('rev-parse', 'HEAD'), "dirty": bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+def compare(results, baseline_path, threshold):
+    """
+    In chênh lệch p50/p95 và throughput so với kết quả trước; trả về danh sách API chậm đi quá 'threshold'.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nSo với {baseline_path} (commit {(baseline['meta'].get('commit') or '?')[:10]}):")
+    print(f"{'endpoint':<45} {'p50':>9} {'p95':>9} {'rps':>9}")
+    regressions = []
+    for name, current in results["routes"].items():
+        previous = baseline["routes"].get(name)
+        if previous is None:
+            continue
+        change = {key: current[key] / previous[key] - 1 if previous[key] else 0.0
+                  for key in ('p50_ms', 'p95_ms', 'throughput_rps')}
+        slower = change['p50_ms'] > threshold and change['p95_ms'] > threshold
+        if slower:
+            regressions.append(name)
+        print(f"{name:<45} {change['p50_ms']:>+8.0%} {change['p95_ms']:>+8.0%} {change['throughput_rps']:>+8.0%}"
+              f"{'  <- chậm hơn' if slower else ''}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mode', choices=['client', 'http'], default='client')
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='địa chỉ server khi --mode http')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST, help='tệp do generate_data.py tạo ra')
+    parser.add_argument('--requests', type=int, default=200, help='số request đo cho mỗi API')
+    parser.add_argument('--auth-requests', type=int, default=20, help='số request đo cho đăng nhập/đăng ký')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=1, help='số thread gửi request đồng thời')
+    parser.add_argument('--only', action='append', help='chỉ đo các API khớp mẫu (ví dụ: "payment.*"), lặp lại được')
+    parser.add_argument('--skip-writes', action='store_true', help='chỉ đo các API GET')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='tệp kết quả JSON (mặc định: results/<commit>-<thời gian>.json)')
+    parser.add_argument('--compare', help='tệp kết quả trước đó để so sánh')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='tỷ lệ chậm đi (p50 và p95) bị coi là hồi quy khi --compare')
+    args = parser.parse_args()
+
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    scenario = Scenario(manifest, args.seed)
+    transport = TestClientTransport() if args.mode == 'client' else HTTPTransport(args.url)
+
+    status, body = transport.request('POST', '/api/login', scenario.user, {})
+    if status != 200:
+        sys.exit(f'Không đăng nhập được bằng tài khoản benchmark (HTTP {status}); chạy lại generate_data.py.')
+    scenario.token = body['token']
+    headers = {'Authorization': 'Bearer ' + scenario.token}
+
+    selected = [route for route in routes(scenario)
+                if (not args.only or any(fnmatch.fnmatch(route[0], pattern) for pattern in args.only))
+                and (not args.skip_writes or route[1] == 'GET')]
+    revision = git_revision()
+    results = {
+        "meta": {
+            **revision,
+            "timestamp": datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "mode": args.mode,
+            "url": args.url if args.mode == 'http' else None,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "dataset": {key: manifest[key] for key in ('database', 'seed', 'doctor_skew', 'counts')}
+        },
+        "routes": {}
+    }
+
+    print(f"{'endpoint':<45} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'lỗi':>5}")
+    for name, method, make_request, expected in selected:
+        requests = args.auth_requests if name in PASSWORD_ROUTES else args.requests
+        result = measure(scenario, transport, headers, name, method, make_request, expected, requests,
+                         min(args.warmup, requests), args.concurrency)
+        results["routes"][name] = result
+        print(f"{name:<45} {result['p50_ms']:8.2f} {result['p95_ms']:8.2f} {result['p99_ms']:8.2f} "
+              f"{result['throughput_rps']:8.1f} {result['errors']:5d}")
+
+    manifest["next_delete"] = scenario.next_delete()
+    with open(args.manifest, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{(revision['commit'] or 'unknown')[:10]}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'\nKết quả: {output}')
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} API chậm hơn quá {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
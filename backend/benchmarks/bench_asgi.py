@@ -0,0 +1,104 @@
+"""
+So sánh throughput khi có nhiều client đồng thời: chế độ WSGI (gunicorn gthread) và chế độ ASGI (uvicorn asgi:app)
+trên các API danh sách lịch hẹn.
+
+Chạy từ thư mục backend (cần cài gunicorn, uvicorn, a2wsgi, aiosqlite; dùng một tệp SQLite tạm):
+    python benchmarks/bench_asgi.py --clients 1000 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_workers import BACKEND_DIR, seed, free_port, wait_ready
+
+async def client(port, token, args, rng, deadline, totals):
+    # Mỗi client một kết nối keep-alive HTTP/1.1, gửi request liên tục cho đến hết thời gian
+    reader = writer = None
+    while time.monotonic() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            if rng.random() < 0.5:
+                path = f'/api/appointments/patient/{rng.randint(1, args.patients)}?limit=20'
+            else:
+                path = f'/api/appointments/doctor/{rng.randint(1, args.doctors)}?limit=20'
+            writer.write(f'GET {path} HTTP/1.1\r\nHost: bench\r\nAuthorization: Bearer {token}\r\n\r\n'.encode())
+            await writer.drain()
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            if status_line.split()[1:2] == [b'200']:
+                totals['done'] += 1
+            else:
+                totals['errors'] += 1
+        except (OSError, asyncio.IncompleteReadError, IndexError):
+            totals['errors'] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.05)
+    if writer is not None:
+        writer.close()
+
+async def load(port, token, args):
+    totals = {'done': 0, 'errors': 0}
+    deadline = time.monotonic() + args.duration
+    await asyncio.gather(*(
+        client(port, token, args, random.Random(i), deadline, totals) for i in range(args.clients)
+    ))
+    return totals['done'] / args.duration, totals['errors']
+
+def run(command, env, port, token, args):
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+        return asyncio.run(load(port, token, args))
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--threads', type=int, default=32, help='số thread của worker gunicorn (WSGI)')
+    parser.add_argument('--patients', type=int, default=500)
+    parser.add_argument('--doctors', type=int, default=50)
+    parser.add_argument('--appointments', type=int, default=20000)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    os.environ['DATABASE_URL'] = 'sqlite:///' + db_file
+    env = dict(os.environ)
+    token = seed(args.patients, args.doctors, args.appointments)
+
+    # Mỗi chế độ một tiến trình worker để so sánh công bằng
+    port = free_port()
+    wsgi = run(['gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+               dict(env, WEB_CONCURRENCY='1', GUNICORN_THREADS=str(args.threads),
+                    GUNICORN_BIND=f'127.0.0.1:{port}', GUNICORN_ACCESS_LOG='/dev/null'),
+               port, token, args)
+    port = free_port()
+    asgi = run([sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+                '--no-access-log', '--log-level', 'warning', '--backlog', str(max(2048, args.clients * 2))],
+               env, port, token, args)
+
+    print(f"clients={args.clients} duration={args.duration}s")
+    print(f"WSGI (gunicorn, 1 worker x {args.threads} thread): {wsgi[0]:10.1f} request/giây (lỗi: {wsgi[1]})")
+    print(f"ASGI (uvicorn, 1 worker)                : {asgi[0]:10.1f} request/giây (lỗi: {asgi[1]}, {asgi[0] / max(wsgi[0], 1e-9):.1f}x)")
+    os.unlink(db_file)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark chỉ mục lịch trống: 500 bác sĩ x 1 năm lịch hẹn.
+
+Chạy từ thư mục backend:
+    python benchmarks/bench_availability.py --doctors 500 --days 365 --fill 0.8
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from availability import AvailabilityIndex
+
+SPECIALIZATIONS = ['Cardiology', 'Dermatology', 'Pediatrics', 'Neurology', 'Orthopedics',
+                   'Ophthalmology', 'Oncology', 'General']
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--doctors', type=int, default=500)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--fill', type=float, default=0.8, help='tỷ lệ slot đã được đặt')
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--slot-minutes', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = AvailabilityIndex(args.slot_minutes, 8, 17)
+    first_day = datetime(2025, 1, 1)
+    slot = timedelta(minutes=args.slot_minutes)
+    slots_per_day = int(timedelta(hours=9) / slot)
+
+    doctors = [(i, f'Doctor {i}', SPECIALIZATIONS[i % len(SPECIALIZATIONS)]) for i in range(1, args.doctors + 1)]
+    bookings = []
+    for doctor_id, _, _ in doctors:
+        for day in range(args.days):
+            day_open = first_day + timedelta(days=day, hours=8)
+            for k in range(slots_per_day):
+                if rng.random() < args.fill:
+                    bookings.append((doctor_id, day_open + k * slot))
+
+    start = time.perf_counter()
+    index.load(doctors, bookings)
+    load_time = time.perf_counter() - start
+    print(f"doctors={args.doctors} days={args.days} bookings={len(bookings)} load={load_time:.2f}s")
+
+    def run(name, query):
+        timings = []
+        for _ in range(args.queries):
+            t0 = first_day + timedelta(minutes=rng.randrange(args.days * 24 * 60))
+            begin = time.perf_counter()
+            query(t0)
+            timings.append(time.perf_counter() - begin)
+        timings.sort()
+        p50 = timings[len(timings) // 2] * 1e6
+        p99 = timings[int(len(timings) * 0.99)] * 1e6
+        print(f"{name:<40} p50={p50:9.1f} µs  p99={p99:9.1f} µs")
+
+    run('10 slot sớm nhất, 1 bác sĩ', lambda t0: index.earliest_free(
+        t0, t0 + timedelta(days=30), 10, doctor_id=rng.randint(1, args.doctors)))
+    run('10 slot sớm nhất, theo chuyên khoa', lambda t0: index.earliest_free(
+        t0, t0 + timedelta(days=30), 10, specialization=rng.choice(SPECIALIZATIONS)))
+
+    # Cập nhật tăng dần: đặt rồi hủy một slot
+    begin = time.perf_counter()
+    for _ in range(args.queries):
+        doctor_id = rng.randint(1, args.doctors)
+        t0 = first_day + timedelta(days=rng.randrange(args.days), hours=8) + rng.randrange(slots_per_day) * slot
+        index.book(doctor_id, t0)
+        index.release(doctor_id, t0)
+    print(f"{'book + release':<40} avg={(time.perf_counter() - begin) / args.queries * 1e6:9.1f} µs")
+
+if __name__ == '__main__':
+    main()
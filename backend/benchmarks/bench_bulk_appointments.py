@@ -0,0 +1,63 @@
+"""
+So sánh throughput tạo lịch hẹn: từng request POST /api/appointments và một request POST /api/appointments/bulk.
+
+Chạy từ thư mục backend (dùng một tệp SQLite tạm):
+    python benchmarks/bench_bulk_appointments.py --count 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=2000)
+    parser.add_argument('--doctors', type=int, default=50)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    os.environ['DATABASE_URL'] = 'sqlite:///' + db_file
+
+    from app import create_app
+    from models import db, Patient, Doctor
+    from utils import generate_token
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add(Patient(patient_id=1, name='Bench', dob=date(1990, 1, 1), gender='M', phone='0', email='b@x'))
+        for doctor_id in range(1, args.doctors + 1):
+            db.session.add(Doctor(doctor_id=doctor_id, name=f'Doctor {doctor_id}', specialization='General', phone='0', email='d@x'))
+        db.session.commit()
+        headers = {'Authorization': 'Bearer ' + generate_token(1, 'Admin')}
+
+    client = app.test_client()
+
+    def items(first_day):
+        # Mỗi phần tử một slot khác nhau (xoay vòng qua các bác sĩ)
+        for k in range(args.count):
+            day, doctor = divmod(k, args.doctors)
+            slot = datetime.combine(first_day, datetime.min.time()) + timedelta(days=day // 18, minutes=480 + (day % 18) * 30)
+            yield {'patient_id': 1, 'doctor_id': doctor + 1, 'appointment_date': slot.strftime('%Y-%m-%d %H:%M')}
+
+    start = time.perf_counter()
+    for item in items(date(2025, 1, 1)):
+        assert client.post('/api/appointments', json=item, headers=headers).status_code == 201
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    response = client.post('/api/appointments/bulk', json=list(items(date(2030, 1, 1))), headers=headers)
+    bulk = time.perf_counter() - start
+    assert response.json['created'] == args.count, response.json['failed']
+
+    print(f"count={args.count}")
+    print(f"từng request : {args.count / single:10.0f} lịch hẹn/giây")
+    print(f"bulk         : {args.count / bulk:10.0f} lịch hẹn/giây ({single / bulk:.1f}x)")
+    os.unlink(db_file)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+So sánh throughput chuyển trạng thái: từng request PUT /api/<loại>/<id> và một request PUT /api/<loại>/bulk
+(theo danh sách id) cho lịch hẹn (Scheduled -> Completed) và thanh toán (Pending -> Paid, cập nhật sổ cái và doanh thu).
+
+Chạy từ thư mục backend (dùng một tệp SQLite tạm):
+    python benchmarks/bench_bulk_status.py --count 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=2000)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    os.environ['DATABASE_URL'] = 'sqlite:///' + db_file
+
+    from app import create_app
+    from models import db, Patient, Doctor, Appointment, Payment
+    from utils import generate_token
+    from ledger import reconcile_balances
+
+    app = create_app({'RATE_LIMIT_ENABLED': False})
+    count = args.count
+    with app.app_context():
+        db.create_all()
+        db.session.add(Patient(patient_id=1, name='Bench', dob=date(1990, 1, 1), gender='M', phone='0', email='b@x'))
+        db.session.add(Doctor(doctor_id=1, name='Doctor', specialization='General', phone='0', email='d@x'))
+        start = datetime(2030, 1, 1, 8, 0)
+        # Hai nhóm dữ liệu giống nhau: nhóm đầu cho từng request, nhóm sau cho bulk
+        db.session.add_all(Appointment(appointment_id=i, patient_id=1, doctor_id=1, status='Scheduled',
+                                       appointment_date=start + timedelta(minutes=30 * i),
+                                       slot_start=start + timedelta(minutes=30 * i))
+                           for i in range(1, 2 * count + 1))
+        db.session.add_all(Payment(payment_id=i, patient_id=1, amount=100, payment_date=start + timedelta(minutes=i),
+                                   description='-', status='Pending')
+                           for i in range(1, 2 * count + 1))
+        db.session.commit()
+        headers = {'Authorization': 'Bearer ' + generate_token(1, 'Admin')}
+
+    client = app.test_client()
+    print(f"count={count}")
+    for name, url, status in (('lịch hẹn', '/api/appointments', 'Completed'), ('thanh toán', '/api/payments', 'Paid')):
+        begin = time.perf_counter()
+        for i in range(1, count + 1):
+            assert client.put(f'{url}/{i}', json={'status': status}, headers=headers).status_code == 200
+        single = time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        response = client.put(f'{url}/bulk', json={'status': status, 'ids': list(range(count + 1, 2 * count + 1))},
+                              headers=headers)
+        bulk = time.perf_counter() - begin
+        assert response.json['updated'] == count, response.json
+
+        print(f"{name:<11} từng request : {count / single:10.0f} dòng/giây")
+        print(f"{name:<11} bulk         : {count / bulk:10.0f} dòng/giây ({single / bulk:.1f}x)")
+
+    with app.app_context():
+        # Sổ cái cập nhật bằng UPDATE trực tiếp phải khớp với kết quả tính lại từ đầu
+        assert reconcile_balances()['mismatched'] == 0
+    os.unlink(db_file)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark chi phí CPU và số byte tiết kiệm được khi nén phản hồi (gzip, br) ở các mức nén khác nhau,
+cho lịch hẹn của một bác sĩ (một trang lớn), lịch sử thanh toán dạng NDJSON (stream) và các danh mục.
+Cột 'Truyền' là thời gian truyền body trên đường truyền chậm (--link-kbps, mặc định 1 Mbit/s).
+Cuối cùng so sánh thời gian xử lý request danh mục khi dùng bản nén sẵn trong cache với khi không nén.
+
+Chạy từ thư mục backend (dùng SQLite trong bộ nhớ):
+    python benchmarks/bench_compression.py --rows 5000 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db, Patient, Doctor, Appointment, Payment, MedicalService, InsuranceService
+from utils import generate_token
+from compression import CACHED_LEVELS, brotli
+
+LEVELS = [('gzip', 1), ('gzip', 6), ('gzip', 9)] + ([('br', 1), ('br', 4), ('br', 11)] if brotli is not None else [])
+
+def seed(rows):
+    db.create_all()
+    first_names = ['An', 'Bình', 'Chi', 'Dũng', 'Giang', 'Hà', 'Khánh', 'Lan', 'Minh', 'Ngọc', 'Phúc', 'Quang']
+    db.session.execute(Patient.__table__.insert(), [
+        {"patient_id": i, "name": f'Nguyễn Văn {first_names[i % len(first_names)]} {i}', "dob": date(1990, 1, 1),
+         "gender": 'Male', "phone": f'09{i:08d}', "email": f'p{i}@example.com'}
+        for i in range(1, 501)
+    ])
+    db.session.add(Doctor(doctor_id=1, name='Trần Thị Bình', specialization='Nội khoa', phone='0', email='d@x'))
+    start = datetime(2024, 1, 1, 8, 0)
+    db.session.execute(Appointment.__table__.insert(), [
+        {"patient_id": i % 500 + 1, "doctor_id": 1, "appointment_date": start + timedelta(minutes=30 * i),
+         "status": ('Scheduled', 'Completed', 'Canceled')[i % 3]}
+        for i in range(rows)
+    ])
+    db.session.execute(Payment.__table__.insert(), [
+        {"patient_id": 1, "amount": Decimal(100000 + i * 1000) / 100, "payment_date": start + timedelta(minutes=37 * i),
+         "description": f'Thanh toán hóa đơn số {i}', "status": 'Paid' if i % 3 else 'Pending'}
+        for i in range(rows)
+    ])
+    db.session.execute(MedicalService.__table__.insert(), [
+        {"service_id": i, "service_name": f'Dịch vụ khám chuyên khoa {i}', "description": f'Mô tả dịch vụ {i}',
+         "price": Decimal(150000 + i * 5000)}
+        for i in range(1, 301)
+    ])
+    db.session.execute(InsuranceService.__table__.insert(), [
+        {"insurance_id": i, "insurance_name": f'Gói bảo hiểm sức khỏe {i}', "description": f'Quyền lợi gói {i}',
+         "price": Decimal(1000000 + i * 50000)}
+        for i in range(1, 101)
+    ])
+    db.session.commit()
+
+def median_ms(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--link-kbps', type=float, default=1000)
+    args = parser.parse_args()
+    if brotli is None:
+        print("Chưa cài thư viện 'brotli': chỉ đo gzip.")
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'RATE_LIMIT_ENABLED': False})
+    compression = app.extensions['compression']
+    with app.app_context():
+        seed(args.rows)
+        token = generate_token(1, 'Admin')
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def transfer_ms(size):
+        return size * 8 / args.link_kbps
+
+    bodies = [
+        ('lịch hẹn bác sĩ (500 dòng)', '/api/appointments/doctor/1?limit=500'),
+        ('thanh toán NDJSON', '/api/payments/patient/1?format=ndjson'),
+        ('danh mục dịch vụ', '/api/services'),
+        ('danh mục bảo hiểm', '/api/insurance'),
+    ]
+    print(f'{"Phản hồi":<28}{"Nén":<14}{"Byte":>10}{"Giảm":>8}{"CPU (ms)":>10}{"Truyền (ms)":>13}')
+    for name, url in bodies:
+        response = client.get(url, headers={**headers, 'Accept-Encoding': 'identity'})
+        body = response.data
+        print(f'{name:<28}{"-":<14}{len(body):>10}{"":>8}{"":>10}{transfer_ms(len(body)):>13.0f}')
+        for encoding, level in LEVELS:
+            size = len(compression.compress(body, encoding, level))
+            cpu = median_ms(args.repeat, lambda: compression.compress(body, encoding, level))
+            print(f'{"":<28}{f"{encoding} {level}":<14}{size:>10}{1 - size / len(body):>8.0%}{cpu:>10.2f}'
+                  f'{transfer_ms(size):>13.0f}')
+        if response.mimetype == 'application/x-ndjson':
+            # Nén theo từng phần như khi stream (flush sau mỗi COMPRESSION_STREAM_FLUSH_SIZE byte)
+            lines = body.splitlines(keepends=True)
+            for encoding in compression.encodings:
+                size = sum(len(chunk) for chunk in compression.compress_stream(lines, encoding))
+                cpu = median_ms(args.repeat, lambda: list(compression.compress_stream(lines, encoding)))
+                label = f'{encoding} {compression.levels[encoding]} stream'
+                print(f'{"":<28}{label:<14}{size:>10}{1 - size / len(body):>8.0%}{cpu:>10.2f}{transfer_ms(size):>13.0f}')
+
+    # Danh mục: bản nén ở mức cao nhất được tạo một lần, các request sau chỉ trả về bytes có sẵn
+    print()
+    print(f'Mức nén của bản nén sẵn: {", ".join(f"{e} {level}" for e, level in CACHED_LEVELS.items())}')
+    for accept_encoding in ('identity', 'gzip') + (('br',) if brotli is not None else ()):
+        request_headers = {**headers, 'Accept-Encoding': accept_encoding}
+        client.get('/api/services', headers=request_headers)
+        ms = median_ms(args.repeat * 10, lambda: client.get('/api/services', headers=request_headers))
+        size = len(client.get('/api/services', headers=request_headers).data)
+        print(f'GET /api/services  Accept-Encoding: {accept_encoding:<9} {ms:6.2f} ms/request  {size:>7} byte')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Mô phỏng tấn công dò mật khẩu (credential stuffing) vào /api/login trong khi người dùng thật vẫn xem lịch hẹn,
+so sánh CPU của server (gunicorn) và độ trễ của người dùng thật khi tắt và bật giới hạn đăng nhập (rate_limit.py).
+IP của kẻ tấn công được giả lập bằng X-Forwarded-For (server chạy với PROXY_FIX_X_FOR=1).
+
+Chạy từ thư mục backend (cần cài gunicorn, dùng một tệp SQLite tạm, mã hóa mật khẩu với số vòng lặp thật):
+    python benchmarks/bench_login_attack.py --attackers 16 --attacker-ips 8 --duration 30
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_workers import BACKEND_DIR, free_port, wait_ready
+
+def seed(iterations):
+    """
+    Tạo bệnh nhân có lịch hẹn (cho người dùng thật) và tài khoản 'victim'; trả về token của người dùng thật.
+    """
+    from app import create_app
+    from models import db, Patient, Doctor, Appointment, User
+    from utils import generate_token, hash_password
+
+    app = create_app({'PASSWORD_HASH_ITERATIONS': iterations})
+    with app.app_context():
+        db.create_all()
+        db.session.add(Patient(patient_id=1, name='Patient', dob=date(1990, 1, 1), gender='M', phone='0', email='p@x'))
+        db.session.add(Doctor(doctor_id=1, name='Doctor', specialization='General', phone='0', email='d@x'))
+        start = datetime(2030, 1, 1, 8)
+        db.session.add_all(Appointment(patient_id=1, doctor_id=1, appointment_date=start + timedelta(minutes=30 * i),
+                                       slot_start=start + timedelta(minutes=30 * i), status='Scheduled')
+                           for i in range(50))
+        db.session.add(User(username='victim', password=hash_password('correct-password'), role='Patient'))
+        db.session.commit()
+        return generate_token(1, 'Admin')
+
+def attacker(port, index, args, stop, statuses, lock):
+    # Mỗi kẻ tấn công dùng một trong các IP, thử username ngẫu nhiên (một nửa là 'victim')
+    rng = random.Random(index)
+    headers = {'Content-Type': 'application/json', 'X-Forwarded-For': f'10.0.0.{index % args.attacker_ips + 1}'}
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    local = {}
+    while not stop.is_set():
+        username = 'victim' if rng.random() < 0.5 else f'user{rng.randrange(100000)}'
+        body = json.dumps({"username": username, "password": f'guess{rng.random()}'})
+        try:
+            conn.request('POST', '/api/login', body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            status = 0
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        local[status] = local.get(status, 0) + 1
+    with lock:
+        for status, count in local.items():
+            statuses[status] = statuses.get(status, 0) + count
+
+def legitimate_user(port, token, stop, latencies):
+    headers = {'Authorization': 'Bearer ' + token, 'X-Forwarded-For': '192.168.1.10'}
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn.request('GET', '/api/appointments/patient/1?limit=20', headers=headers)
+        response = conn.getresponse()
+        response.read()
+        assert response.status == 200
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.05)
+
+def run(args, token, env, rate_limit_enabled):
+    port = free_port()
+    server_env = dict(env, WEB_CONCURRENCY='1', GUNICORN_THREADS=str(args.threads), GUNICORN_BIND=f'127.0.0.1:{port}',
+                      GUNICORN_ACCESS_LOG='/dev/null', PROXY_FIX_X_FOR='1',
+                      RATE_LIMIT_ENABLED='true' if rate_limit_enabled else 'false')
+    server = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'], cwd=BACKEND_DIR,
+                              env=server_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    stop = threading.Event()
+    statuses, lock, latencies = {}, threading.Lock(), []
+    try:
+        wait_ready(port)
+        threads = [threading.Thread(target=attacker, args=(port, i, args, stop, statuses, lock))
+                   for i in range(args.attackers)]
+        threads.append(threading.Thread(target=legitimate_user, args=(port, token, stop, latencies)))
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        server.terminate()
+        # CPU của gunicorn master và các worker (worker đã dừng được master thu hồi nên được cộng vào)
+        _, _, usage = os.wait4(server.pid, 0)
+
+    latencies.sort()
+    label = 'bật giới hạn' if rate_limit_enabled else 'tắt giới hạn'
+    print(f"{label}: {sum(statuses.values())} lần đăng nhập ({', '.join(f'{s}: {c}' for s, c in sorted(statuses.items()))})")
+    print(f"    CPU server {usage.ru_utime + usage.ru_stime:6.1f} s trong {args.duration:.0f} s   "
+          f"người dùng thật: {len(latencies)} request, p50 {statistics.median(latencies) * 1000:8.2f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:8.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--attackers', type=int, default=16, help='số kết nối tấn công đồng thời')
+    parser.add_argument('--attacker-ips', type=int, default=8, help='số địa chỉ IP của kẻ tấn công')
+    parser.add_argument('--threads', type=int, default=8, help='số thread của worker gunicorn')
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--iterations', type=int, default=600000, help='số vòng lặp PBKDF2')
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + db_file, PASSWORD_HASH_ITERATIONS=str(args.iterations))
+    os.environ['DATABASE_URL'] = env['DATABASE_URL']
+    token = seed(args.iterations)
+
+    print(f"attackers={args.attackers} ips={args.attacker_ips} duration={args.duration}s PBKDF2={args.iterations} vòng")
+    for enabled in (False, True):
+        run(args, token, env, enabled)
+    os.unlink(db_file)
+
+if __name__ == '__main__':
+    main()
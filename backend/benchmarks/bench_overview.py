@@ -0,0 +1,137 @@
+"""
+So sánh độ trễ khi tải trang bệnh nhân: gọi riêng 5 API danh sách (fan-out) và gọi một API /api/patients/<id>/overview.
+Đo trong tiến trình (không tính độ trễ mạng) cho cả chế độ WSGI (Flask) và ASGI (asgi.py), kèm số câu SQL mỗi trang.
+
+Chạy từ thư mục backend (dùng một tệp SQLite tạm):
+    python benchmarks/bench_overview.py --pages 500 --rows 200
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FAN_OUT = [
+    '/api/appointments/patient/{id}?limit=10',
+    '/api/prescriptions/patient/{id}?limit=10',
+    '/api/services/patient/{id}?limit=10',
+    '/api/insurance/patient/{id}?limit=10',
+    '/api/payments/patient/{id}?limit=10',
+]
+OVERVIEW = ['/api/patients/{id}/overview?limit=10']
+
+def seed(db, models, patients, rows):
+    Patient, Doctor, Appointment, MedicalService, PatientService, InsuranceService, PatientInsurance, \
+        Medication, Prescription, Payment = models
+    db.create_all()
+    db.session.add_all(Patient(patient_id=i, name=f'Patient {i}', dob=date(1990, 1, 1), gender='M', phone='0', email='p@x')
+                       for i in range(1, patients + 1))
+    db.session.add(Doctor(doctor_id=1, name='Doctor', specialization='General', phone='0', email='d@x'))
+    db.session.add_all(MedicalService(service_id=i, service_name=f'Service {i}', price=10) for i in range(1, rows + 1))
+    db.session.add_all(InsuranceService(insurance_id=i, insurance_name=f'Insurance {i}', price=10) for i in range(1, rows + 1))
+    db.session.add(Medication(medication_id=1, medication_name='Medication', price=1))
+    db.session.flush()
+    start = datetime(2030, 1, 1)
+    for patient_id in range(1, patients + 1):
+        db.session.execute(Appointment.__table__.insert(), [
+            {"patient_id": patient_id, "doctor_id": 1, "appointment_date": start + timedelta(hours=i), "status": 'Completed'}
+            for i in range(rows)])
+        db.session.execute(PatientService.__table__.insert(), [
+            {"patient_id": patient_id, "service_id": i, "status": 'Completed', "price": 10} for i in range(1, rows + 1)])
+        db.session.execute(PatientInsurance.__table__.insert(), [
+            {"patient_id": patient_id, "insurance_id": i, "status": 'Active'} for i in range(1, rows + 1)])
+        db.session.execute(Prescription.__table__.insert(), [
+            {"patient_id": patient_id, "medication_id": 1, "dosage": '1', "quantity": 1, "unit_price": 1}
+            for _ in range(rows)])
+        db.session.execute(Payment.__table__.insert(), [
+            {"patient_id": patient_id, "amount": 1, "payment_date": start + timedelta(hours=i), "description": '-', "status": 'Paid'}
+            for i in range(rows)])
+    db.session.commit()
+
+def summarize(label, samples, statements):
+    samples.sort()
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<22}: p50 {statistics.median(samples) * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms  "
+          f"SQL/trang {statements:5.1f}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--patients', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=200, help='số dòng mỗi loại dữ liệu của mỗi bệnh nhân')
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    os.environ['DATABASE_URL'] = 'sqlite:///' + db_file
+
+    from sqlalchemy import event
+    from asgi import app as asgi_app, flask_app as app
+    from models import (db, Patient, Doctor, Appointment, MedicalService, PatientService, InsuranceService,
+                        PatientInsurance, Medication, Prescription, Payment)
+    from utils import generate_token
+
+    with app.app_context():
+        seed(db, (Patient, Doctor, Appointment, MedicalService, PatientService, InsuranceService, PatientInsurance,
+                  Medication, Prescription, Payment), args.patients, args.rows)
+        token = generate_token(1, 'Admin')
+        engines = [db.engine, app.extensions['async_engine'].sync_engine]
+
+    statements = [0]
+    def count(*_):
+        statements[0] += 1
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', count)
+
+    client = app.test_client()
+    headers = {'Authorization': 'Bearer ' + token}
+    asgi_headers = [(b'authorization', ('Bearer ' + token).encode())]
+
+    def wsgi_page(paths, patient_id):
+        for path in paths:
+            response = client.get(path.format(id=patient_id), headers=headers)
+            assert response.status_code == 200
+
+    async def asgi_get(path):
+        path, _, query = path.partition('?')
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query.encode(), 'headers': asgi_headers}
+        status = []
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+        await asgi_app(scope, None, send)
+        assert status == [200]
+
+    async def asgi_page(paths, patient_id):
+        # Trình duyệt gửi các request fan-out song song
+        await asyncio.gather(*(asgi_get(path.format(id=patient_id)) for path in paths))
+
+    def measure(run):
+        samples = []
+        statements[0] = 0
+        for i in range(args.pages):
+            start = time.perf_counter()
+            run(i % args.patients + 1)
+            samples.append(time.perf_counter() - start)
+        return samples, statements[0] / args.pages
+
+    loop = asyncio.new_event_loop()
+    print(f"pages={args.pages} rows/section={args.rows}")
+    for label, run in [
+        ('WSGI fan-out (5 API)', lambda pid: wsgi_page(FAN_OUT, pid)),
+        ('WSGI overview', lambda pid: wsgi_page(OVERVIEW, pid)),
+        ('ASGI fan-out (5 API)', lambda pid: loop.run_until_complete(asgi_page(FAN_OUT, pid))),
+        ('ASGI overview', lambda pid: loop.run_until_complete(asgi_page(OVERVIEW, pid))),
+    ]:
+        run(1)
+        summarize(label, *measure(run))
+    loop.run_until_complete(app.extensions['async_engine'].dispose())
+    loop.close()
+    os.unlink(db_file)
+
+if __name__ == '__main__':
+    main()
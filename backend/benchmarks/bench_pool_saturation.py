@@ -0,0 +1,64 @@
+"""
+Load test connection pool: nhiều thread cùng giữ kết nối lâu hơn số kết nối pool cho phép,
+để quan sát thời gian chờ checkout, overflow và số lần hết thời gian chờ.
+
+Chạy từ thư mục backend:
+    python benchmarks/bench_pool_saturation.py --threads 32 --pool-size 4 --max-overflow 2 --hold 0.05
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, exc, text
+from db_pool import InstrumentedQueuePool, pool_status
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', default=None, help='mặc định: tệp SQLite tạm')
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=20, help='số truy vấn mỗi thread')
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--max-overflow', type=int, default=2)
+    parser.add_argument('--pool-timeout', type=float, default=1.0)
+    parser.add_argument('--hold', type=float, default=0.05, help='thời gian (giây) giữ kết nối mỗi truy vấn')
+    args = parser.parse_args()
+
+    url = args.url or 'sqlite:///' + tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    engine = create_engine(url, poolclass=InstrumentedQueuePool, pool_size=args.pool_size,
+                           max_overflow=args.max_overflow, pool_timeout=args.pool_timeout)
+
+    completed = [0]
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(args.requests):
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text('SELECT 1'))
+                    time.sleep(args.hold)
+                with lock:
+                    completed[0] += 1
+            except exc.TimeoutError:
+                pass
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    capacity = args.pool_size + args.max_overflow
+    print(f"threads={args.threads} capacity={capacity} hold={args.hold * 1000:.0f}ms elapsed={elapsed:.2f}s")
+    print(f"hoàn thành {completed[0]}/{args.threads * args.requests} truy vấn ({completed[0] / elapsed:.0f}/giây)")
+    for key, value in pool_status(engine.pool).items():
+        print(f"  {key:<22} {value}")
+
+if __name__ == '__main__':
+    main()
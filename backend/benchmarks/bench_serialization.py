@@ -0,0 +1,110 @@
+"""
+Benchmark chi phí chuyển danh sách thanh toán và lịch hẹn (mặc định 10.000 dòng) thành response JSON:
+hàm serialize viết tay (đọc thuộc tính theo tên, strftime, float) + jsonify của Flask (module json chuẩn)
+so với hàm serialize sinh từ cột của câu truy vấn (serializers.row_serializer) + FastJSONProvider (orjson).
+Các dòng được đọc từ database một lần trước khi đo nên kết quả chỉ gồm phần serialize và mã hóa JSON.
+
+Chạy từ thư mục backend:
+    python benchmarks/bench_serialization.py --rows 10000 --repeat 20
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask.json.provider import DefaultJSONProvider
+from app import create_app
+from models import db, Patient, Doctor, Appointment, Payment
+from serializers import (patient_appointments_query, serialize_patient_appointment,
+                         patient_payments_query, serialize_patient_payment)
+from json_provider import FastJSONProvider, orjson
+
+# Các hàm serialize viết tay trước khi có row_serializer (để so sánh)
+def legacy_patient_appointment(row):
+    return {
+        "appointment_id": row.appointment_id,
+        "doctor_id": row.doctor_id,
+        "doctor_name": row.doctor_name,
+        "appointment_date": row.appointment_date.strftime('%Y-%m-%d %H:%M'),
+        "status": row.status
+    }
+
+def legacy_patient_payment(row):
+    return {
+        "payment_id": row.payment_id,
+        "amount": float(row.amount),
+        "payment_date": row.payment_date.strftime('%Y-%m-%d %H:%M:%S'),
+        "description": row.description,
+        "status": row.status
+    }
+
+LISTS = [
+    ('payments', patient_payments_query, legacy_patient_payment, serialize_patient_payment),
+    ('appointments', patient_appointments_query, legacy_patient_appointment, serialize_patient_appointment),
+]
+
+def seed(rows):
+    db.create_all()
+    db.session.add(Patient(patient_id=1, name='Nguyễn Văn An', dob=date(1990, 1, 1), gender='Male',
+                           phone='0912345678', email='an@example.com'))
+    db.session.add(Doctor(doctor_id=1, name='Trần Thị Bình', specialization='Nội khoa', phone='0', email='d@x'))
+    start = datetime(2024, 1, 1, 8, 0)
+    db.session.execute(Payment.__table__.insert(), [
+        {"payment_id": i, "patient_id": 1, "amount": Decimal(100000 + i * 1000) / 100,
+         "payment_date": start + timedelta(minutes=37 * i), "description": f'Thanh toán hóa đơn số {i}',
+         "status": 'Paid' if i % 3 else 'Pending'}
+        for i in range(1, rows + 1)
+    ])
+    db.session.execute(Appointment.__table__.insert(), [
+        {"appointment_id": i, "patient_id": 1, "doctor_id": 1, "appointment_date": start + timedelta(minutes=30 * i),
+         "status": ('Scheduled', 'Completed', 'Canceled')[i % 3]}
+        for i in range(1, rows + 1)
+    ])
+    db.session.commit()
+
+def measure(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+    providers = [('json chuẩn', DefaultJSONProvider(app))]
+    if orjson is not None:
+        providers.append(('orjson', FastJSONProvider(app)))
+    else:
+        print('orjson chưa được cài: FastJSONProvider dùng module json chuẩn.')
+
+    with app.app_context():
+        seed(args.rows)
+        print(f'{"Danh sách":<14}{"Serialize":<12}{"JSON":<12}{"Serialize (ms)":>16}{"Mã hóa (ms)":>14}{"Tổng (ms)":>12}')
+        for name, query, legacy, generated in LISTS:
+            rows = db.session.execute(query(1)).all()
+            baseline = None
+            for serializer_name, serialize in (('viết tay', legacy), ('sinh sẵn', generated)):
+                serialize_ms, items = measure(args.repeat, lambda: [serialize(row) for row in rows])
+                for provider_name, provider in providers:
+                    encode_ms, response = measure(args.repeat, lambda: provider.response(items))
+                    body = response.get_data()
+                    if baseline is None:
+                        baseline = json.loads(body)
+                    assert json.loads(body) == baseline, 'kết quả JSON khác nhau'
+                    print(f'{name:<14}{serializer_name:<12}{provider_name:<12}{serialize_ms:>16.1f}{encode_ms:>14.1f}'
+                          f'{serialize_ms + encode_ms:>12.1f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark chi phí xác thực JWT mỗi request, trước và sau khi có cache token.
+
+Chạy từ thư mục backend:
+    python benchmarks/bench_token_cache.py --sessions 3000 --requests 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt
+from flask import current_app
+from app import create_app
+from utils import generate_token, verify_jwt
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, default=3000)
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+    with app.app_context():
+        run(args)
+
+def run(args):
+    secret_key = current_app.config['SECRET_KEY']
+    rng = random.Random(args.seed)
+    tokens = [generate_token(user_id=i, role='Patient') for i in range(args.sessions)]
+
+    # Phân phối lệch: một số ít phiên hoạt động nhiều (giống lưu lượng thực tế)
+    weights = [1.0 / (rank + 1) for rank in range(args.sessions)]
+    workload = rng.choices(tokens, weights=weights, k=args.requests)
+
+    start = time.perf_counter()
+    for token in workload:
+        jwt.decode(token, secret_key, algorithms=['HS256'])
+    uncached = time.perf_counter() - start
+
+    current_app.extensions['token_cache'].clear()
+    start = time.perf_counter()
+    for token in workload:
+        verify_jwt(token)
+    cached = time.perf_counter() - start
+
+    print(f"sessions={args.sessions} requests={args.requests}")
+    print(f"jwt.decode mỗi request : {uncached / args.requests * 1e6:8.2f} µs")
+    print(f"verify_jwt (có cache)  : {cached / args.requests * 1e6:8.2f} µs")
+    print(f"tăng tốc               : {uncached / cached:8.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+So sánh số request/giây của gunicorn với 1 worker và N worker trên các API lịch hẹn
+(GET /api/appointments/patient/<id> và /api/appointments/doctor/<id>).
+
+Chạy từ thư mục backend (cần cài gunicorn, dùng một tệp SQLite tạm):
+    python benchmarks/bench_workers.py --workers 4 --clients 16 --duration 10
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+def seed(patients, doctors, appointments):
+    """
+    Tạo dữ liệu mẫu và trả về token Admin để gọi API.
+    """
+    from app import create_app
+    from models import db, Patient, Doctor, Appointment
+    from utils import generate_token
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(
+            Patient(patient_id=i, name=f'Patient {i}', dob=date(1990, 1, 1), gender='M', phone='0', email=f'p{i}@x')
+            for i in range(1, patients + 1)
+        )
+        db.session.add_all(
+            Doctor(doctor_id=i, name=f'Doctor {i}', specialization='General', phone='0', email=f'd{i}@x')
+            for i in range(1, doctors + 1)
+        )
+        start = datetime(2030, 1, 1, 8)
+        rows = []
+        for i in range(appointments):
+            appointment_date = start + timedelta(minutes=30 * i)
+            doctor_id = i % doctors + 1
+            rows.append({
+                "patient_id": i % patients + 1,
+                "doctor_id": doctor_id,
+                "appointment_date": appointment_date,
+                "slot_start": appointment_date,
+                "status": 'Scheduled'
+            })
+        db.session.execute(Appointment.__table__.insert(), rows)
+        db.session.commit()
+        return generate_token(1, 'Admin')
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('gunicorn did not start')
+
+def client(port, token, patients, doctors, duration, seed_value, results):
+    # Mỗi client một kết nối keep-alive, gửi request liên tục trong 'duration' giây
+    rng = random.Random(seed_value)
+    headers = {'Authorization': 'Bearer ' + token}
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    done = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        if rng.random() < 0.5:
+            path = f'/api/appointments/patient/{rng.randint(1, patients)}?limit=20'
+        else:
+            path = f'/api/appointments/doctor/{rng.randint(1, doctors)}?limit=20'
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status == 200:
+                done += 1
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    conn.close()
+    results.put((done, errors))
+
+def run(workers, threads, args, token, env):
+    port = free_port()
+    server_env = dict(env, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads),
+                      GUNICORN_BIND=f'127.0.0.1:{port}', GUNICORN_ACCESS_LOG='/dev/null')
+    server = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'], cwd=BACKEND_DIR,
+                              env=server_env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+        # Client chạy trong các tiến trình riêng để không bị giới hạn bởi GIL của tiến trình benchmark
+        results = multiprocessing.Queue()
+        clients = [
+            multiprocessing.Process(target=client, args=(port, token, args.patients, args.doctors, args.duration, i, results))
+            for i in range(args.clients)
+        ]
+        for process in clients:
+            process.start()
+        totals = [results.get() for _ in clients]
+        for process in clients:
+            process.join()
+    finally:
+        # SIGTERM: gunicorn dừng êm (graceful shutdown)
+        server.terminate()
+        server.wait(timeout=60)
+    done = sum(d for d, _ in totals)
+    errors = sum(e for _, e in totals)
+    return done / args.duration, errors
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--patients', type=int, default=500)
+    parser.add_argument('--doctors', type=int, default=50)
+    parser.add_argument('--appointments', type=int, default=20000)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + db_file)
+    os.environ['DATABASE_URL'] = env['DATABASE_URL']
+    token = seed(args.patients, args.doctors, args.appointments)
+
+    single, single_errors = run(1, args.threads, args, token, env)
+    multi, multi_errors = run(args.workers, args.threads, args, token, env)
+
+    print(f"clients={args.clients} threads/worker={args.threads} duration={args.duration}s")
+    print(f"1 worker   : {single:10.1f} request/giây (lỗi: {single_errors})")
+    print(f"{args.workers} worker   : {multi:10.1f} request/giây (lỗi: {multi_errors}, {multi / single:.1f}x)")
+    os.unlink(db_file)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Kiểm tra thời gian khởi động (cold start): thời gian import module 'app' và thời gian gọi create_app().
+Thoát với mã lỗi 1 nếu vượt quá ngân sách; cùng ngân sách được kiểm tra trong tests/test_import_time.py.
+
+Chạy từ thư mục backend:
+    python benchmarks/check_import_time.py --import-budget-ms 800 --create-budget-ms 300
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Đo thời gian create_app() trong tiến trình con (sau khi đã import xong)
+CREATE_APP_SNIPPET = """
+import time
+from app import create_app
+start = time.perf_counter()
+create_app()
+print(f"create_app_us={(time.perf_counter() - start) * 1e6:.0f}")
+"""
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+def _run(args, env):
+    return subprocess.run([sys.executable] + args, cwd=BACKEND_DIR, env=env,
+                          capture_output=True, text=True, check=True)
+
+def measure_import(env, top):
+    """
+    Chạy 'python -X importtime -c "import app"', trả về (tổng thời gian import 'app' tính bằng µs,
+    danh sách 'top' module được 'app' import trực tiếp tốn thời gian nhất).
+    """
+    result = _run(['-X', 'importtime', '-c', 'import app'], env)
+    total = None
+    packages = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        if indent == 1:
+            if name == 'app':
+                total = cumulative
+                break
+            packages = []
+        elif indent == 3:
+            # -X importtime in module con trước module cha, mức thụt lề 3 là module do 'app' import trực tiếp
+            packages.append((cumulative, name))
+    packages.sort(reverse=True)
+    return total, packages[:top]
+
+def measure_create_app(env):
+    result = _run(['-c', CREATE_APP_SNIPPET], env)
+    return int(result.stdout.strip().rsplit('=', 1)[1])
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--import-budget-ms', type=float, default=float(os.getenv('IMPORT_BUDGET_MS', '1000')))
+    parser.add_argument('--create-budget-ms', type=float, default=float(os.getenv('CREATE_APP_BUDGET_MS', '300')))
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    # Không cần database thật: create_app() không mở kết nối khi khởi động
+    env = dict(os.environ, DATABASE_URL=os.getenv('DATABASE_URL', 'sqlite://'))
+
+    # Lấy giá trị nhỏ nhất của nhiều lần chạy để giảm nhiễu
+    samples = [measure_import(env, args.top) for _ in range(args.runs)]
+    import_us, packages = min(samples, key=lambda sample: sample[0])
+    create_us = min(measure_create_app(env) for _ in range(args.runs))
+
+    print(f"import app   : {import_us / 1000:8.1f} ms (ngân sách {args.import_budget_ms:.0f} ms)")
+    print(f"create_app() : {create_us / 1000:8.1f} ms (ngân sách {args.create_budget_ms:.0f} ms)")
+    print("module import trực tiếp tốn thời gian nhất:")
+    for cumulative, name in packages:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    over_budget = import_us / 1000 > args.import_budget_ms or create_us / 1000 > args.create_budget_ms
+    if over_budget:
+        print("VƯỢT NGÂN SÁCH THỜI GIAN KHỞI ĐỘNG")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
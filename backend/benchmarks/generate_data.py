@@ -0,0 +1,296 @@
+"""
+Tạo dữ liệu giả lập (có thể lặp lại với cùng --seed) để chạy benchmark: bệnh nhân, bác sĩ, lịch hẹn, đơn thuốc,
+thanh toán, đăng ký dịch vụ và bảo hiểm, cùng danh mục dịch vụ/bảo hiểm/thuốc và một tài khoản Admin.
+Lịch hẹn dồn nhiều vào một số bác sĩ (phân phối Zipf) giống thực tế. Có thể tạo đến hàng triệu dòng,
+dữ liệu được ghi theo từng lô nên bộ nhớ không phụ thuộc vào quy mô.
+
+Chạy từ thư mục backend với DATABASE_URL của database benchmark (SQLite hoặc MySQL):
+    DATABASE_URL=sqlite:////tmp/bench.db python benchmarks/generate_data.py --patients 100000 --reset
+Thông tin bộ dữ liệu (số dòng, tài khoản) được ghi vào --manifest để bench_api.py sử dụng.
+"""
+import argparse
+import bisect
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+DEFAULT_MANIFEST = os.path.join(BACKEND_DIR, 'benchmarks', 'results', 'dataset.json')
+BENCH_USERNAME = 'bench_admin'
+BENCH_PASSWORD = 'bench-password'
+
+SPECIALIZATIONS = ['General', 'Cardiology', 'Dermatology', 'Pediatrics', 'Neurology', 'Orthopedics', 'Oncology']
+# Họ tên tiếng Việt có dấu (để đo tìm kiếm không phân biệt dấu)
+FIRST_NAMES = ['An', 'Bình', 'Chi', 'Dũng', 'Giang', 'Hoa', 'Khánh', 'Lan', 'Minh', 'Nam', 'Phương', 'Quang',
+               'Thảo', 'Trang', 'Tuấn', 'Vy', 'Đức', 'Hùng', 'Linh', 'Ngọc', 'Sơn', 'Thắng', 'Yến', 'Hải']
+MIDDLE_NAMES = ['Văn', 'Thị', 'Minh', 'Hữu', 'Thu', 'Quốc', 'Ngọc', 'Đình', 'Thanh', 'Xuân']
+LAST_NAMES = ['Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Phan', 'Vũ', 'Đặng', 'Bùi', 'Đỗ', 'Hồ', 'Ngô', 'Dương', 'Lý']
+MEDICATION_NAMES = ['Amoxicillin', 'Paracetamol', 'Ibuprofen', 'Metformin', 'Amlodipine', 'Omeprazole', 'Losartan',
+                    'Atorvastatin', 'Cefuroxime', 'Azithromycin', 'Salbutamol', 'Prednisolone', 'Loratadine',
+                    'Vitamin C', 'Clopidogrel', 'Insulin Glargine']
+
+def zipf_cum_weights(n, s):
+    # Trọng số tích lũy của phân phối Zipf: phần tử thứ i có trọng số 1 / i^s
+    total = 0.0
+    weights = []
+    for i in range(1, n + 1):
+        total += 1.0 / i ** s
+        weights.append(total)
+    return weights
+
+def pick(rng, cum_weights):
+    # Chọn chỉ số (từ 0) theo trọng số tích lũy, O(log n)
+    return bisect.bisect_right(cum_weights, rng.random() * cum_weights[-1])
+
+def chunked(rows, size):
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def money(rng, low, high):
+    return Decimal(rng.randint(low * 100, high * 100)) / 100
+
+def person_name(rng):
+    return f'{rng.choice(LAST_NAMES)} {rng.choice(MIDDLE_NAMES)} {rng.choice(FIRST_NAMES)}'
+
+def patients(rng, count):
+    for i in range(1, count + 1):
+        yield {
+            "patient_id": i,
+            "name": person_name(rng),
+            "dob": date(1940, 1, 1) + timedelta(days=rng.randrange(365 * 80)),
+            "gender": rng.choice(['Male', 'Female']),
+            "address": f'{rng.randint(1, 999)} Street {rng.randint(1, 200)}',
+            "phone": f'09{rng.randrange(10 ** 8):08d}',
+            "email": f'patient{i}@example.com',
+            "medical_history": None
+        }
+
+def doctors(rng, count):
+    for i in range(1, count + 1):
+        yield {
+            "doctor_id": i,
+            "name": person_name(rng),
+            "specialization": SPECIALIZATIONS[i % len(SPECIALIZATIONS)],
+            "phone": f'08{rng.randrange(10 ** 8):08d}',
+            "email": f'doctor{i}@example.com'
+        }
+
+def appointments(rng, count, patient_count, doctor_count, skew, start, days, slot_minutes, open_hour, close_hour, today):
+    """
+    Bác sĩ được chọn theo Zipf nên vài bác sĩ đầu có lịch dày đặc. Mỗi bác sĩ có con trỏ slot riêng tăng dần
+    (bước nhảy trung bình để lịch trải đều trong 'days' ngày) nên (doctor_id, slot_start) không bao giờ trùng;
+    bác sĩ đã kín lịch thì lịch hẹn được chuyển sang bác sĩ khác.
+    """
+    slots_per_day = (close_hour - open_hour) * 60 // slot_minutes
+    capacity = days * slots_per_day
+    if count > doctor_count * capacity * 0.9:
+        sys.exit('Quá nhiều lịch hẹn cho số bác sĩ và số ngày đã chọn; tăng --doctors hoặc --history-days.')
+    cum_weights = zipf_cum_weights(doctor_count, skew)
+    weights = [cum_weights[0]] + [b - a for a, b in zip(cum_weights, cum_weights[1:])]
+    gaps = [max(1, int(capacity / (max(1, count) * weight / cum_weights[-1]))) for weight in weights]
+    next_slot = [-1] * doctor_count
+    for i in range(1, count + 1):
+        while True:
+            doctor = pick(rng, cum_weights)
+            slot_index = next_slot[doctor] + rng.randint(1, 2 * gaps[doctor] - 1)
+            if slot_index < capacity:
+                break
+            # Bác sĩ đã kín lịch: chọn ngẫu nhiên một bác sĩ khác còn chỗ
+            doctor = rng.randrange(doctor_count)
+            slot_index = next_slot[doctor] + 1
+            if slot_index < capacity:
+                break
+        next_slot[doctor] = slot_index
+        day, slot = divmod(slot_index, slots_per_day)
+        slot_start = start + timedelta(days=day, hours=open_hour, minutes=slot * slot_minutes)
+        if slot_start.date() < today:
+            status = 'Canceled' if rng.random() < 0.1 else 'Completed'
+        else:
+            status = 'Canceled' if rng.random() < 0.05 else 'Scheduled'
+        yield {
+            "appointment_id": i,
+            "patient_id": rng.randint(1, patient_count),
+            "doctor_id": doctor + 1,
+            "appointment_date": slot_start,
+            "slot_start": slot_start,
+            "status": status
+        }
+
+def registrations(rng, patient_count, catalog_size, per_patient, id_column, statuses, prices=None):
+    # Mỗi bệnh nhân đăng ký một số mục khác nhau trong danh mục (trung bình 'per_patient');
+    # 'prices' (nếu có): giá của từng mục, lưu trên đăng ký như khi đăng ký qua API
+    row_id = 0
+    for patient_id in range(1, patient_count + 1):
+        count = min(catalog_size, rng.randint(0, per_patient * 2))
+        for item_id in rng.sample(range(1, catalog_size + 1), count):
+            row_id += 1
+            row = {
+                "id": row_id,
+                "patient_id": patient_id,
+                id_column: item_id,
+                "status": rng.choice(statuses)
+            }
+            if prices is not None:
+                row["price"] = prices[item_id - 1]
+            yield row
+
+def prescriptions(rng, count, patient_count, medication_prices):
+    for i in range(1, count + 1):
+        medication_id = rng.randint(1, len(medication_prices))
+        yield {
+            "prescription_id": i,
+            "patient_id": rng.randint(1, patient_count),
+            "medication_id": medication_id,
+            "dosage": f'{rng.choice([1, 2, 3])} times a day',
+            "quantity": rng.randint(1, 60),
+            "unit_price": medication_prices[medication_id - 1]
+        }
+
+def payments(rng, count, patient_count, start, days):
+    for i in range(1, count + 1):
+        yield {
+            "payment_id": i,
+            "patient_id": rng.randint(1, patient_count),
+            "amount": money(rng, 5, 500),
+            "payment_date": start + timedelta(days=rng.randrange(days), seconds=rng.randrange(86400)),
+            "description": 'Hospital fee',
+            "status": 'Paid' if rng.random() < 0.8 else 'Pending'
+        }
+
+def insert(db, table, rows, chunk_size, label):
+    started = time.perf_counter()
+    count = 0
+    for chunk in chunked(rows, chunk_size):
+        db.session.execute(table.insert(), chunk)
+        db.session.commit()
+        count += len(chunk)
+    print(f'{label:<18} {count:>10} dòng  {time.perf_counter() - started:7.1f} s')
+    return count
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--patients', type=int, default=1000)
+    parser.add_argument('--doctors', type=int, help='mặc định: patients / 50 (tối thiểu 5)')
+    parser.add_argument('--appointments', type=int, help='mặc định: 5 x patients')
+    parser.add_argument('--prescriptions', type=int, help='mặc định: 3 x patients')
+    parser.add_argument('--payments', type=int, help='mặc định: 4 x patients')
+    parser.add_argument('--services-per-patient', type=int, default=2)
+    parser.add_argument('--insurances-per-patient', type=int, default=1)
+    parser.add_argument('--services', type=int, default=50, help='số dịch vụ trong danh mục')
+    parser.add_argument('--insurances', type=int, default=10, help='số gói bảo hiểm trong danh mục')
+    parser.add_argument('--medications', type=int, default=200, help='số loại thuốc trong danh mục')
+    parser.add_argument('--doctor-skew', type=float, default=1.1, help='số mũ Zipf của số lịch hẹn theo bác sĩ')
+    parser.add_argument('--history-days', type=int, default=730, help='số ngày dữ liệu trong quá khứ')
+    parser.add_argument('--future-days', type=int, default=60, help='số ngày lịch hẹn trong tương lai')
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help='xóa và tạo lại toàn bộ bảng trước khi tạo dữ liệu')
+    parser.add_argument('--skip-rollups', action='store_true',
+                        help='không tính lại sổ cái công nợ, bảng doanh thu và chỉ mục tìm kiếm sau khi tạo dữ liệu')
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST)
+    args = parser.parse_args()
+
+    counts = {
+        "patients": args.patients,
+        "doctors": args.doctors or max(5, args.patients // 50),
+        "appointments": args.appointments if args.appointments is not None else args.patients * 5,
+        "prescriptions": args.prescriptions if args.prescriptions is not None else args.patients * 3,
+        "payments": args.payments if args.payments is not None else args.patients * 4,
+        "services": args.services,
+        "insurances": args.insurances,
+        "medications": args.medications,
+    }
+
+    from app import create_app
+    from models import (db, Patient, Doctor, Appointment, MedicalService, PatientService, InsuranceService,
+                        PatientInsurance, Medication, Prescription, Payment, User)
+    from ledger import reconcile_balances
+    from revenue import rebuild_revenue
+    from search import rebuild_search_index
+    from utils import hash_password
+
+    app = create_app()
+    rng = random.Random(args.seed)
+    today = date.today()
+    start = datetime.combine(today - timedelta(days=args.history_days), datetime.min.time())
+    config = app.config
+
+    with app.app_context():
+        if args.reset:
+            db.drop_all()
+        db.create_all()
+        if db.session.query(Patient.patient_id).first() is not None:
+            sys.exit('Database đã có dữ liệu; dùng --reset để tạo lại từ đầu.')
+
+        started = time.perf_counter()
+        service_prices = [money(rng, 10, 300) for _ in range(args.services)]
+        insert(db, MedicalService.__table__, (
+            {"service_id": i, "service_name": f'Service {i}', "description": None, "price": service_prices[i - 1]}
+            for i in range(1, args.services + 1)), args.chunk_size, 'MedicalService')
+        insert(db, InsuranceService.__table__, (
+            {"insurance_id": i, "insurance_name": f'Insurance {i}', "coverage": None, "price": money(rng, 50, 1000)}
+            for i in range(1, args.insurances + 1)), args.chunk_size, 'InsuranceService')
+        medication_prices = [money(rng, 1, 50) for _ in range(args.medications)]
+        insert(db, Medication.__table__, (
+            {"medication_id": i, "medication_name": f'{MEDICATION_NAMES[i % len(MEDICATION_NAMES)]} {i}',
+             "description": None, "price": medication_prices[i - 1]}
+            for i in range(1, args.medications + 1)), args.chunk_size, 'Medication')
+        insert(db, Patient.__table__, patients(rng, counts["patients"]), args.chunk_size, 'Patient')
+        insert(db, Doctor.__table__, doctors(rng, counts["doctors"]), args.chunk_size, 'Doctor')
+        insert(db, Appointment.__table__, appointments(
+            rng, counts["appointments"], counts["patients"], counts["doctors"], args.doctor_skew, start,
+            args.history_days + args.future_days,
+            config['APPOINTMENT_SLOT_MINUTES'], config['CLINIC_OPEN_HOUR'], config['CLINIC_CLOSE_HOUR'], today
+        ), args.chunk_size, 'Appointment')
+        counts["patient_services"] = insert(db, PatientService.__table__, registrations(
+            rng, counts["patients"], args.services, args.services_per_patient, 'service_id',
+            ['Pending', 'Completed'], service_prices), args.chunk_size, 'PatientService')
+        counts["patient_insurances"] = insert(db, PatientInsurance.__table__, registrations(
+            rng, counts["patients"], args.insurances, args.insurances_per_patient, 'insurance_id',
+            ['Active', 'Expired']), args.chunk_size, 'PatientInsurance')
+        insert(db, Prescription.__table__, prescriptions(rng, counts["prescriptions"], counts["patients"],
+                                                         medication_prices), args.chunk_size, 'Prescription')
+        insert(db, Payment.__table__, payments(rng, counts["payments"], counts["patients"], start,
+                                               args.history_days), args.chunk_size, 'Payment')
+
+        # Tài khoản dùng để đăng nhập khi chạy benchmark
+        db.session.add(User(username=BENCH_USERNAME, password=hash_password(BENCH_PASSWORD), role='Admin'))
+        db.session.commit()
+
+        # Dữ liệu được ghi bằng INSERT trực tiếp (không qua ORM) nên cần tính lại các bảng tổng hợp và chỉ mục tìm kiếm
+        if not args.skip_rollups:
+            rollup_started = time.perf_counter()
+            reconcile_balances(config['LEDGER_RECONCILE_CHUNK_SIZE'], fix=True, max_mismatches=0)
+            rebuild_revenue(config['REVENUE_REBUILD_CHUNK_MONTHS'])
+            rebuild_search_index(config['SEARCH_REBUILD_CHUNK_SIZE'])
+            print(f'{"Rollups":<18} {"":>10}       {time.perf_counter() - rollup_started:7.1f} s')
+        print(f'Tổng thời gian: {time.perf_counter() - started:.1f} s')
+
+        manifest = {
+            "seed": args.seed,
+            "database": db.engine.url.get_backend_name(),
+            "created_at": datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+            "history_start": start.strftime('%Y-%m-%d'),
+            "doctor_skew": args.doctor_skew,
+            "counts": counts,
+            "user": {"username": BENCH_USERNAME, "password": BENCH_PASSWORD}
+        }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.manifest)), exist_ok=True)
+    with open(args.manifest, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print(f'Manifest: {args.manifest}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+import json
+from itertools import islice
+from flask import request
+
+# Lỗi khi dữ liệu gửi lên cho các API xử lý hàng loạt không hợp lệ
+class BulkInputError(ValueError):
+    pass
+
+# Hàm chia một iterable thành các lô có kích thước cố định
+def chunked(iterable, size):
+    """
+    Chia 'iterable' thành các list có tối đa 'size' phần tử, đọc dần từng lô (không nạp hết vào bộ nhớ).
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+# Hàm đọc từng dòng NDJSON từ stream
+def iter_ndjson(stream):
+    """
+    Đọc lần lượt từng đối tượng JSON trên mỗi dòng của 'stream', bỏ qua dòng trống.
+    """
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            raise BulkInputError(f"Invalid JSON on line {line_no}")
+
+# Hàm đọc danh sách phần tử từ request (JSON array hoặc NDJSON)
+def read_bulk_items(max_items):
+    """
+    Đọc các phần tử từ body của request: JSON array, hoặc NDJSON nếu Content-Type là application/x-ndjson.
+    Ném BulkInputError nếu dữ liệu không hợp lệ hoặc vượt quá 'max_items' phần tử.
+    """
+    if request.mimetype == 'application/x-ndjson':
+        items = iter_ndjson(request.stream)
+    else:
+        items = request.get_json(silent=True)
+        if not isinstance(items, list):
+            raise BulkInputError("Expected a JSON array of items")
+
+    result = []
+    for item in items:
+        if len(result) >= max_items:
+            raise BulkInputError(f"Too many items (max {max_items})")
+        result.append(item)
+    return result
@@ -0,0 +1,133 @@
+import hashlib
+import threading
+import time
+from flask import request, jsonify, Response, current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import MedicalService, InsuranceService
+from compression import CACHED_LEVELS
+
+# Các model thuộc danh mục công khai, mọi thay đổi trên chúng sẽ làm tăng version của cache
+CATALOG_MODELS = (MedicalService, InsuranceService)
+
+class CatalogEntry:
+    """
+    Một phản hồi đã được serialize sẵn thành bytes cùng với ETag (strong) của nó
+    và các bản đã nén (gzip, br) được tạo khi có client đầu tiên yêu cầu rồi dùng lại.
+    """
+    __slots__ = ('body', 'etag', 'compressed', 'expires')
+
+    def __init__(self, body, expires):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.compressed = {}
+        self.expires = expires
+
+    def encoded_body(self, encoding, compression):
+        if encoding is None:
+            return self.body
+        body = self.compressed.get(encoding)
+        if body is None:
+            body = self.compressed[encoding] = compression.compress(self.body, encoding, CACHED_LEVELS[encoding])
+        return body
+
+class CatalogCache:
+    """
+    Cache trong tiến trình cho các API danh mục (dịch vụ, bảo hiểm).
+    Mỗi entry gắn với version hiện tại; khi version tăng thì toàn bộ entry cũ bị bỏ.
+    Version chỉ tăng khi danh mục thay đổi qua ORM session của chính tiến trình này; thay đổi từ worker khác,
+    CLI, migration hay SQL trực tiếp chỉ được thấy khi entry hết hạn sau 'ttl' giây và được đọc lại từ database
+    (ETag tính theo nội dung nên client vẫn nhận 304 nếu dữ liệu không đổi).
+    'clock' là hàm trả về thời gian hiện tại (giây) dùng để tính hạn của entry.
+    """
+
+    def __init__(self, ttl, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._version = 0
+        self._entries = {}
+
+    @property
+    def version(self):
+        return self._version
+
+    def bump(self):
+        with self._lock:
+            self._version += 1
+            self._entries = {}
+
+    def get_or_build(self, key, builder):
+        """
+        Lấy entry theo 'key', nếu chưa có thì gọi 'builder()' để lấy dữ liệu từ database.
+        'builder' trả về None nếu không tìm thấy dữ liệu (không cache kết quả này).
+        """
+        version = self._version
+        now = self.clock()
+        entry = self._entries.get((key, version))
+        if entry is not None and entry.expires > now:
+            return entry
+
+        data = builder()
+        if data is None:
+            return None
+        expired, entry = entry, CatalogEntry(current_app.json.dumps(data).encode('utf-8'), now + self.ttl)
+        # Dữ liệu không đổi sau khi hết hạn: dùng lại các bản đã nén
+        if expired is not None and expired.etag == entry.etag:
+            entry.compressed = expired.compressed
+
+        with self._lock:
+            # Nếu danh mục vừa thay đổi trong lúc build thì không lưu dữ liệu cũ
+            if version == self._version:
+                self._entries[(key, version)] = entry
+        return entry
+
+# Hàm khởi tạo cache danh mục cho ứng dụng
+def init_catalog_cache(app):
+    app.extensions['catalog_cache'] = CatalogCache(app.config['CATALOG_CACHE_TTL'])
+
+# Hàm trả về phản hồi danh mục có hỗ trợ ETag/304
+def catalog_response(key, builder, not_found_message=None):
+    """
+    Trả về phản hồi JSON của danh mục từ cache, nén sẵn theo Accept-Encoding (không phải nén lại mỗi request).
+    Nếu header If-None-Match khớp với ETag thì trả về 304 mà không cần truy vấn database.
+    """
+    entry = current_app.extensions['catalog_cache'].get_or_build(key, builder)
+    if entry is None:
+        return jsonify({"message": not_found_message}), 404
+
+    # Bản đã nén có ETag riêng (mỗi cách nén là một biểu diễn khác nhau)
+    compression = current_app.extensions['compression']
+    encoding = compression.negotiate(request.headers.get('Accept-Encoding'), len(entry.body))
+    etag = entry.etag if encoding is None else f'{entry.etag}-{encoding}'
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(entry.encoded_body(encoding, compression), status=200, mimetype='application/json')
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    if compression.enabled:
+        response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = f"public, max-age={current_app.config['CATALOG_CACHE_MAX_AGE']}, must-revalidate"
+    return response
+
+# Đánh dấu session có thay đổi danh mục, chỉ tăng version sau khi commit thành công
+@event.listens_for(Session, 'after_flush')
+def _mark_catalog_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, CATALOG_MODELS):
+            session.info['catalog_changed'] = True
+            return
+
+@event.listens_for(Session, 'after_commit')
+def _bump_catalog_version(session):
+    if session.info.pop('catalog_changed', False) and has_app_context():
+        catalog_cache = current_app.extensions.get('catalog_cache')
+        if catalog_cache is not None:
+            catalog_cache.bump()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_catalog_changes(session):
+    session.info.pop('catalog_changed', None)
@@ -0,0 +1,131 @@
+import gzip
+import zlib
+from flask import request
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # brotli là phụ thuộc tùy chọn: không có thì chỉ nén gzip
+    brotli = None
+
+# Mức nén cho các phản hồi được nén một lần rồi dùng lại (cache danh mục): nén chậm hơn nhưng nhỏ nhất
+CACHED_LEVELS = {'br': 11, 'gzip': 9}
+# Các mã trạng thái không có body hoặc không được nén
+UNCOMPRESSED_STATUSES = (204, 206, 304)
+
+class StreamCompressor:
+    """
+    Nén một phản hồi dạng stream (chunked) theo từng phần. flush() trả về dữ liệu đã nén của các chunk
+    đã nhận để client giải nén được ngay (không phải chờ hết stream), finish() kết thúc stream nén.
+    """
+
+    def __init__(self, encoding, level):
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=level)
+            self.compress, self.flush, self.finish = compressor.process, compressor.flush, compressor.finish
+        else:
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: định dạng gzip
+            self.compress, self.finish = compressor.compress, compressor.flush
+            self.flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+
+class Compression:
+    """
+    Nén phản hồi theo header Accept-Encoding của client (br nếu có cài brotli, gzip).
+    Chỉ nén các kiểu nội dung trong 'mimetypes' có kích thước từ 'min_size' byte trở lên
+    (phản hồi nhỏ thì phần header gzip và CPU tốn hơn số byte tiết kiệm được).
+    Phản hồi dạng stream được nén theo từng phần khoảng 'stream_flush_size' byte chưa nén.
+    """
+
+    def __init__(self, enabled, min_size, levels, mimetypes, stream_flush_size):
+        self.enabled = enabled
+        self.min_size = min_size
+        self.levels = levels
+        self.mimetypes = frozenset(mimetypes)
+        self.stream_flush_size = stream_flush_size
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def negotiate(self, accept_encoding, size=None):
+        """
+        Chọn cách nén mà client chấp nhận (ưu tiên theo trọng số q của client, bằng nhau thì ưu tiên br),
+        None nếu không nén (tắt nén, client không hỗ trợ hoặc phản hồi nhỏ hơn min_size).
+        """
+        if not self.enabled or not accept_encoding or (size is not None and size < self.min_size):
+            return None
+        return parse_accept_header(accept_encoding).best_match(self.encodings)
+
+    def compress(self, data, encoding, level=None):
+        if level is None:
+            level = self.levels[encoding]
+        if encoding == 'br':
+            return brotli.compress(data, quality=level)
+        # mtime=0: cùng dữ liệu luôn cho cùng kết quả nén
+        return gzip.compress(data, compresslevel=level, mtime=0)
+
+    def compress_stream(self, chunks, encoding, close=None):
+        compressor = StreamCompressor(encoding, self.levels[encoding])
+        compressed, pending = [], 0
+        try:
+            for chunk in chunks:
+                compressed.append(compressor.compress(chunk))
+                pending += len(chunk)
+                if pending >= self.stream_flush_size:
+                    compressed.append(compressor.flush())
+                    yield b''.join(compressed)
+                    compressed, pending = [], 0
+            compressed.append(compressor.finish())
+            yield b''.join(compressed)
+        finally:
+            if close is not None:
+                close()
+
+    def compress_response(self, response, accept_encoding):
+        """
+        Nén body của một phản hồi Flask/Werkzeug (nếu phù hợp) và cập nhật các header liên quan.
+        Phản hồi đã có Content-Encoding (ví dụ: danh mục đã nén sẵn) được giữ nguyên.
+        """
+        if (not self.enabled or response.status_code < 200 or response.status_code in UNCOMPRESSED_STATUSES
+                or response.mimetype not in self.mimetypes
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+        response.vary.add('Accept-Encoding')
+        if 'Content-Encoding' in response.headers:
+            return response
+
+        if response.is_streamed:
+            encoding = self.negotiate(accept_encoding)
+            if encoding is None:
+                return response
+            chunks = response.response
+            response.response = self.compress_stream(response.iter_encoded(), encoding, getattr(chunks, 'close', None))
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            encoding = self.negotiate(accept_encoding, len(data))
+            if encoding is None:
+                return response
+            response.set_data(self.compress(data, encoding))
+
+        response.headers['Content-Encoding'] = encoding
+        # Mỗi cách nén là một biểu diễn khác nhau nên cần ETag (strong) khác nhau
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(f'{etag}-{encoding}')
+        return response
+
+# Hàm khởi tạo nén phản hồi cho ứng dụng Flask
+def init_compression(app):
+    config = app.config
+    compression = Compression(
+        enabled=config['COMPRESSION_ENABLED'],
+        min_size=config['COMPRESSION_MIN_SIZE'],
+        levels={'br': config['COMPRESSION_BROTLI_QUALITY'], 'gzip': config['COMPRESSION_GZIP_LEVEL']},
+        mimetypes=[m.strip() for m in config['COMPRESSION_MIMETYPES'].split(',') if m.strip()],
+        stream_flush_size=config['COMPRESSION_STREAM_FLUSH_SIZE'],
+    )
+    app.extensions['compression'] = compression
+
+    @app.after_request
+    def _compress_response(response):
+        if request.method == 'HEAD':
+            return response
+        return compression.compress_response(response, request.headers.get('Accept-Encoding'))
@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+
+class PoolStats:
+    """
+    Số liệu của một connection pool: số lần lấy kết nối, thời gian chờ, số lần hết thời gian chờ,
+    số kết nối mới được mở và mức overflow cao nhất đã dùng.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.overflow_max = 0
+
+    def record_checkout(self, wait, overflow):
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_wait_total += wait
+            if wait > self.checkout_wait_max:
+                self.checkout_wait_max = wait
+            if overflow > self.overflow_max:
+                self.overflow_max = overflow
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool có đo thời gian chờ khi lấy kết nối (checkout) và ghi nhận số liệu vào 'stats'.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_checkout(time.perf_counter() - start, max(self.overflow(), 0))
+        return connection
+
+    def _create_connection(self):
+        self.stats.record_connect()
+        return super()._create_connection()
+
+# Hàm trả về trạng thái hiện tại của pool
+def pool_status(pool):
+    """
+    Trả về dict mô tả trạng thái pool: kích thước, số kết nối đang dùng/đang rảnh, overflow
+    và các số liệu tích lũy (nếu pool là InstrumentedQueuePool).
+    """
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow
+        })
+    stats = getattr(pool, 'stats', None)
+    if stats is not None:
+        with stats._lock:
+            status.update({
+                "checkouts": stats.checkouts,
+                "checkout_wait_avg_ms": round(stats.checkout_wait_total / stats.checkouts * 1000, 3) if stats.checkouts else 0.0,
+                "checkout_wait_max_ms": round(stats.checkout_wait_max * 1000, 3),
+                "timeouts": stats.timeouts,
+                "connects": stats.connects,
+                "overflow_max": stats.overflow_max
+            })
+    return status
+
+def _env_bool(name, default):
+    return os.getenv(name, default).lower() in ['true', 'on', '1']
+
+# Hàm tạo cấu hình engine (connection pool) từ biến môi trường
+def engine_options(database_uri):
+    """
+    Tạo SQLALCHEMY_ENGINE_OPTIONS từ các biến môi trường DB_POOL_*.
+    SQLite trong bộ nhớ dùng pool riêng của SQLAlchemy nên không áp dụng các tùy chọn này.
+    """
+    if database_uri.startswith('sqlite') and (database_uri in ('sqlite://', 'sqlite:///') or ':memory:' in database_uri):
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": int(os.getenv('DB_POOL_SIZE', '10')),
+        "max_overflow": int(os.getenv('DB_MAX_OVERFLOW', '20')),
+        "pool_timeout": float(os.getenv('DB_POOL_TIMEOUT', '30')),
+        # Đóng và mở lại kết nối trước khi MySQL tự ngắt kết nối rảnh (wait_timeout)
+        "pool_recycle": int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        # Kiểm tra kết nối còn sống trước khi dùng, tránh lỗi sau khi MySQL ngắt kết nối rảnh
+        "pool_pre_ping": _env_bool('DB_POOL_PRE_PING', 'true')
+    }
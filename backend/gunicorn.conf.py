@@ -0,0 +1,53 @@
+# Cấu hình gunicorn cho môi trường production. Chạy từ thư mục backend:
+#     gunicorn -c gunicorn.conf.py wsgi:app
+# Mọi giá trị đều có thể ghi đè bằng biến môi trường.
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Mỗi worker là một tiến trình với nhiều thread; phần lớn thời gian request là chờ MySQL nên dùng worker 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', str(cpu_count * 2 + 1)))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_class = 'gthread'
+
+# Tạo ứng dụng một lần trong tiến trình master rồi fork (khởi động nhanh, dùng chung bộ nhớ).
+# Kết nối database được bỏ trong từng worker sau khi fork (xem wsgi.py)
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() in ['true', 'on', '1']
+
+# Khởi động lại worker sau một số request (có độ lệch ngẫu nhiên để các worker không khởi động lại cùng lúc)
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+# Dừng êm: khi nhận SIGTERM, worker có 'graceful_timeout' giây để xử lý nốt các request đang chạy
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+# Chia CPU cho pool mã hóa mật khẩu của các worker thay vì mỗi worker dùng toàn bộ CPU.
+# Lưu ý: tổng số kết nối tối đa là workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW), cần nhỏ hơn max_connections của MySQL
+os.environ.setdefault('PASSWORD_HASH_WORKERS', str(max(1, cpu_count // workers)))
+
+# Mỗi worker có chỉ mục lịch trống riêng, chỉ tự cập nhật theo lịch hẹn đặt/hủy trong chính worker đó:
+# đọc lại từ database thường xuyên hơn để slot vừa được đặt ở worker khác không còn hiện là trống quá lâu
+os.environ.setdefault('AVAILABILITY_INDEX_TTL', '15')
+
+# Thư mục chung để /metrics trả về tổng số liệu của mọi worker (mỗi tiến trình master một thư mục, xóa khi dừng)
+temporary_metrics_dir = 'METRICS_DIR' not in os.environ
+os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), f'healthcare-metrics-{os.getpid()}'))
+
+def on_exit(server):
+    if temporary_metrics_dir:
+        shutil.rmtree(os.environ['METRICS_DIR'], ignore_errors=True)
+
+def worker_exit(server, worker):
+    # Đóng kết nối database của worker khi dừng (hết max_requests, SIGTERM, ...)
+    from app import shutdown_app
+    shutdown_app(worker.wsgi)
@@ -0,0 +1,199 @@
+import csv
+import json
+from sqlalchemy.exc import DBAPIError
+from models import db, Patient, Medication, Prescription
+from bulk import chunked
+from ledger import record_prescriptions
+
+class ImportReport:
+    """
+    Kết quả của một lần import: số dòng thành công, số dòng lỗi và chi tiết lỗi theo dòng
+    (chỉ giữ tối đa 'max_errors' lỗi đầu tiên để bộ nhớ không tăng theo kích thước tệp).
+    """
+
+    def __init__(self, max_errors):
+        self.max_errors = max_errors
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "message": message})
+
+    def to_dict(self):
+        return {
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors)
+        }
+
+# Giá trị lớn nhất của cột INTEGER (32 bit) trong MySQL
+INT_MAX = 2 ** 31 - 1
+INVALID_ENCODING = "Invalid UTF-8"
+DOSAGE_MAX_LENGTH = Prescription.__table__.c.dosage.type.length
+
+# Lỗi của một dòng được phát hiện khi đọc tệp (trước khi kiểm tra nội dung)
+class RowError:
+    __slots__ = ('message',)
+
+    def __init__(self, message):
+        self.message = message
+
+def _decode(lines, invalid):
+    # Dòng không phải UTF-8 được thay bằng dòng trống và số dòng được ghi vào 'invalid'
+    for line_no, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            try:
+                line = line.decode('utf-8')
+            except UnicodeDecodeError:
+                invalid.append(line_no)
+                line = '\n'
+        yield line
+
+# Hàm đọc từng dòng CSV (có dòng tiêu đề)
+def iter_csv_rows(lines):
+    """
+    Đọc lần lượt các dòng CSV từ 'lines' (bytes hoặc str), trả về (số dòng, dict);
+    dòng không phải UTF-8 trả về (số dòng, RowError).
+    """
+    invalid = []
+    reader = csv.DictReader(_decode(lines, invalid))
+    for row in reader:
+        while invalid:
+            yield invalid.pop(0), RowError(INVALID_ENCODING)
+        yield reader.line_num, row
+    for line_no in invalid:
+        yield line_no, RowError(INVALID_ENCODING)
+
+# Hàm đọc từng dòng NDJSON
+def iter_ndjson_rows(lines):
+    """
+    Đọc lần lượt các dòng NDJSON, trả về (số dòng, dict); dòng không phải JSON object trả về (số dòng, None),
+    dòng không phải UTF-8 trả về (số dòng, RowError).
+    """
+    invalid = []
+    for line_no, line in enumerate(_decode(lines, invalid), 1):
+        if invalid:
+            invalid.pop()
+            yield line_no, RowError(INVALID_ENCODING)
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_no, row if isinstance(row, dict) else None
+
+def _parse_prescriptions(rows, medication_prices, medication_names, report):
+    # Kiểm tra từng dòng, chỉ trả về các dòng hợp lệ; dòng lỗi được ghi vào report
+    for line, row in rows:
+        if row is None:
+            report.error(line, "Invalid row")
+            continue
+        if isinstance(row, RowError):
+            report.error(line, row.message)
+            continue
+
+        patient_id = row.get('patient_id')
+        medication_id = row.get('medication_id')
+        medication_name = row.get('medication_name')
+        dosage = row.get('dosage')
+        quantity = row.get('quantity')
+
+        if not patient_id or not (medication_id or medication_name) or not dosage or not quantity:
+            report.error(line, "Missing required fields")
+            continue
+
+        try:
+            patient_id = int(patient_id)
+            quantity = int(quantity)
+            medication_id = int(medication_id) if medication_id else None
+        except (ValueError, TypeError):
+            report.error(line, "Invalid patient_id, medication_id or quantity")
+            continue
+        # Giá trị ngoài phạm vi cột INTEGER làm lỗi cả câu INSERT của lô
+        if not 0 < patient_id <= INT_MAX or (medication_id is not None and not 0 < medication_id <= INT_MAX):
+            report.error(line, "Invalid patient_id or medication_id")
+            continue
+        if not 0 < quantity <= INT_MAX:
+            report.error(line, "Quantity must be between 1 and 2147483647")
+            continue
+        dosage = str(dosage)
+        if len(dosage) > DOSAGE_MAX_LENGTH:
+            report.error(line, f"Dosage is too long (max {DOSAGE_MAX_LENGTH} characters)")
+            continue
+
+        # Xác định thuốc qua bảng Medication đã nạp sẵn (theo id hoặc theo tên)
+        if medication_id is None:
+            medication_id = medication_names.get(str(medication_name).strip().lower())
+        if medication_id not in medication_prices:
+            report.error(line, "Medication not found")
+            continue
+
+        yield line, {
+            "patient_id": patient_id,
+            "medication_id": medication_id,
+            "dosage": dosage,
+            "quantity": quantity,
+            "unit_price": medication_prices[medication_id]
+        }
+
+def _insert_prescription_chunk(chunk, report):
+    # Kiểm tra bệnh nhân tồn tại bằng một truy vấn IN cho cả lô
+    patient_ids = {row['patient_id'] for _, row in chunk}
+    existing = {pid for (pid,) in db.session.query(Patient.patient_id).filter(Patient.patient_id.in_(patient_ids))}
+
+    rows = []
+    for line, row in chunk:
+        if row['patient_id'] in existing:
+            rows.append((line, row))
+        else:
+            report.error(line, "Patient not found")
+    if not rows:
+        return []
+
+    try:
+        # INSERT dạng executemany cho cả lô, mỗi lô một transaction
+        db.session.execute(Prescription.__table__.insert(), [row for _, row in rows])
+        inserted = rows
+    except DBAPIError:
+        # Thử lại từng dòng để chỉ bỏ qua những dòng bị lỗi (vi phạm ràng buộc, dữ liệu không hợp lệ)
+        db.session.rollback()
+        inserted = []
+        for line, row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(Prescription.__table__.insert(), row)
+                inserted.append((line, row))
+            except DBAPIError:
+                report.error(line, "Could not insert prescription")
+    # Cập nhật sổ cái công nợ trong cùng transaction với lô đơn thuốc
+    record_prescriptions([row for _, row in inserted])
+    db.session.commit()
+
+    report.imported += len(inserted)
+    return inserted
+
+# Hàm import đơn thuốc hàng loạt
+def import_prescriptions(rows, chunk_size, max_errors=100):
+    """
+    Import đơn thuốc từ 'rows' (kết quả của iter_csv_rows/iter_ndjson_rows), đọc và ghi theo từng lô
+    'chunk_size' dòng nên không nạp toàn bộ tệp vào bộ nhớ. Dòng lỗi không làm dừng quá trình import.
+    """
+    # Đơn giá của thuốc tại thời điểm import được lưu trên từng đơn thuốc
+    medication_prices = {}
+    medication_names = {}
+    for medication_id, medication_name, price in db.session.query(
+            Medication.medication_id, Medication.medication_name, Medication.price):
+        medication_prices[medication_id] = price
+        medication_names.setdefault(medication_name.strip().lower(), medication_id)
+
+    report = ImportReport(max_errors)
+    for chunk in chunked(_parse_prescriptions(rows, medication_prices, medication_names, report), chunk_size):
+        _insert_prescription_chunk(chunk, report)
+    return report
@@ -0,0 +1,59 @@
+import decimal
+from datetime import date, datetime
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson là phụ thuộc tùy chọn: không có thì dùng module json chuẩn
+    orjson = None
+
+# Hàm chuyển các kiểu dữ liệu không có sẵn trong JSON (giống định dạng của các hàm serialize trong serializers.py)
+def json_default(value):
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat(' ', 'seconds')
+    if isinstance(value, date):
+        return value.isoformat()
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider của ứng dụng: mã hóa bằng orjson (nhanh hơn module json chuẩn nhiều lần, ghi thẳng ra bytes UTF-8)
+    nếu đã cài, ngược lại dùng module json chuẩn. Decimal, datetime và date được mã hóa trực tiếp
+    (số thực, 'YYYY-MM-DD HH:MM:SS', 'YYYY-MM-DD') thay vì phải chuyển đổi trước.
+    """
+    default = staticmethod(json_default)
+    ensure_ascii = False
+    sort_keys = False
+
+    def _options(self):
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        return options | orjson.OPT_SORT_KEYS if self.sort_keys else options
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=json_default, option=self._options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        options = self._options()
+        if self.compact is False or (self.compact is None and self._app.debug):
+            options |= orjson.OPT_INDENT_2
+        body = orjson.dumps(obj, default=json_default, option=options)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+# Hàm chọn JSON provider cho ứng dụng (cấu hình JSON_PROVIDER: 'fast' hoặc 'default' của Flask)
+def init_json_provider(app):
+    if app.config['JSON_PROVIDER'] == 'fast':
+        app.json = FastJSONProvider(app)
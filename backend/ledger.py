@@ -0,0 +1,247 @@
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy import event, inspect, select, func, union_all, literal
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models import db, Patient, Payment, PatientService, Prescription, PatientBalance
+
+# Các cột cộng dồn của sổ cái
+LEDGER_FIELDS = ('services_total', 'prescriptions_total', 'paid_total', 'pending_total')
+# Trạng thái thanh toán -> cột tương ứng trong sổ cái
+PAYMENT_FIELDS = {'Paid': 'paid_total', 'Pending': 'pending_total'}
+CENT = Decimal('0.01')
+
+def money(value):
+    # Làm tròn như phép tính DECIMAL của MySQL (half-up), không phải mặc định half-even của Decimal
+    return Decimal(str(value)).quantize(CENT, ROUND_HALF_UP)
+
+class LedgerChanges:
+    """
+    Các thay đổi cần cộng vào sổ cái trong một transaction: {(patient_id, cột): số tiền}.
+    Dịch vụ và đơn thuốc được tính theo giá đã lưu trên chính dòng đó (giá tại thời điểm đăng ký/kê đơn),
+    nên thay đổi bảng giá sau này không làm sai lệch công nợ.
+    """
+
+    def __init__(self):
+        self.amounts = defaultdict(Decimal)
+
+    def payment(self, patient_id, amount, status, sign):
+        field = PAYMENT_FIELDS.get(status)
+        if field is not None and amount is not None:
+            self.amounts[(patient_id, field)] += sign * money(amount)
+
+    def service(self, patient_id, price, sign):
+        if price is not None:
+            self.amounts[(patient_id, 'services_total')] += sign * money(price)
+
+    def prescription(self, patient_id, unit_price, quantity, sign):
+        if unit_price is not None and quantity is not None:
+            self.amounts[(patient_id, 'prescriptions_total')] += sign * money(unit_price) * int(quantity)
+
+    def __bool__(self):
+        return bool(self.amounts)
+
+    def apply(self, connection):
+        """
+        Cộng các thay đổi vào sổ cái qua 'connection' (cùng transaction với thay đổi gốc).
+        """
+        by_patient = defaultdict(dict)
+        for (patient_id, field), amount in self.amounts.items():
+            if amount:
+                by_patient[patient_id][field] = amount
+        now = datetime.utcnow()
+        for patient_id in sorted(by_patient):
+            increment_row(connection, PatientBalance.__table__, {"patient_id": patient_id}, by_patient[patient_id],
+                          LEDGER_FIELDS, updated_at=now)
+
+# Hàm cộng dồn các cột của một dòng tổng hợp (sổ cái, doanh thu, ...), tạo dòng nếu chưa có
+def increment_row(connection, table, keys, changes, fields, **values):
+    """
+    Cộng 'changes' ({cột: số}) vào dòng có khóa 'keys' của 'table' bằng một câu UPDATE
+    (không đọc rồi ghi lại nên không bị mất cập nhật khi chạy đồng thời). Nếu chưa có dòng thì tạo mới
+    với các cột trong 'fields' bắt đầu từ 0; 'values' là các cột được gán thẳng (ví dụ: updated_at).
+    """
+    condition = [table.c[key] == value for key, value in keys.items()]
+    update = table.update().where(*condition).values(
+        **values, **{field: table.c[field] + amount for field, amount in changes.items()}
+    )
+    if connection.execute(update).rowcount:
+        return
+    # Chưa có dòng: tạo mới; nếu transaction khác vừa tạo trước thì cộng dồn như bình thường
+    try:
+        with connection.begin_nested():
+            connection.execute(table.insert().values(
+                **keys, **values, **{field: changes.get(field, 0) for field in fields}
+            ))
+    except IntegrityError:
+        connection.execute(update)
+
+def _old_value(state, attr):
+    history = state.attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return history.unchanged[0] if history.unchanged else getattr(state.object, attr)
+
+# Hàm lấy giá trị của các thuộc tính trước khi thay đổi (dùng trong sự kiện after_flush)
+def old_values(obj, attrs):
+    state = inspect(obj)
+    return tuple(_old_value(state, attr) for attr in attrs)
+
+PAYMENT_ATTRS = ('patient_id', 'amount', 'status')
+SERVICE_ATTRS = ('patient_id', 'price')
+PRESCRIPTION_ATTRS = ('patient_id', 'unit_price', 'quantity')
+
+def _record(changes, obj, values, sign):
+    if isinstance(obj, Payment):
+        changes.payment(*values, sign)
+    elif isinstance(obj, PatientService):
+        changes.service(*values, sign)
+    elif isinstance(obj, Prescription):
+        changes.prescription(*values, sign)
+
+def _attrs(obj):
+    if isinstance(obj, Payment):
+        return PAYMENT_ATTRS
+    if isinstance(obj, PatientService):
+        return SERVICE_ATTRS
+    if isinstance(obj, Prescription):
+        return PRESCRIPTION_ATTRS
+    return None
+
+# Cập nhật sổ cái ngay trong flush (cùng transaction) khi thanh toán, đăng ký dịch vụ hoặc đơn thuốc thay đổi
+@event.listens_for(Session, 'after_flush')
+def _update_ledger(session, flush_context):
+    changes = LedgerChanges()
+    for obj in session.new:
+        attrs = _attrs(obj)
+        if attrs is not None:
+            _record(changes, obj, tuple(getattr(obj, attr) for attr in attrs), 1)
+    for obj in session.dirty:
+        attrs = _attrs(obj)
+        if attrs is None:
+            continue
+        old = old_values(obj, attrs)
+        new = tuple(getattr(obj, attr) for attr in attrs)
+        if old != new:
+            _record(changes, obj, old, -1)
+            _record(changes, obj, new, 1)
+    for obj in session.deleted:
+        attrs = _attrs(obj)
+        if attrs is not None:
+            _record(changes, obj, old_values(obj, attrs), -1)
+    if changes:
+        changes.apply(session.connection())
+
+# Hàm cập nhật sổ cái cho các đơn thuốc được thêm bằng câu lệnh INSERT trực tiếp (không qua ORM session)
+def record_prescriptions(rows):
+    """
+    Cộng tiền của các đơn thuốc 'rows' (dict có patient_id, unit_price, quantity) vào sổ cái;
+    gọi trước khi commit để cùng transaction với câu lệnh INSERT.
+    """
+    changes = LedgerChanges()
+    for row in rows:
+        changes.prescription(row['patient_id'], row['unit_price'], row['quantity'], 1)
+    if changes:
+        changes.apply(db.session.connection())
+
+def _expected_and_ledger(patient_ids):
+    """
+    Trả về ({patient_id: {cột: Decimal}} tính lại từ PatientService, Prescription (theo giá đã lưu trên từng dòng)
+    và Payment, {patient_id: {cột: Decimal}} đang có trong PatientBalance (chỉ các bệnh nhân đã có dòng sổ cái)).
+    Các bảng được đọc trong cùng một câu lệnh nên cùng một snapshot ở mọi mức isolation.
+    """
+    sources = [
+        select(literal('services_total'), PatientService.patient_id, func.sum(PatientService.price))
+            .where(PatientService.patient_id.in_(patient_ids))
+            .group_by(PatientService.patient_id),
+        select(literal('prescriptions_total'), Prescription.patient_id,
+               func.sum(Prescription.unit_price * Prescription.quantity))
+            .where(Prescription.patient_id.in_(patient_ids))
+            .group_by(Prescription.patient_id),
+    ]
+    for status, field in PAYMENT_FIELDS.items():
+        sources.append(select(literal(field), Payment.patient_id, func.sum(Payment.amount))
+            .where(Payment.patient_id.in_(patient_ids), Payment.status == status)
+            .group_by(Payment.patient_id))
+    # Mỗi dòng sổ cái được đọc thành một dòng 'ledger' cho mỗi cột
+    for field in LEDGER_FIELDS:
+        sources.append(select(literal('ledger:' + field), PatientBalance.patient_id, PatientBalance.__table__.c[field])
+            .where(PatientBalance.patient_id.in_(patient_ids)))
+
+    expected = {patient_id: dict.fromkeys(LEDGER_FIELDS, Decimal(0)) for patient_id in patient_ids}
+    ledger = {}
+    for source, patient_id, total in db.session.execute(union_all(*sources)):
+        if source.startswith('ledger:'):
+            ledger.setdefault(patient_id, {})[source[len('ledger:'):]] = money(total or 0)
+        else:
+            expected[patient_id][source] = money(total or 0)
+    return expected, ledger
+
+# Hàm tính lại công nợ từ toàn bộ lịch sử cho một nhóm bệnh nhân
+def compute_balances(patient_ids):
+    """
+    Trả về {patient_id: {cột: Decimal}} tính trực tiếp từ PatientService, Prescription (theo giá đã lưu trên
+    từng dòng) và Payment.
+    """
+    return _expected_and_ledger(patient_ids)[0]
+
+# Hàm đối soát sổ cái với kết quả tính lại từ đầu
+def reconcile_balances(chunk_size=1000, fix=False, max_mismatches=100):
+    """
+    Duyệt toàn bộ bệnh nhân theo từng lô 'chunk_size', so sánh PatientBalance với kết quả tính lại.
+    Nếu 'fix' thì cộng phần chênh lệch vào các dòng sai lệch bằng 'col = col + delta' (như các cập nhật thông thường,
+    không ghi đè), nên cập nhật của các giao dịch được ghi đồng thời, kể cả dòng sổ cái vừa được tạo, không bị mất.
+    Trả về báo cáo dạng dict.
+    """
+    report = {"checked": 0, "mismatched": 0, "fixed": 0, "mismatches": []}
+    last_id = 0
+    while True:
+        patient_ids = db.session.execute(
+            select(Patient.patient_id).where(Patient.patient_id > last_id).order_by(Patient.patient_id).limit(chunk_size)
+        ).scalars().all()
+        if not patient_ids:
+            break
+        last_id = patient_ids[-1]
+        expected, ledger = _expected_and_ledger(patient_ids)
+
+        corrections = LedgerChanges()
+        for patient_id in patient_ids:
+            current = ledger.get(patient_id, dict.fromkeys(LEDGER_FIELDS, Decimal(0)))
+            if current == expected[patient_id]:
+                continue
+            report["mismatched"] += 1
+            if len(report["mismatches"]) < max_mismatches:
+                report["mismatches"].append({
+                    "patient_id": patient_id,
+                    "ledger": {field: float(value) for field, value in current.items()},
+                    "expected": {field: float(value) for field, value in expected[patient_id].items()}
+                })
+            for field in LEDGER_FIELDS:
+                corrections.amounts[(patient_id, field)] += expected[patient_id][field] - current[field]
+            if fix:
+                report["fixed"] += 1
+
+        report["checked"] += len(patient_ids)
+        # Kết thúc transaction của lô (giải phóng khóa và identity map)
+        if fix and corrections:
+            corrections.apply(db.session.connection())
+            db.session.commit()
+        else:
+            db.session.rollback()
+        db.session.expunge_all()
+    return report
+
+def serialize_balance(patient_id, balance):
+    totals = {field: money(getattr(balance, field)) if balance else Decimal(0) for field in LEDGER_FIELDS}
+    charges = totals['services_total'] + totals['prescriptions_total']
+    return {
+        "patient_id": patient_id,
+        "services_total": float(totals['services_total']),
+        "prescriptions_total": float(totals['prescriptions_total']),
+        "charges_total": float(charges),
+        "paid_total": float(totals['paid_total']),
+        "pending_total": float(totals['pending_total']),
+        "balance": float(charges - totals['paid_total']),
+        "updated_at": balance.updated_at.strftime('%Y-%m-%d %H:%M:%S') if balance else None
+    }
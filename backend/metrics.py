@@ -0,0 +1,319 @@
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Ngưỡng (giây) của histogram thời gian xử lý request
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Ngưỡng của histogram số câu SQL trong một request
+SQL_STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+# Tên endpoint cho các request không khớp route nào (tránh tạo nhãn theo từng URL)
+UNMATCHED_ENDPOINT = 'unmatched'
+
+# Số câu SQL và tổng thời gian SQL của request hiện tại: [số câu, giây] (None nếu không trong request)
+_sql_stats = contextvars.ContextVar('sql_stats', default=None)
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _sql_stats.get() is not None:
+        context._metrics_start = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _sql_stats.get()
+    start = getattr(context, '_metrics_start', None)
+    if stats is not None and start is not None:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - start
+
+def _observe(histograms, key, buckets, value):
+    # Histogram lưu số lần rơi vào từng ngưỡng (không cộng dồn) + ô +Inf, phần tử cuối là tổng giá trị
+    histogram = histograms.get(key)
+    if histogram is None:
+        histogram = histograms[key] = [0] * (len(buckets) + 2)
+    histogram[bisect.bisect_left(buckets, value)] += 1
+    histogram[-1] += value
+
+class _Shard:
+    """
+    Số liệu của một thread. Chỉ thread sở hữu ghi vào shard nên không cần khóa khi ghi nhận request;
+    khi xuất số liệu, các dict được sao chép nguyên khối (dict(...) không nhả GIL).
+    """
+
+    def __init__(self):
+        self.thread = threading.current_thread()
+        self.requests = {}  # (method, endpoint, status) -> số request
+        self.latency = {}  # (method, endpoint) -> histogram thời gian xử lý
+        self.sql_statements = {}  # endpoint -> histogram số câu SQL mỗi request
+        self.sql_seconds = {}  # endpoint -> tổng thời gian SQL
+        self.in_flight = 0
+
+    def snapshot(self):
+        return {
+            "requests": dict(self.requests),
+            "latency": dict(self.latency),
+            "sql_statements": dict(self.sql_statements),
+            "sql_seconds": dict(self.sql_seconds),
+            "in_flight": self.in_flight
+        }
+
+def _empty_snapshot():
+    return {"requests": {}, "latency": {}, "sql_statements": {}, "sql_seconds": {}, "in_flight": 0}
+
+# Hàm cộng số liệu 'source' vào 'target' (cùng cấu trúc với _empty_snapshot)
+def _merge_snapshot(target, source):
+    for name in ('requests', 'sql_seconds'):
+        counters = target[name]
+        for key, value in source[name].items():
+            counters[key] = counters.get(key, 0) + value
+    for name in ('latency', 'sql_statements'):
+        histograms = target[name]
+        for key, histogram in source[name].items():
+            current = histograms.get(key)
+            histograms[key] = list(histogram) if current is None else [a + b for a, b in zip(current, histogram)]
+    target["in_flight"] += source["in_flight"]
+
+def _encode(key):
+    return '\t'.join(key) if isinstance(key, tuple) else key
+
+def _decode(key):
+    return tuple(key.split('\t')) if '\t' in key else key
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class Metrics:
+    """
+    Số liệu HTTP và SQL của một tiến trình, ghi theo từng thread (_Shard) rồi cộng lại khi xuất.
+    Nếu có 'directory' (METRICS_DIR), mỗi tiến trình ghi số liệu của mình ra '<pid>.json' mỗi 'flush_interval' giây
+    (bằng thread nền, không làm chậm request) để /metrics ở bất kỳ worker nào cũng trả về tổng của mọi worker.
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.reset()
+
+    def reset(self):
+        # Gọi sau khi fork: tiến trình con bắt đầu với số liệu trống và ghi ra tệp của chính nó
+        self._local = threading.local()
+        self._shards = []
+        # Số liệu đã gộp của các thread đã kết thúc (server tạo thread mới cho mỗi request/kết nối)
+        self._retired = _empty_snapshot()
+        self._shards_lock = threading.Lock()
+        self._flusher = None
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _start_flusher(self):
+        # Thread nền ghi số liệu ra tệp mỗi 'flush_interval' giây (tạo khi có request đầu tiên, tức là sau khi fork)
+        with self._shards_lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_forever, name='metrics-flusher', daemon=True)
+        self._flusher.start()
+
+    def _flush_forever(self):
+        flusher = self._flusher
+        # Dừng khi reset() sau fork đã thay thread khác
+        while self._flusher is flusher:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def start_request(self):
+        """
+        Ghi nhận một request bắt đầu; trả về trạng thái cần truyền lại cho finish_request.
+        """
+        if self.directory and self._flusher is None:
+            self._start_flusher()
+        shard = self._shard()
+        shard.in_flight += 1
+        stats = [0, 0.0]
+        return shard, _sql_stats.set(stats), stats, time.perf_counter()
+
+    def finish_request(self, state, method, endpoint, status):
+        shard, token, stats, start = state
+        duration = time.perf_counter() - start
+        _sql_stats.reset(token)
+        shard.in_flight -= 1
+        key = (method, endpoint)
+        request_key = (method, endpoint, str(status))
+        shard.requests[request_key] = shard.requests.get(request_key, 0) + 1
+        _observe(shard.latency, key, LATENCY_BUCKETS, duration)
+        _observe(shard.sql_statements, endpoint, SQL_STATEMENT_BUCKETS, stats[0])
+        shard.sql_seconds[endpoint] = shard.sql_seconds.get(endpoint, 0.0) + stats[1]
+
+    def snapshot(self):
+        # Tổng số liệu của các thread trong tiến trình này
+        with self._shards_lock:
+            # Shard của thread đã kết thúc không còn được ghi: gộp vào _retired rồi bỏ để danh sách không tăng mãi
+            alive = []
+            for shard in self._shards:
+                if shard.thread.is_alive():
+                    alive.append(shard)
+                else:
+                    _merge_snapshot(self._retired, shard.snapshot())
+            self._retired["in_flight"] = 0
+            self._shards = alive
+            snapshot = _empty_snapshot()
+            _merge_snapshot(snapshot, self._retired)
+        for shard in alive:
+            _merge_snapshot(snapshot, shard.snapshot())
+        return snapshot
+
+    def flush(self):
+        """
+        Ghi số liệu của tiến trình ra '<pid>.json' trong METRICS_DIR.
+        """
+        if self.directory:
+            self._write(f'{os.getpid()}.json', self.snapshot())
+
+    def collect(self):
+        """
+        Trả về tổng số liệu của mọi tiến trình (hoặc chỉ tiến trình này nếu không có METRICS_DIR).
+        Số liệu của các worker đã dừng vẫn được giữ lại (counter không bao giờ giảm), trừ số request đang xử lý.
+        """
+        if not self.directory:
+            return self.snapshot()
+        self.flush()
+        dead = [name for name in os.listdir(self.directory)
+                if name.endswith('.json') and name[:-5].isdigit() and not _pid_alive(int(name[:-5]))]
+        if dead:
+            with self._lock(exclusive=True):
+                self._archive(dead)
+
+        total = _empty_snapshot()
+        # Đọc dưới khóa chia sẻ để không đếm hai lần một tệp đang được gộp vào archive.json
+        with self._lock(exclusive=False):
+            for name in os.listdir(self.directory):
+                if name.endswith('.json'):
+                    _merge_snapshot(total, self._load(name))
+        return total
+
+    @contextmanager
+    def _lock(self, exclusive):
+        import fcntl
+        with open(os.path.join(self.directory, 'metrics.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _load(self, name):
+        with open(os.path.join(self.directory, name)) as f:
+            data = json.load(f)
+        return {name: {_decode(key): value for key, value in values.items()} if isinstance(values, dict) else values
+                for name, values in data.items()}
+
+    def _archive(self, dead):
+        # Gộp tệp của các worker đã dừng (max_requests, khởi động lại) vào archive.json để số tệp không tăng mãi
+        archive = self._load('archive.json') if os.path.exists(os.path.join(self.directory, 'archive.json')) \
+            else _empty_snapshot()
+        dead = [name for name in dead if os.path.exists(os.path.join(self.directory, name))]
+        for name in dead:
+            _merge_snapshot(archive, self._load(name))
+        # Worker đã dừng không còn request nào đang xử lý
+        archive["in_flight"] = 0
+        self._write('archive.json', archive)
+        for name in dead:
+            os.unlink(os.path.join(self.directory, name))
+
+    def _write(self, name, snapshot):
+        # Ghi tệp tạm rồi đổi tên để không ai đọc được tệp ghi dở
+        data = {name: {_encode(key): value for key, value in values.items()} if isinstance(values, dict) else values
+                for name, values in snapshot.items()}
+        path = os.path.join(self.directory, name)
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+
+def _labels(**labels):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+def _render_histogram(lines, name, histograms, buckets, label_names):
+    for key, histogram in sorted(histograms.items()):
+        labels = dict(zip(label_names, key if isinstance(key, tuple) else (key,)))
+        cumulative = 0
+        for bound, count in zip((*buckets, '+Inf'), histogram[:-1]):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {cumulative}')
+        lines.append(f'{name}_sum{_labels(**labels)} {histogram[-1]}')
+        lines.append(f'{name}_count{_labels(**labels)} {cumulative}')
+
+# Hàm xuất số liệu theo định dạng text của Prometheus
+def render_metrics(snapshot):
+    lines = [
+        '# HELP http_requests_total Total number of HTTP requests.',
+        '# TYPE http_requests_total counter',
+    ]
+    for (method, endpoint, status), count in sorted(snapshot["requests"].items()):
+        lines.append(f'http_requests_total{_labels(method=method, endpoint=endpoint, status=status)} {count}')
+
+    lines += [
+        '# HELP http_request_duration_seconds HTTP request latency in seconds.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    _render_histogram(lines, 'http_request_duration_seconds', snapshot["latency"], LATENCY_BUCKETS, ('method', 'endpoint'))
+
+    lines += [
+        '# HELP http_requests_in_flight Number of HTTP requests currently being processed.',
+        '# TYPE http_requests_in_flight gauge',
+        f'http_requests_in_flight {snapshot["in_flight"]}',
+        '# HELP http_request_sql_statements Number of SQL statements executed per HTTP request.',
+        '# TYPE http_request_sql_statements histogram',
+    ]
+    _render_histogram(lines, 'http_request_sql_statements', snapshot["sql_statements"], SQL_STATEMENT_BUCKETS,
+                      ('endpoint',))
+
+    lines += [
+        '# HELP http_request_sql_duration_seconds_total Time spent executing SQL statements, in seconds.',
+        '# TYPE http_request_sql_duration_seconds_total counter',
+    ]
+    for endpoint, seconds in sorted(snapshot["sql_seconds"].items()):
+        lines.append(f'http_request_sql_duration_seconds_total{_labels(endpoint=endpoint)} {seconds}')
+    return '\n'.join(lines) + '\n'
+
+# Hàm khởi tạo số liệu cho ứng dụng Flask và đăng ký các hook đo request
+def init_metrics(app):
+    """
+    Gọi trước khi đăng ký các Blueprint để hook before_request này chạy đầu tiên (đo cả các hook khác).
+    """
+    metrics = Metrics(app.config['METRICS_DIR'], app.config['METRICS_FLUSH_INTERVAL'])
+    app.extensions['metrics'] = metrics
+
+    @app.before_request
+    def _start_request_metrics():
+        g._metrics_state = metrics.start_request()
+
+    @app.after_request
+    def _record_response_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_request_metrics(exc):
+        state = g.pop('_metrics_state', None)
+        if state is None:
+            return
+        endpoint = request.url_rule.endpoint if request.url_rule is not None else UNMATCHED_ENDPOINT
+        metrics.finish_request(state, request.method, endpoint, g.pop('_metrics_status', 500))
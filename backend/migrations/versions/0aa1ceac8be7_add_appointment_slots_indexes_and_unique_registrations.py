@@ -0,0 +1,214 @@
+"""add appointment slots, indexes and unique registrations
+
+Revision ID: 0aa1ceac8be7
+Revises: fe4a59b2a70b
+Create Date: 2026-10-18 08:36:03.844828
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+from flask import current_app
+
+
+# revision identifiers, used by Alembic.
+revision = '0aa1ceac8be7'
+down_revision = 'fe4a59b2a70b'
+branch_labels = None
+depends_on = None
+
+
+APPOINTMENT = sa.table('Appointment', sa.column('appointment_id', sa.Integer()), sa.column('doctor_id', sa.Integer()),
+                       sa.column('appointment_date', sa.DateTime()), sa.column('status', sa.String()),
+                       sa.column('slot_start', sa.DateTime()))
+# Các lịch hẹn chưa bị hủy theo thứ tự (bác sĩ, ngày, id): các lịch hẹn cùng slot nằm liền nhau
+SLOT_KEYS = (APPOINTMENT.c.doctor_id, APPOINTMENT.c.appointment_date, APPOINTMENT.c.appointment_id)
+ACTIVE_APPOINTMENTS = sa.select(*SLOT_KEYS).where(APPOINTMENT.c.status != 'Canceled').order_by(*SLOT_KEYS)
+
+
+def x_flag(name):
+    # Tùy chọn của migration: flask db upgrade -x <name>=true
+    return context.get_x_argument(as_dictionary=True).get(name) == 'true'
+
+
+def slot_for(appointment_date):
+    slot_minutes = current_app.config['APPOINTMENT_SLOT_MINUTES']
+    minutes = appointment_date.hour * 60 + appointment_date.minute
+    minutes -= minutes % slot_minutes
+    return appointment_date.replace(hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0)
+
+
+def slot_groups(rows):
+    # Gom các dòng liên tiếp cùng (bác sĩ, slot): trả về (doctor_id, slot_start, các id)
+    key, ids = None, []
+    for doctor_id, appointment_date, appointment_id in rows:
+        row_key = (doctor_id, slot_for(appointment_date))
+        if row_key != key:
+            if ids:
+                yield (*key, ids)
+            key, ids = row_key, []
+        ids.append(appointment_id)
+    if ids:
+        yield (*key, ids)
+
+
+def find_slot_conflicts():
+    """
+    Trả về các slot có nhiều lịch hẹn chưa bị hủy: (doctor_id, slot_start, id giữ slot (nhỏ nhất), các id còn lại).
+    Chạy trước mọi thay đổi schema (chưa có chỉ mục theo bác sĩ, ngày) nên đọc cả bảng bằng một câu truy vấn
+    dạng stream thay vì từng lô keyset.
+    """
+    rows = op.get_bind().execute(ACTIVE_APPOINTMENTS.execution_options(stream_results=True, yield_per=1000))
+    conflicts = []
+    for doctor_id, slot_start, ids in slot_groups(rows):
+        if len(ids) > 1:
+            kept = min(ids)
+            conflicts.append((doctor_id, slot_start, kept, sorted(i for i in ids if i != kept)))
+    return conflicts
+
+
+def report_slot_conflicts(conflicts):
+    """
+    Mô tả các lịch hẹn trùng slot đang chặn ràng buộc unique (doctor_id, slot_start), hoặc None nếu không có
+    hoặc đã chọn "-x cancel_conflicting_appointments=true" (các lịch hẹn trùng sẽ được chuyển sang 'Canceled').
+    """
+    if not conflicts or x_flag('cancel_conflicting_appointments'):
+        return None
+    examples = ', '.join(f"(doctor_id={doctor_id}, slot_start={slot_start:%Y-%m-%d %H:%M}: keep id={kept}, "
+                         f"conflicting ids={', '.join(map(str, others))})"
+                         for doctor_id, slot_start, kept, others in conflicts[:20])
+    return f"Appointment: {len(conflicts)} (doctor_id, slot_start) slots booked more than once, e.g. {examples}"
+
+
+def cancel_conflicting_appointments(conflicts):
+    # Chỉ chạy khi có "-x cancel_conflicting_appointments=true": lịch hẹn bị hủy không giữ slot (slot_start NULL)
+    ids = [i for *_, others in conflicts for i in others]
+    for start in range(0, len(ids), 1000):
+        op.get_bind().execute(APPOINTMENT.update().where(APPOINTMENT.c.appointment_id.in_(ids[start:start + 1000]))
+                              .values(status='Canceled'))
+
+
+def backfill_appointment_slots():
+    # Gán slot cho các lịch hẹn chưa bị hủy; lịch hẹn trùng slot (đã được báo cáo trong upgrade())
+    # chỉ có lịch hẹn được tạo trước (id nhỏ hơn) giữ slot, các lịch hẹn còn lại giữ slot_start NULL.
+    # Đọc từng lô 1000 dòng (keyset, dùng chỉ mục ix_appointment_doctor_date)
+    bind = op.get_bind()
+    query = ACTIVE_APPOINTMENTS.limit(1000)
+    update = sa.text("UPDATE Appointment SET slot_start = :slot_start WHERE appointment_id = :appointment_id") \
+        .bindparams(sa.bindparam('slot_start', type_=sa.DateTime))
+
+    def rows():
+        last = None
+        while True:
+            page = bind.execute(query if last is None else query.where(sa.tuple_(*SLOT_KEYS) > sa.tuple_(*last))).all()
+            if not page:
+                return
+            yield from page
+            last = tuple(page[-1])
+
+    updates = []
+    for _, slot_start, ids in slot_groups(rows()):
+        updates.append({"appointment_id": min(ids), "slot_start": slot_start})
+        if len(updates) >= 1000:
+            bind.execute(update, updates)
+            updates = []
+    if updates:
+        bind.execute(update, updates)
+
+
+def report_duplicate_registrations(table, column):
+    """
+    Trả về mô tả các đăng ký trùng (cùng bệnh nhân, cùng dịch vụ/bảo hiểm) đang chặn ràng buộc unique,
+    hoặc None nếu không có. Migration không tự xóa dữ liệu: mặc định dừng lại để người quản trị xem và xử lý;
+    chạy lại với "flask db upgrade -x remove_duplicate_registrations=true" để chỉ giữ đăng ký đầu tiên (id nhỏ nhất).
+    """
+    bind = op.get_bind()
+    groups = bind.execute(sa.text(
+        f"SELECT patient_id, {column}, COUNT(*), MIN(id) FROM {table} "
+        f"GROUP BY patient_id, {column} HAVING COUNT(*) > 1 ORDER BY patient_id, {column}"
+    )).all()
+    if not groups:
+        return None
+    if x_flag('remove_duplicate_registrations'):
+        bind.execute(sa.text(
+            f"DELETE FROM {table} WHERE id IN ("
+            f"SELECT t.id FROM {table} t JOIN {table} kept "
+            f"ON kept.patient_id = t.patient_id AND kept.{column} = t.{column} AND kept.id < t.id)"
+        ))
+        return None
+    examples = ', '.join(f"(patient_id={patient_id}, {column}={item_id}: {count} rows, keep id={kept_id})"
+                         for patient_id, item_id, count, kept_id in groups[:20])
+    return f"{table}: {len(groups)} duplicated (patient_id, {column}) pairs, e.g. {examples}"
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    # Kiểm tra đăng ký trùng và lịch hẹn trùng slot trước khi thay đổi gì (trên MySQL DDL không nằm trong transaction)
+    slot_conflicts = find_slot_conflicts()
+    problems = [report for report in (report_duplicate_registrations('PatientInsurance', 'insurance_id'),
+                                      report_duplicate_registrations('PatientService', 'service_id'),
+                                      report_slot_conflicts(slot_conflicts)) if report]
+    if problems:
+        raise RuntimeError(
+            "Cannot add unique constraints, conflicting rows found:\n" + '\n'.join(problems) +
+            "\nResolve them manually or rerun with: flask db upgrade -x remove_duplicate_registrations=true "
+            "(keeps the registration with the smallest id) and/or -x cancel_conflicting_appointments=true "
+            "(keeps the appointment with the smallest id in each slot and marks the others 'Canceled')"
+        )
+    cancel_conflicting_appointments(slot_conflicts)
+
+    with op.batch_alter_table('Appointment', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('slot_start', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_appointment_doctor_date', ['doctor_id', 'appointment_date', 'appointment_id'], unique=False)
+
+    backfill_appointment_slots()
+
+    with op.batch_alter_table('Appointment', schema=None) as batch_op:
+        batch_op.create_index('ix_appointment_patient_date', ['patient_id', 'appointment_date', 'appointment_id'], unique=False)
+        batch_op.create_unique_constraint('uq_appointment_doctor_slot', ['doctor_id', 'slot_start'])
+
+    with op.batch_alter_table('PatientInsurance', schema=None) as batch_op:
+        batch_op.create_index('ix_patient_insurance_insurance', ['insurance_id'], unique=False)
+        batch_op.create_index('ix_patient_insurance_patient', ['patient_id', 'id'], unique=False)
+        batch_op.create_unique_constraint('uq_patient_insurance', ['patient_id', 'insurance_id'])
+
+    with op.batch_alter_table('PatientService', schema=None) as batch_op:
+        batch_op.create_index('ix_patient_service_patient', ['patient_id', 'id'], unique=False)
+        batch_op.create_index('ix_patient_service_service', ['service_id'], unique=False)
+        batch_op.create_unique_constraint('uq_patient_service', ['patient_id', 'service_id'])
+
+    with op.batch_alter_table('Payment', schema=None) as batch_op:
+        batch_op.create_index('ix_payment_patient_date', ['patient_id', 'payment_date', 'payment_id'], unique=False)
+
+    with op.batch_alter_table('Prescription', schema=None) as batch_op:
+        batch_op.create_index('ix_prescription_medication', ['medication_id'], unique=False)
+        batch_op.create_index('ix_prescription_patient', ['patient_id', 'prescription_id'], unique=False)
+
+    # ### end Alembic commands ###
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('Prescription', schema=None) as batch_op:
+        batch_op.drop_index('ix_prescription_patient')
+        batch_op.drop_index('ix_prescription_medication')
+
+    with op.batch_alter_table('Payment', schema=None) as batch_op:
+        batch_op.drop_index('ix_payment_patient_date')
+
+    with op.batch_alter_table('PatientService', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_patient_service', type_='unique')
+        batch_op.drop_index('ix_patient_service_service')
+        batch_op.drop_index('ix_patient_service_patient')
+
+    with op.batch_alter_table('PatientInsurance', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_patient_insurance', type_='unique')
+        batch_op.drop_index('ix_patient_insurance_patient')
+        batch_op.drop_index('ix_patient_insurance_insurance')
+
+    with op.batch_alter_table('Appointment', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_appointment_doctor_slot', type_='unique')
+        batch_op.drop_index('ix_appointment_patient_date')
+        batch_op.drop_index('ix_appointment_doctor_date')
+        batch_op.drop_column('slot_start')
+
+    # ### end Alembic commands ###
@@ -0,0 +1,106 @@
+"""add search index
+
+Revision ID: e9bba42b2854
+Revises: 661a71a75ab0
+Create Date: 2026-10-18 09:09:18.043368
+
+"""
+import itertools
+import re
+import unicodedata
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9bba42b2854'
+down_revision = '661a71a75ab0'
+branch_labels = None
+depends_on = None
+
+
+def words(value):
+    text = unicodedata.normalize('NFKD', value.replace('đ', 'd').replace('Đ', 'D'))
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    return [word[:64] for word in re.findall(r'[a-z0-9]+', text)]
+
+
+def tokens(kind, fields, values):
+    # Các từ khóa (kind, từ) đã bỏ dấu, chữ thường: từ đơn và tổ hợp 2, 3 từ trong 5 từ đầu tiên của các cột
+    # trừ số điện thoại, email; các từ còn lại lưu với kind '<kind>:s' (giống search.entity_tokens tại thời điểm
+    # tạo migration)
+    result = set()
+    combined = []
+    for field, value in zip(fields, values):
+        if not value:
+            continue
+        if field not in ('phone', 'email'):
+            combined += words(value)
+            continue
+        result.update((f'{kind}:s', word) for word in words(value))
+        if field == 'phone':
+            digits = re.sub(r'\D', '', value)
+            if digits:
+                result.add((f'{kind}:s', digits[:64]))
+            if digits.startswith('84'):
+                result.add((f'{kind}:s', '0' + digits[2:65]))
+    combined = list(dict.fromkeys(combined))
+    result.update((kind, word) for word in combined[:5])
+    result.update((f'{kind}:s', word) for word in combined[5:])
+    for size in (2, 3):
+        result.update((f'{kind}:{size}', ' '.join(combination)[:64])
+                      for combination in itertools.combinations(combined[:5], size))
+    return result
+
+
+def backfill_search_tokens():
+    # Đánh chỉ mục các bệnh nhân, bác sĩ và thuốc đã có theo từng lô 1000 dòng (keyset theo khóa chính),
+    # bộ nhớ không phụ thuộc vào số dòng và không giữ cursor mở trong khi ghi
+    bind = op.get_bind()
+    search_token = sa.table('SearchToken', sa.column('kind', sa.String()), sa.column('token', sa.String()),
+                            sa.column('entity_id', sa.Integer()))
+    sources = [
+        ('patients', 'Patient', 'patient_id', ('name', 'phone', 'email')),
+        ('doctors', 'Doctor', 'doctor_id', ('name', 'specialization')),
+        ('medications', 'Medication', 'medication_id', ('medication_name',)),
+    ]
+    for kind, table_name, key, fields in sources:
+        table = sa.table(table_name, sa.column(key, sa.Integer()), *[sa.column(f, sa.String()) for f in fields])
+        query = sa.select(table.c[key], *[table.c[f] for f in fields]).order_by(table.c[key]).limit(1000)
+        last_id = None
+        while True:
+            rows = bind.execute(query if last_id is None else query.where(table.c[key] > last_id)).all()
+            if not rows:
+                break
+            batch = []
+            for entity_id, *values in rows:
+                batch += [{"kind": token_kind, "token": token, "entity_id": entity_id}
+                          for token_kind, token in tokens(kind, fields, values)]
+            if batch:
+                op.bulk_insert(search_token, batch)
+            last_id = rows[-1][0]
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.create_table('SearchToken',
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('token', sa.String(length=64), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'token', 'entity_id')
+    )
+    with op.batch_alter_table('SearchToken', schema=None) as batch_op:
+        batch_op.create_index('ix_search_token_entity', ['kind', 'entity_id', 'token'], unique=False)
+
+    # ### end Alembic commands ###
+
+    backfill_search_tokens()
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('SearchToken', schema=None) as batch_op:
+        batch_op.drop_index('ix_search_token_entity')
+
+    op.drop_table('SearchToken')
+    # ### end Alembic commands ###
@@ -1,7 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from replicas import RoutingSession
 
-db = SQLAlchemy()
+# Session định tuyến: request chỉ đọc dùng read replica (nếu có cấu hình), còn lại dùng primary
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Định nghĩa bảng Patient
 class Patient(db.Model):
@@ -44,6 +46,27 @@ class Appointment(db.Model):
     doctor_id = db.Column(db.Integer, db.ForeignKey('Doctor.doctor_id'), nullable=False)
     appointment_date = db.Column(db.DateTime, nullable=False)
     status = db.Column(db.String(20), nullable=False)  # Scheduled, Completed, Canceled
+    # Khung giờ (slot) mà lịch hẹn chiếm; NULL khi lịch hẹn bị hủy để giải phóng slot
+    slot_start = db.Column(db.DateTime, nullable=True)
+
+    # Mỗi bác sĩ chỉ có tối đa một lịch hẹn trong cùng một slot (database đảm bảo, không bị race)
+    __table_args__ = (
+        db.UniqueConstraint('doctor_id', 'slot_start', name='uq_appointment_doctor_slot'),
+        # Chỉ mục cho danh sách lịch hẹn theo bệnh nhân/bác sĩ (lọc theo id, sắp xếp theo ngày hẹn, id)
+        db.Index('ix_appointment_patient_date', 'patient_id', 'appointment_date', 'appointment_id'),
+        db.Index('ix_appointment_doctor_date', 'doctor_id', 'appointment_date', 'appointment_id'),
+        # Chỉ mục cho việc nạp các slot từ hiện tại trở đi vào chỉ mục lịch trống (availability.py)
+        db.Index('ix_appointment_slot_start', 'slot_start', 'doctor_id'),
+    )
+
+    @staticmethod
+    def slot_for(appointment_date, slot_minutes):
+        """
+        Làm tròn xuống thời điểm hẹn về đầu slot chứa nó (slot dài 'slot_minutes' phút, tính từ 00:00).
+        """
+        minutes = appointment_date.hour * 60 + appointment_date.minute
+        minutes -= minutes % slot_minutes
+        return appointment_date.replace(hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0)
 
 # Định nghĩa bảng MedicalService (Dịch vụ khám chữa bệnh)
 class MedicalService(db.Model):
@@ -63,6 +86,15 @@ class PatientService(db.Model):
     patient_id = db.Column(db.Integer, db.ForeignKey('Patient.patient_id'), nullable=False)
     service_id = db.Column(db.Integer, db.ForeignKey('MedicalService.service_id'), nullable=False)
     status = db.Column(db.String(20), nullable=False)  # Pending, Completed
+    # Giá dịch vụ tại thời điểm đăng ký (số tiền tính cho bệnh nhân, không đổi khi bảng giá thay đổi)
+    price = db.Column(db.Numeric(10, 2), nullable=False)
+
+    __table_args__ = (
+        # Mỗi bệnh nhân chỉ đăng ký một dịch vụ một lần (database đảm bảo, không cần kiểm tra trước)
+        db.UniqueConstraint('patient_id', 'service_id', name='uq_patient_service'),
+        db.Index('ix_patient_service_patient', 'patient_id', 'id'),
+        db.Index('ix_patient_service_service', 'service_id'),
+    )
 
 # Định nghĩa bảng InsuranceService (Gói bảo hiểm)
 class InsuranceService(db.Model):
@@ -83,6 +115,13 @@ class PatientInsurance(db.Model):
     insurance_id = db.Column(db.Integer, db.ForeignKey('InsuranceService.insurance_id'), nullable=False)
     status = db.Column(db.String(20), nullable=False)  # Active, Expired
 
+    __table_args__ = (
+        # Mỗi bệnh nhân chỉ đăng ký một gói bảo hiểm một lần (database đảm bảo, không cần kiểm tra trước)
+        db.UniqueConstraint('patient_id', 'insurance_id', name='uq_patient_insurance'),
+        db.Index('ix_patient_insurance_patient', 'patient_id', 'id'),
+        db.Index('ix_patient_insurance_insurance', 'insurance_id'),
+    )
+
 # Định nghĩa bảng Medication (Thuốc)
 class Medication(db.Model):
     __tablename__ = 'Medication'
@@ -102,6 +141,13 @@ class Prescription(db.Model):
     medication_id = db.Column(db.Integer, db.ForeignKey('Medication.medication_id'), nullable=False)
     dosage = db.Column(db.String(100), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
+    # Đơn giá thuốc tại thời điểm kê đơn (số tiền tính cho bệnh nhân là unit_price * quantity)
+    unit_price = db.Column(db.Numeric(10, 2), nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_prescription_patient', 'patient_id', 'prescription_id'),
+        db.Index('ix_prescription_medication', 'medication_id'),
+    )
 
 # Định nghĩa bảng Payment (Thanh toán)
 class Payment(db.Model):
@@ -113,6 +159,54 @@ class Payment(db.Model):
     description = db.Column(db.Text, nullable=True)
     status = db.Column(db.String(20), nullable=False)  # Paid, Pending
 
+    __table_args__ = (
+        # Chỉ mục cho danh sách thanh toán của bệnh nhân (sắp xếp theo ngày thanh toán, id)
+        db.Index('ix_payment_patient_date', 'patient_id', 'payment_date', 'payment_id'),
+        # Chỉ mục cho việc tính lại doanh thu theo khoảng thời gian (flask reports rebuild-revenue)
+        db.Index('ix_payment_date', 'payment_date'),
+    )
+
+# Định nghĩa bảng PatientBalance (Sổ cái công nợ của bệnh nhân)
+# Được cập nhật cộng dồn trong cùng transaction với thanh toán, đăng ký dịch vụ và đơn thuốc (xem ledger.py)
+class PatientBalance(db.Model):
+    __tablename__ = 'PatientBalance'
+    patient_id = db.Column(db.Integer, db.ForeignKey('Patient.patient_id'), primary_key=True)
+    services_total = db.Column(db.Numeric(12, 2), nullable=False, default=0)  # Tổng giá dịch vụ đã đăng ký
+    prescriptions_total = db.Column(db.Numeric(12, 2), nullable=False, default=0)  # Tổng giá thuốc x số lượng
+    paid_total = db.Column(db.Numeric(12, 2), nullable=False, default=0)  # Tổng thanh toán 'Paid'
+    pending_total = db.Column(db.Numeric(12, 2), nullable=False, default=0)  # Tổng thanh toán 'Pending'
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+# Định nghĩa bảng RevenueDaily (Doanh thu theo ngày và trạng thái thanh toán)
+# Được cập nhật cộng dồn cùng transaction với các thay đổi của Payment (xem revenue.py)
+class RevenueDaily(db.Model):
+    __tablename__ = 'RevenueDaily'
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)  # Paid, Pending
+    total = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    payment_count = db.Column(db.Integer, nullable=False, default=0)
+
+# Định nghĩa bảng RevenueMonthly (Doanh thu theo tháng và trạng thái thanh toán, 'month' là ngày đầu tháng)
+class RevenueMonthly(db.Model):
+    __tablename__ = 'RevenueMonthly'
+    month = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)  # Paid, Pending
+    total = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    payment_count = db.Column(db.Integer, nullable=False, default=0)
+
+# Định nghĩa bảng SearchToken (Chỉ mục tìm kiếm: các từ khóa đã bỏ dấu của bệnh nhân, bác sĩ và thuốc)
+# Được cập nhật cùng transaction với các thay đổi của Patient/Doctor/Medication (xem search.py)
+class SearchToken(db.Model):
+    __tablename__ = 'SearchToken'
+    kind = db.Column(db.String(20), primary_key=True)  # patients, doctors, medications (tổ hợp 2, 3 từ: patients:2, patients:3...; từ ngoài tổ hợp: patients:s...)
+    token = db.Column(db.String(64), primary_key=True)
+    entity_id = db.Column(db.Integer, primary_key=True)
+
+    __table_args__ = (
+        # Chỉ mục cho việc kiểm tra từ khóa của một đối tượng và xóa từ khóa khi đối tượng thay đổi
+        db.Index('ix_search_token_entity', 'kind', 'entity_id', 'token'),
+    )
+
 # Định nghĩa bảng User (Quản lý người dùng và quyền truy cập)
 class User(db.Model):
     __tablename__ = 'User'
@@ -0,0 +1,54 @@
+from sqlalchemy import select
+from models import *
+from pagination import parse_limit, keyset_query, split_page
+from serializers import (patient_appointments_query, serialize_patient_appointment,
+                         patient_prescriptions_query, serialize_patient_prescription,
+                         patient_services_query, serialize_patient_service,
+                         patient_insurances_query, serialize_patient_insurance,
+                         patient_payments_query, serialize_patient_payment, row_serializer)
+
+# Các phần của trang tổng quan bệnh nhân: (tên, truy vấn, khóa phân trang, hàm serialize).
+# Thứ tự và khóa giống các API danh sách tương ứng nên 'next_cursor' dùng tiếp được với các API đó.
+OVERVIEW_SECTIONS = (
+    ('appointments', patient_appointments_query, [Appointment.appointment_date, Appointment.appointment_id],
+     serialize_patient_appointment),
+    ('prescriptions', patient_prescriptions_query, [Prescription.prescription_id], serialize_patient_prescription),
+    ('services', patient_services_query, [PatientService.id], serialize_patient_service),
+    ('insurances', patient_insurances_query, [PatientInsurance.id], serialize_patient_insurance),
+    ('payments', patient_payments_query, [Payment.payment_date, Payment.payment_id], serialize_patient_payment),
+)
+
+# Thông tin cơ bản của bệnh nhân (không lấy medical_history), đồng thời dùng để kiểm tra bệnh nhân tồn tại
+def patient_summary_query(patient_id):
+    return select(
+        Patient.patient_id,
+        Patient.name,
+        Patient.dob,
+        Patient.gender,
+        Patient.phone,
+        Patient.email
+    ).filter(Patient.patient_id == patient_id)
+
+serialize_patient_summary = row_serializer(patient_summary_query(0))
+
+# Hàm đọc giới hạn số dòng của từng phần
+def section_limits(args, config):
+    """
+    Đọc '?limit=N' (áp dụng cho mọi phần) và '?<phần>_limit=N' (ví dụ: payments_limit=5).
+    Mặc định OVERVIEW_SECTION_LIMIT, tối đa PAGE_SIZE_MAX.
+    """
+    default = parse_limit(args.get('limit'), config['OVERVIEW_SECTION_LIMIT'], config['PAGE_SIZE_MAX'])
+    return {
+        name: parse_limit(args.get(f'{name}_limit'), default, config['PAGE_SIZE_MAX'])
+        for name, *_ in OVERVIEW_SECTIONS
+    }
+
+# Câu lệnh lấy một phần (lấy thêm một dòng để biết còn dữ liệu hay không)
+def section_query(section, patient_id, limit):
+    _, query, keys, _ = section
+    return keyset_query(query(patient_id), keys, None).limit(limit + 1)
+
+def serialize_section(section, rows, limit):
+    _, _, keys, serialize = section
+    rows, next_cursor = split_page(rows, keys, limit)
+    return {"items": [serialize(row) for row in rows], "next_cursor": next_cursor}
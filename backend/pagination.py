@@ -0,0 +1,137 @@
+import base64
+import json
+from datetime import datetime
+from flask import request, jsonify, Response, stream_with_context, current_app
+from sqlalchemy import and_, or_
+from models import db
+
+# Giá trị lớn nhất của cột INTEGER (khóa chính): cursor vượt quá giá trị này không thể trỏ tới dòng nào
+# và làm lỗi câu truy vấn (SQLite chỉ nhận số nguyên 64 bit)
+ID_MAX = 2 ** 31 - 1
+
+# Lỗi khi cursor hoặc limit từ client không hợp lệ
+class PaginationError(ValueError):
+    pass
+
+# Hàm mã hóa cursor
+def encode_cursor(values):
+    """
+    Mã hóa các giá trị khóa sắp xếp của dòng cuối cùng thành chuỗi cursor (opaque, base64 url-safe).
+    """
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+# Hàm giải mã cursor
+def decode_cursor(cursor, keys):
+    """
+    Giải mã chuỗi cursor thành danh sách giá trị tương ứng với các cột khóa 'keys'.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError
+        decoded = []
+        for key, value in zip(keys, values):
+            if key.type.python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= ID_MAX:
+                raise ValueError
+            decoded.append(value)
+        return decoded
+    except (ValueError, TypeError, UnicodeError):
+        raise PaginationError("Invalid cursor")
+
+# Hàm kiểm tra giá trị limit
+def parse_limit(limit, default, max_limit):
+    """
+    Kiểm tra giá trị 'limit' (chuỗi hoặc None) và giới hạn trong khoảng [1, max_limit].
+    Nếu không truyền thì dùng 'default'.
+    """
+    if limit is None:
+        return min(default, max_limit)
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise PaginationError("Invalid limit")
+    if limit < 1:
+        raise PaginationError("Invalid limit")
+    return min(limit, max_limit)
+
+# Hàm đọc số dòng mỗi trang từ tham số của request
+def page_limit(args, config):
+    """
+    Đọc tham số 'limit' và giới hạn trong khoảng [1, PAGE_SIZE_MAX]; chỉ có 'cursor' thì dùng PAGE_SIZE_DEFAULT.
+    Trả về None (không phân trang, trả về toàn bộ danh sách như trước khi có phân trang)
+    nếu không truyền cả 'limit' lẫn 'cursor'.
+    """
+    if args.get('limit') is None and not args.get('cursor'):
+        return None
+    return parse_limit(args.get('limit'), config['PAGE_SIZE_DEFAULT'], config['PAGE_SIZE_MAX'])
+
+def _after(keys, values):
+    # Điều kiện keyset: (k1 > v1) OR (k1 = v1 AND k2 > v2) ...
+    clauses = []
+    for i, key in enumerate(keys):
+        equals = [keys[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equals, key > values[i]))
+    return or_(*clauses)
+
+def _row_keys(row, keys):
+    return [getattr(row, key.key) for key in keys]
+
+# Hàm thêm điều kiện cursor và thứ tự sắp xếp vào câu lệnh select()
+def keyset_query(query, keys, cursor):
+    if cursor:
+        query = query.filter(_after(keys, decode_cursor(cursor, keys)))
+    return query.order_by(*keys)
+
+# Hàm thêm giới hạn số dòng cần lấy: thêm một dòng để biết còn trang tiếp theo hay không (None: lấy hết)
+def page_query(query, limit):
+    return query if limit is None else query.limit(limit + 1)
+
+# Hàm cắt trang từ các dòng đã lấy (limit + 1 dòng), trả về (các dòng, cursor của trang tiếp theo hoặc None)
+def split_page(rows, keys, limit):
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(_row_keys(rows[-1], keys))
+
+def _stream(query, serialize, limit):
+    # Dùng server-side cursor và đọc theo từng lô để bộ nhớ không tăng theo số dòng
+    query = query.execution_options(stream_results=True, yield_per=current_app.config['STREAM_CHUNK_SIZE'])
+    if limit is not None:
+        query = query.limit(limit)
+
+    dumps = current_app.json.dumps
+
+    def generate():
+        for row in db.session.execute(query):
+            yield dumps(serialize(row)) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+# Hàm trả về danh sách đã phân trang theo keyset
+def paginated_response(query, keys, serialize):
+    """
+    Phân trang câu lệnh select() 'query' theo thứ tự các cột 'keys' (ví dụ: ngày, id) bằng cursor.
+    - không có limit và cursor: trả về toàn bộ danh sách (tương thích với client cũ)
+    - ?limit=N      : số dòng mỗi trang (bị giới hạn bởi PAGE_SIZE_MAX)
+    - ?cursor=...   : lấy trang tiếp theo, giá trị lấy từ header X-Next-Cursor (mặc định PAGE_SIZE_DEFAULT dòng)
+    - ?format=ndjson: trả về NDJSON dạng stream, không giới hạn số dòng nếu không truyền limit
+    """
+    try:
+        limit = page_limit(request.args, current_app.config)
+        query = keyset_query(query, keys, request.args.get('cursor'))
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
+
+    if request.args.get('format') == 'ndjson':
+        return _stream(query, serialize, limit if 'limit' in request.args else None)
+
+    rows, next_cursor = split_page(db.session.execute(page_query(query, limit)).all(), keys, limit)
+
+    response = jsonify([serialize(row) for row in rows])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
@@ -0,0 +1,173 @@
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import request, jsonify, current_app
+
+# Đơn vị thời gian được hỗ trợ trong cấu hình giới hạn, ví dụ: '10/minute'
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+class RateLimit:
+    """
+    Giới hạn kiểu token bucket: tối đa 'capacity' request liên tiếp, hồi lại 'rate' request mỗi giây.
+    """
+    __slots__ = ('capacity', 'rate')
+
+    def __init__(self, capacity, rate):
+        self.capacity = capacity
+        self.rate = rate
+
+    @classmethod
+    def parse(cls, value):
+        # '10/minute' -> tối đa 10 request liên tiếp, hồi lại 10 request mỗi phút
+        count, _, period = value.partition('/')
+        count, period = count.strip(), period.strip()
+        if not count.isdigit() or int(count) < 1 or period not in PERIODS:
+            raise ValueError(f"Invalid rate limit '{value}'. Use <count>/<second|minute|hour|day>, e.g. '10/minute'")
+        return cls(int(count), int(count) / PERIODS[period])
+
+class MemoryBucketStore:
+    """
+    Lưu token bucket trong bộ nhớ của tiến trình, giới hạn 'maxsize' bucket (bỏ bucket ít dùng nhất khi đầy).
+    Khóa được rút gọn thành digest 8 byte nên kích thước mỗi entry cố định (username dài không tốn thêm bộ nhớ).
+    Mỗi worker có bucket riêng; dùng RedisBucketStore để các worker/máy chủ dùng chung giới hạn.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # digest -> (số token còn lại, thời điểm cập nhật)
+
+    def consume(self, key, limit, now=None):
+        """
+        Lấy một token từ bucket 'key'. Trả về (True, 0) nếu được phép,
+        ngược lại (False, số giây cần chờ đến khi có token).
+        """
+        now = time.monotonic() if now is None else now
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(digest, (limit.capacity, now))
+            tokens = min(limit.capacity, tokens + (now - updated_at) * limit.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[digest] = (tokens, now)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return allowed, 0 if allowed else (1 - tokens) / limit.rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+# Script Lua chạy nguyên tử trong Redis: cùng thuật toán với MemoryBucketStore, dùng đồng hồ của Redis
+_REDIS_CONSUME = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+class RedisBucketStore:
+    """
+    Token bucket dùng chung giữa các worker và máy chủ, lưu trong Redis ('client' là redis.Redis).
+    Bucket tự hết hạn khi đã đầy lại nên bộ nhớ Redis chỉ phụ thuộc vào số khóa đang hoạt động.
+    Nếu gặp lỗi thuộc 'errors' (không kết nối được Redis...) thì cho phép request
+    (không chặn đăng nhập khi Redis gặp sự cố).
+    """
+
+    def __init__(self, client, errors, prefix='ratelimit:'):
+        self._errors = errors
+        self._client = client
+        self._script = client.register_script(_REDIS_CONSUME)
+        self.prefix = prefix
+
+    def consume(self, key, limit, now=None):
+        try:
+            allowed, tokens = self._script(keys=[self.prefix + key], args=[limit.capacity, limit.rate])
+        except self._errors as e:
+            current_app.logger.warning('Rate limit store unavailable, allowing request: %s', e)
+            return True, 0
+        return bool(allowed), 0 if allowed else (1 - float(tokens)) / limit.rate
+
+# Hàm tạo nơi lưu bucket theo cấu hình RATE_LIMIT_STORAGE_URI ('memory://' hoặc 'redis://...')
+def create_bucket_store(uri, maxsize):
+    if uri.startswith('memory://'):
+        return MemoryBucketStore(maxsize)
+    if uri.startswith(('redis://', 'rediss://', 'unix://')):
+        import redis
+
+        return RedisBucketStore(redis.Redis.from_url(uri), redis.exceptions.RedisError)
+    raise ValueError(f"Unsupported RATE_LIMIT_STORAGE_URI '{uri}'")
+
+class RateLimiter:
+    """
+    Giới hạn số request theo nhóm (ví dụ: 'login') cho từng địa chỉ IP và từng username.
+    """
+
+    def __init__(self, store, limits, enabled=True):
+        self.store = store
+        self.limits = limits  # tên nhóm -> {'ip': RateLimit, 'username': RateLimit}
+        self.enabled = enabled
+
+    def check(self, scope, ip, username):
+        """
+        Trả về 0 nếu request được phép, ngược lại số giây client cần chờ.
+        Bucket của IP được kiểm tra trước, bucket của username chỉ bị trừ khi IP còn lượt.
+        """
+        if not self.enabled:
+            return 0
+        limits = self.limits[scope]
+        allowed, retry_after = self.store.consume(f'{scope}:ip:{ip}', limits['ip'])
+        if allowed and username:
+            allowed, retry_after = self.store.consume(f'{scope}:user:{username}', limits['username'])
+        return 0 if allowed else retry_after
+
+# Hàm khởi tạo bộ giới hạn request cho ứng dụng
+def init_rate_limiter(app):
+    config = app.config
+    limits = {
+        scope: {
+            'ip': RateLimit.parse(config[f'{scope.upper()}_RATE_LIMIT_PER_IP']),
+            'username': RateLimit.parse(config[f'{scope.upper()}_RATE_LIMIT_PER_USERNAME'])
+        }
+        for scope in ('login', 'signup')
+    }
+    store = create_bucket_store(config['RATE_LIMIT_STORAGE_URI'], config['RATE_LIMIT_MAX_KEYS'])
+    app.extensions['rate_limiter'] = RateLimiter(store, limits, config['RATE_LIMIT_ENABLED'])
+
+# Decorator giới hạn số request của một route theo IP và username (trong body JSON)
+def rate_limited(scope):
+    """
+    Kiểm tra giới hạn trước khi chạy route, nên request bị từ chối (429) không tốn truy vấn database
+    hay mã hóa mật khẩu nào.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            data = request.get_json(silent=True)
+            username = data.get('username') if isinstance(data, dict) else None
+            username = username.strip().lower() if isinstance(username, str) else None
+
+            retry_after = current_app.extensions['rate_limiter'].check(scope, request.remote_addr, username)
+            if retry_after:
+                return jsonify({"message": "Too many requests, please try again later"}), 429, \
+                    {'Retry-After': str(max(1, math.ceil(retry_after)))}
+            return f(*args, **kwargs)
+
+        return decorated
+
+    return decorator
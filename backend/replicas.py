@@ -0,0 +1,199 @@
+import itertools
+import math
+import time
+from flask import current_app, has_request_context, request, g
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import DBAPIError, OperationalError, InterfaceError
+from sqlalchemy.pool import QueuePool
+from db_pool import engine_options
+
+# Các method HTTP chỉ đọc dữ liệu, có thể chuyển sang replica
+READ_ONLY_METHODS = ('GET', 'HEAD')
+# Thời điểm ghi dữ liệu gần nhất (giây, Unix time) được trả cho client sau mỗi request có ghi dữ liệu;
+# client gửi lại qua header (hoặc cookie) để mọi worker/tiến trình đều biết cần đọc từ primary
+LAST_WRITE_HEADER = 'X-Last-Write'
+LAST_WRITE_COOKIE = 'last_write'
+
+class Replica:
+    __slots__ = ('uri', 'engine', 'unhealthy_until', 'checked_at')
+
+    def __init__(self, uri):
+        self.uri = uri
+        self.engine = create_engine(uri, **engine_options(uri))
+        self.unhealthy_until = 0.0
+        self.checked_at = 0.0
+
+    def busy(self):
+        pool = self.engine.pool
+        return pool.checkedout() if isinstance(pool, QueuePool) else 0
+
+class ReplicaSet:
+    """
+    Tập các read replica: chọn replica theo round-robin hoặc ít kết nối đang dùng nhất,
+    bỏ qua replica đang lỗi.
+    """
+
+    def __init__(self, uris, selection='round_robin', health_check_interval=5.0,
+                 retry_interval=30.0, read_after_write=5.0):
+        self.replicas = [Replica(uri) for uri in uris]
+        self.selection = selection
+        self.health_check_interval = health_check_interval
+        self.retry_interval = retry_interval
+        self.read_after_write = read_after_write
+        self._counter = itertools.count()
+        for replica in self.replicas:
+            event.listen(replica.engine, 'handle_error', self._make_error_handler(replica))
+
+    def _make_error_handler(self, replica):
+        def handle_error(context):
+            # Mất kết nối tới replica: tạm ngừng dùng replica này
+            if context.is_disconnect or context.connection is None:
+                self.mark_unhealthy(replica)
+        return handle_error
+
+    def mark_unhealthy(self, replica):
+        replica.unhealthy_until = time.monotonic() + self.retry_interval
+
+    def _healthy(self, replica, now):
+        if replica.unhealthy_until > now:
+            return False
+        if now - replica.checked_at < self.health_check_interval:
+            return True
+        # Định kỳ kiểm tra kết nối trước khi chọn replica
+        replica.checked_at = now
+        try:
+            with replica.engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+        except Exception:
+            self.mark_unhealthy(replica)
+            return False
+        return True
+
+    def choose(self):
+        """
+        Chọn một replica khỏe mạnh; trả về None nếu không có (khi đó dùng primary).
+        """
+        if not self.replicas:
+            return None
+        now = time.monotonic()
+        if self.selection == 'least_busy':
+            candidates = sorted(self.replicas, key=lambda r: r.busy())
+        else:
+            start = next(self._counter) % len(self.replicas)
+            candidates = self.replicas[start:] + self.replicas[:start]
+        for replica in candidates:
+            if self._healthy(replica, now):
+                return replica
+        return None
+
+    def wrote_recently(self, last_write):
+        """
+        Client đã ghi dữ liệu trong 'read_after_write' giây gần đây (theo thời điểm 'last_write' client gửi lại).
+        Bỏ qua giá trị quá xa trong tương lai để client không thể buộc mọi request đọc từ primary.
+        """
+        return last_write is not None and abs(time.time() - last_write) < self.read_after_write
+
+    def dispose(self, close=True):
+        # close=False: chỉ bỏ các kết nối kế thừa sau fork, không đóng socket đang dùng bởi tiến trình cha
+        for replica in self.replicas:
+            replica.engine.dispose(close=close)
+
+# Hàm khởi tạo tập replica cho ứng dụng
+def init_replicas(app):
+    config = app.config
+    app.extensions['replicas'] = ReplicaSet(
+        config['SQLALCHEMY_REPLICA_URIS'],
+        selection=config['REPLICA_SELECTION'],
+        health_check_interval=config['REPLICA_HEALTH_CHECK_INTERVAL'],
+        retry_interval=config['REPLICA_RETRY_INTERVAL'],
+        read_after_write=config['REPLICA_READ_AFTER_WRITE_SECONDS']
+    )
+
+    @app.after_request
+    def _send_last_write(response):
+        last_write = g.get('last_write')
+        if last_write is not None and app.extensions['replicas'].replicas:
+            value = f'{last_write:.3f}'
+            response.headers[LAST_WRITE_HEADER] = value
+            response.set_cookie(LAST_WRITE_COOKIE, value, max_age=math.ceil(config['REPLICA_READ_AFTER_WRITE_SECONDS']),
+                                httponly=True, samesite='Lax')
+        return response
+
+def _last_write():
+    # Thời điểm ghi gần nhất client gửi lại (header ưu tiên hơn cookie), None nếu không có hoặc không hợp lệ
+    value = request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE)
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+class RoutingSession(Session):
+    """
+    Session chuyển các truy vấn của request chỉ đọc (GET/HEAD) sang read replica.
+    Dùng primary khi: đang flush, session đã ghi dữ liệu, client vừa ghi dữ liệu gần đây (header/cookie
+    X-Last-Write), hoặc không có replica nào khỏe mạnh. Câu truy vấn lỗi trên replica được chạy lại trên primary
+    (trừ lỗi khi đang đọc dần kết quả của một câu truy vấn stream).
+    """
+
+    def _use_replica(self):
+        if self._flushing or self.info.get('wrote') or not has_request_context():
+            return False
+        if request.method not in READ_ONLY_METHODS:
+            return False
+        replicas = current_app.extensions.get('replicas')
+        if replicas is None or not replicas.replicas:
+            return False
+        return not replicas.wrote_recently(_last_write())
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica():
+            # Giữ nguyên một replica trong suốt session để các truy vấn nhất quán với nhau
+            replica = self.info.get('replica')
+            if replica is None:
+                replica = current_app.extensions['replicas'].choose()
+                self.info['replica'] = replica or False
+            if replica:
+                return replica.engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _execute_or_retry(self, method, *args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        except DBAPIError as e:
+            replica = self.info.get('replica')
+            if not replica or not self._use_replica():
+                raise
+            # Lỗi kết nối: tạm ngừng dùng replica này; các lỗi khác (ví dụ: replica chưa có bảng mới) chỉ chạy lại
+            if isinstance(e, (OperationalError, InterfaceError)):
+                current_app.extensions['replicas'].mark_unhealthy(replica)
+            # Trả kết nối replica và đọc lại từ primary trong phần còn lại của session
+            self.rollback()
+            self.info['replica'] = False
+            return method(*args, **kwargs)
+
+    def execute(self, *args, **kwargs):
+        return self._execute_or_retry(super().execute, *args, **kwargs)
+
+    def scalar(self, *args, **kwargs):
+        return self._execute_or_retry(super().scalar, *args, **kwargs)
+
+    def scalars(self, *args, **kwargs):
+        return self._execute_or_retry(super().scalars, *args, **kwargs)
+
+# Ghi nhận session đã ghi dữ liệu để các truy vấn sau đó (và các request tiếp theo của client) đọc từ primary
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_session_wrote(session, flush_context):
+    session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_statement_wrote(orm_execute_state):
+    # INSERT/UPDATE/DELETE thực thi trực tiếp qua session.execute (không qua flush)
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info['wrote'] = True
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _record_client_write(session):
+    # Thời điểm ghi được trả cho client trong phản hồi (header và cookie X-Last-Write)
+    if session.info.get('wrote') and has_request_context():
+        g.last_write = time.time()
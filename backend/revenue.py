@@ -0,0 +1,188 @@
+from collections import defaultdict
+from datetime import date, datetime, time
+from decimal import Decimal
+from sqlalchemy import event, select, func, union_all, literal, Date
+from sqlalchemy.orm import Session
+from models import db, Payment, RevenueDaily, RevenueMonthly
+from ledger import increment_row, old_values, money
+from serializers import row_serializer
+
+# Các cột cộng dồn của bảng doanh thu
+REVENUE_FIELDS = ('total', 'payment_count')
+PAYMENT_ATTRS = ('payment_date', 'amount', 'status')
+
+def month_of(day):
+    return day.replace(day=1)
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+class RevenueChanges:
+    """
+    Thay đổi doanh thu theo (ngày, trạng thái): [tổng tiền, số thanh toán]; doanh thu theo tháng
+    được cộng từ các ngày khi áp dụng.
+    """
+
+    def __init__(self):
+        self.daily = defaultdict(lambda: [Decimal(0), 0])
+
+    def add(self, payment_date, amount, status, sign):
+        if payment_date is None or amount is None or status is None:
+            return
+        entry = self.daily[(payment_date.date(), status)]
+        entry[0] += sign * money(amount)
+        entry[1] += sign
+
+    def __bool__(self):
+        return bool(self.daily)
+
+    def apply(self, connection):
+        monthly = defaultdict(lambda: [Decimal(0), 0])
+        for (day, status), (total, count) in sorted(self.daily.items()):
+            if not total and not count:
+                continue
+            increment_row(connection, RevenueDaily.__table__, {"day": day, "status": status},
+                          {"total": total, "payment_count": count}, REVENUE_FIELDS)
+            entry = monthly[(month_of(day), status)]
+            entry[0] += total
+            entry[1] += count
+        for (month, status), (total, count) in sorted(monthly.items()):
+            if total or count:
+                increment_row(connection, RevenueMonthly.__table__, {"month": month, "status": status},
+                              {"total": total, "payment_count": count}, REVENUE_FIELDS)
+
+# Cập nhật bảng doanh thu ngay trong flush (cùng transaction) khi thanh toán được thêm, sửa hoặc xóa
+@event.listens_for(Session, 'after_flush')
+def _update_revenue(session, flush_context):
+    changes = RevenueChanges()
+    for obj in session.new:
+        if isinstance(obj, Payment):
+            changes.add(obj.payment_date, obj.amount, obj.status, 1)
+    for obj in session.dirty:
+        if isinstance(obj, Payment):
+            old = old_values(obj, PAYMENT_ATTRS)
+            new = tuple(getattr(obj, attr) for attr in PAYMENT_ATTRS)
+            if old != new:
+                changes.add(*old, -1)
+                changes.add(*new, 1)
+    for obj in session.deleted:
+        if isinstance(obj, Payment):
+            changes.add(*old_values(obj, PAYMENT_ATTRS), -1)
+    if changes:
+        changes.apply(session.connection())
+
+def _revenue_corrections(start, end):
+    """
+    Số cần cộng vào RevenueDaily/RevenueMonthly của các tháng [start, end) để khớp với Payment:
+    ({(ngày, trạng thái): [tiền, số]}, {(tháng, trạng thái): [tiền, số]}, số thanh toán).
+    Thanh toán và bảng doanh thu được đọc trong cùng một câu lệnh nên cùng một snapshot ở mọi mức isolation.
+    """
+    day = func.date(Payment.payment_date, type_=Date)
+    payments = select(
+        literal('payment'), day, Payment.status, func.sum(Payment.amount), func.count()
+    ).where(
+        Payment.payment_date >= datetime.combine(start, time.min),
+        Payment.payment_date < datetime.combine(end, time.min)
+    ).group_by(day, Payment.status)
+    daily_rows = select(literal('daily'), RevenueDaily.day, RevenueDaily.status, RevenueDaily.total,
+                        RevenueDaily.payment_count).where(RevenueDaily.day >= start, RevenueDaily.day < end)
+    monthly_rows = select(literal('monthly'), RevenueMonthly.month, RevenueMonthly.status, RevenueMonthly.total,
+                          RevenueMonthly.payment_count).where(RevenueMonthly.month >= start, RevenueMonthly.month < end)
+
+    daily = defaultdict(lambda: [Decimal(0), 0])
+    monthly = defaultdict(lambda: [Decimal(0), 0])
+    count = 0
+    for source, key, status, total, payment_count in db.session.execute(union_all(payments, daily_rows, monthly_rows)):
+        total, payment_count = money(total or 0), int(payment_count or 0)
+        if source == 'payment':
+            count += payment_count
+            for entry in (daily[(key, status)], monthly[(month_of(key), status)]):
+                entry[0] += total
+                entry[1] += payment_count
+        else:
+            entry = (daily if source == 'daily' else monthly)[(key, status)]
+            entry[0] -= total
+            entry[1] -= payment_count
+    return daily, monthly, count
+
+# Hàm tính lại bảng doanh thu từ toàn bộ lịch sử thanh toán
+def rebuild_revenue(chunk_months=1):
+    """
+    Tính lại RevenueDaily/RevenueMonthly từ Payment theo từng khoảng 'chunk_months' tháng, mỗi khoảng một transaction.
+    Không ghi đè các dòng doanh thu: phần chênh lệch (tính trên cùng một snapshot) được cộng bằng 'col = col + delta'
+    như các cập nhật thông thường, nên cập nhật của các thanh toán được ghi đồng thời (kể cả dòng doanh thu vừa được
+    tạo) không bị mất; các dòng về 0 được xóa.
+    """
+    first_payment, last_payment = db.session.execute(
+        select(func.min(Payment.payment_date), func.max(Payment.payment_date))
+    ).one()
+    first_rollup, last_rollup = db.session.execute(
+        select(func.min(RevenueMonthly.month), func.max(RevenueMonthly.month))
+    ).one()
+    # Bao gồm cả các tháng chỉ còn dòng doanh thu cũ (thanh toán đã bị xóa) để dọn chúng
+    months = [month_of(value.date() if isinstance(value, datetime) else value)
+              for value in (first_payment, last_payment, first_rollup, last_rollup) if value is not None]
+    report = {"chunks": 0, "payments": 0}
+    if not months:
+        return report
+
+    month, last_month = min(months), max(months)
+    while month <= last_month:
+        next_month = add_months(month, chunk_months)
+        daily, monthly, count = _revenue_corrections(month, next_month)
+
+        connection = db.session.connection()
+        for table, key, corrections in ((RevenueDaily.__table__, 'day', daily),
+                                        (RevenueMonthly.__table__, 'month', monthly)):
+            for (value, status), (total, payment_count) in sorted(corrections.items()):
+                if total or payment_count:
+                    increment_row(connection, table, {key: value, "status": status},
+                                  {"total": total, "payment_count": payment_count}, REVENUE_FIELDS)
+            connection.execute(table.delete().where(
+                table.c[key] >= month, table.c[key] < next_month, table.c.total == 0, table.c.payment_count == 0))
+        db.session.commit()
+
+        report["chunks"] += 1
+        report["payments"] += count
+        month = next_month
+    return report
+
+def _status_filter(query, column, status):
+    return query.where(column == status) if status else query
+
+# Doanh thu theo ngày trong khoảng [start, end]
+def daily_revenue_query(start, end, status=None):
+    query = select(RevenueDaily.day, RevenueDaily.status, RevenueDaily.total, RevenueDaily.payment_count).where(
+        RevenueDaily.day >= start, RevenueDaily.day <= end, RevenueDaily.payment_count > 0
+    ).order_by(RevenueDaily.day, RevenueDaily.status)
+    return _status_filter(query, RevenueDaily.status, status)
+
+serialize_daily_revenue = row_serializer(daily_revenue_query(date.min, date.max), rename={'payment_count': 'count'})
+
+# Doanh thu theo tháng trong khoảng [start, end] (ngày đầu tháng)
+def monthly_revenue_query(start, end, status=None):
+    query = select(RevenueMonthly.month, RevenueMonthly.status, RevenueMonthly.total, RevenueMonthly.payment_count).where(
+        RevenueMonthly.month >= start, RevenueMonthly.month <= end, RevenueMonthly.payment_count > 0
+    ).order_by(RevenueMonthly.month, RevenueMonthly.status)
+    return _status_filter(query, RevenueMonthly.status, status)
+
+serialize_monthly_revenue = row_serializer(monthly_revenue_query(date.min, date.max), rename={'payment_count': 'count'},
+                                           formats={'month': '%Y-%m'})
+
+# Tổng doanh thu theo trạng thái trong khoảng tháng [start, end] (cộng từ bảng theo tháng)
+def revenue_by_status_query(start, end):
+    return select(
+        RevenueMonthly.status,
+        func.sum(RevenueMonthly.total).label('total'),
+        func.sum(RevenueMonthly.payment_count).label('payment_count')
+    ).where(RevenueMonthly.month >= start, RevenueMonthly.month <= end) \
+     .group_by(RevenueMonthly.status).having(func.sum(RevenueMonthly.payment_count) > 0) \
+     .order_by(RevenueMonthly.status)
+
+def serialize_revenue_by_status(row):
+    return {
+        "status": row.status,
+        "total": float(row.total),
+        "count": int(row.payment_count)
+    }
@@ -4,6 +4,11 @@ from .insurance import bp as insurance_bp
 from .prescription import bp as prescription_bp
 from .payment import bp as payment_bp
 from .auth import bp as auth_bp
+from .availability import bp as availability_bp
+from .billing import bp as billing_bp
+from .patient import bp as patient_bp
+from .reports import bp as reports_bp
+from .search import bp as search_bp
 
 # Trong __init__.py, chúng ta chỉ đơn giản import tất cả các blueprint từ các tệp khác,
 # rồi sử dụng chúng để đăng ký trong app.py.
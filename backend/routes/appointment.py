@@ -1,11 +1,22 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy.exc import IntegrityError
 from models import *
 from datetime import datetime
 from utils import token_required
+from pagination import paginated_response
+from serializers import (record_exists, patient_appointments_query, serialize_patient_appointment,
+                         doctor_appointments_query, serialize_doctor_appointment)
+from bulk import BulkInputError, chunked, read_bulk_items
+from availability import index_bookings
+from transitions import APPOINTMENT_TRANSITIONS, transition_response
 
 # Tạo Blueprint cho các route liên quan đến Appointment
 bp = Blueprint('appointment', __name__)
 
+# Phản hồi khi bác sĩ đã có lịch hẹn trong slot được yêu cầu
+def slot_conflict():
+    return jsonify({"message": "Doctor already has an appointment in this time slot"}), 409
+
 # API để tạo mới một lịch hẹn
 @bp.route('/appointments', methods=['POST'])
 @token_required
@@ -40,60 +51,166 @@ def create_appointment():
         patient_id=patient_id,
         doctor_id=doctor_id,
         appointment_date=appointment_date,
-        status='Scheduled'
+        status='Scheduled',
+        slot_start=Appointment.slot_for(appointment_date, current_app.config['APPOINTMENT_SLOT_MINUTES'])
     )
 
-    # Lưu lịch hẹn vào cơ sở dữ liệu
+    # Lưu lịch hẹn vào cơ sở dữ liệu; ràng buộc unique (doctor_id, slot_start) chặn việc đặt trùng slot
     db.session.add(new_appointment)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return slot_conflict()
 
     return jsonify({"message": "Appointment scheduled successfully"}), 201
 
+# API để tạo nhiều lịch hẹn cùng lúc (JSON array hoặc NDJSON)
+@bp.route('/appointments/bulk', methods=['POST'])
+@token_required
+def create_appointments_bulk():
+    config = current_app.config
+    try:
+        items = read_bulk_items(config['BULK_MAX_ITEMS'])
+    except BulkInputError as e:
+        return jsonify({"message": str(e)}), 400
+
+    results = [None] * len(items)
+    pending = []
+
+    # Kiểm tra các thông tin đầu vào và chuyển đổi ngày hẹn cho toàn bộ danh sách
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[i] = bulk_result(i, 400, "Invalid item")
+            continue
+
+        patient_id = item.get('patient_id')
+        doctor_id = item.get('doctor_id')
+        appointment_date = item.get('appointment_date')
+
+        if not patient_id or not doctor_id or not appointment_date:
+            results[i] = bulk_result(i, 400, "Missing required fields")
+            continue
+
+        try:
+            patient_id = int(patient_id)
+            doctor_id = int(doctor_id)
+        except (ValueError, TypeError):
+            results[i] = bulk_result(i, 400, "Invalid patient_id or doctor_id")
+            continue
+
+        try:
+            appointment_date = datetime.strptime(appointment_date, '%Y-%m-%d %H:%M')
+        except (ValueError, TypeError):
+            results[i] = bulk_result(i, 400, "Invalid date format. Use YYYY-MM-DD HH:MM")
+            continue
+
+        pending.append((i, {
+            "patient_id": patient_id,
+            "doctor_id": doctor_id,
+            "appointment_date": appointment_date,
+            "status": 'Scheduled',
+            "slot_start": Appointment.slot_for(appointment_date, config['APPOINTMENT_SLOT_MINUTES'])
+        }))
+
+    # Kiểm tra sự tồn tại của bệnh nhân và bác sĩ, mỗi bảng chỉ một truy vấn IN
+    patient_ids = {row['patient_id'] for _, row in pending}
+    doctor_ids = {row['doctor_id'] for _, row in pending}
+    existing_patients = {pid for (pid,) in db.session.query(Patient.patient_id).filter(Patient.patient_id.in_(patient_ids))} if patient_ids else set()
+    existing_doctors = {did for (did,) in db.session.query(Doctor.doctor_id).filter(Doctor.doctor_id.in_(doctor_ids))} if doctor_ids else set()
+
+    valid = []
+    requested_slots = set()
+    for i, row in pending:
+        slot = (row['doctor_id'], row['slot_start'])
+        if row['patient_id'] not in existing_patients:
+            results[i] = bulk_result(i, 404, "Patient not found")
+        elif row['doctor_id'] not in existing_doctors:
+            results[i] = bulk_result(i, 404, "Doctor not found")
+        elif slot in requested_slots:
+            # Trùng slot với một phần tử khác trong cùng request
+            results[i] = bulk_result(i, 409, "Doctor already has an appointment in this time slot")
+        else:
+            requested_slots.add(slot)
+            valid.append((i, row))
+
+    # Thêm vào database theo từng lô, mỗi lô một transaction
+    for chunk in chunked(valid, config['BULK_CHUNK_SIZE']):
+        insert_appointment_chunk(chunk, results)
+
+    created = sum(1 for result in results if result['status'] == 201)
+    return jsonify({
+        "created": created,
+        "failed": len(results) - created,
+        "results": results
+    }), 200
+
+# Kết quả xử lý của một phần tử trong request hàng loạt
+def bulk_result(index, status, message):
+    return {"index": index, "status": status, "message": message}
+
+def insert_appointment_chunk(chunk, results):
+    # Loại bỏ các slot đã có người đặt trong database (một truy vấn cho cả lô)
+    doctor_ids = {row['doctor_id'] for _, row in chunk}
+    slots = {row['slot_start'] for _, row in chunk}
+    taken = {(doctor_id, slot_start) for doctor_id, slot_start in db.session.query(
+        Appointment.doctor_id, Appointment.slot_start
+    ).filter(Appointment.doctor_id.in_(doctor_ids), Appointment.slot_start.in_(slots))}
+
+    rows = []
+    for i, row in chunk:
+        if (row['doctor_id'], row['slot_start']) in taken:
+            results[i] = bulk_result(i, 409, "Doctor already has an appointment in this time slot")
+        else:
+            rows.append((i, row))
+    if not rows:
+        return
+
+    inserted = rows
+    try:
+        # INSERT dạng executemany cho cả lô
+        db.session.execute(Appointment.__table__.insert(), [row for _, row in rows])
+        db.session.commit()
+    except IntegrityError:
+        # Có slot vừa bị đặt bởi request khác: thử lại từng dòng để xác định dòng nào bị trùng
+        db.session.rollback()
+        inserted = []
+        for i, row in rows:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(Appointment.__table__.insert(), row)
+                inserted.append((i, row))
+            except IntegrityError:
+                results[i] = bulk_result(i, 409, "Doctor already has an appointment in this time slot")
+        db.session.commit()
+
+    for i, _ in inserted:
+        results[i] = bulk_result(i, 201, "Appointment scheduled successfully")
+    index_bookings([(row['doctor_id'], row['slot_start']) for _, row in inserted])
+
 # API để lấy danh sách các lịch hẹn của một bệnh nhân
 @bp.route('/appointments/patient/<int:patient_id>', methods=['GET'])
 @token_required
 def get_patient_appointments(patient_id):
-    patient = Patient.query.get(patient_id)
-
-    if not patient:
+    if not record_exists(Patient.patient_id, patient_id):
         return jsonify({"message": "Patient not found"}), 404
 
-    # Lấy danh sách các lịch hẹn của bệnh nhân
-    appointments = Appointment.query.filter_by(patient_id=patient_id).all()
-
-    # Chuyển đổi kết quả thành JSON
-    appointments_list = [{
-        "appointment_id": appt.appointment_id,
-        "doctor_id": appt.doctor_id,
-        "doctor_name": appt.doctor.name,
-        "appointment_date": appt.appointment_date.strftime('%Y-%m-%d %H:%M'),
-        "status": appt.status
-    } for appt in appointments]
+    # Lấy danh sách các lịch hẹn của bệnh nhân (phân trang theo ngày hẹn, id)
+    appointments = patient_appointments_query(patient_id)
 
-    return jsonify(appointments_list), 200
+    return paginated_response(appointments, [Appointment.appointment_date, Appointment.appointment_id], serialize_patient_appointment)
 
 # API để lấy danh sách các lịch hẹn của một bác sĩ
 @bp.route('/appointments/doctor/<int:doctor_id>', methods=['GET'])
 @token_required
 def get_doctor_appointments(doctor_id):
-    doctor = Doctor.query.get(doctor_id)
-
-    if not doctor:
+    if not record_exists(Doctor.doctor_id, doctor_id):
         return jsonify({"message": "Doctor not found"}), 404
 
-    # Lấy danh sách các lịch hẹn của bác sĩ
-    appointments = Appointment.query.filter_by(doctor_id=doctor_id).all()
+    # Lấy danh sách các lịch hẹn của bác sĩ (phân trang theo ngày hẹn, id)
+    appointments = doctor_appointments_query(doctor_id)
 
-    # Chuyển đổi kết quả thành JSON
-    appointments_list = [{
-        "appointment_id": appt.appointment_id,
-        "patient_id": appt.patient_id,
-        "patient_name": appt.patient.name,
-        "appointment_date": appt.appointment_date.strftime('%Y-%m-%d %H:%M'),
-        "status": appt.status
-    } for appt in appointments]
-
-    return jsonify(appointments_list), 200
+    return paginated_response(appointments, [Appointment.appointment_date, Appointment.appointment_id], serialize_doctor_appointment)
 
 # API để cập nhật trạng thái của lịch hẹn (hoàn tất hoặc hủy)
 @bp.route('/appointments/<int:appointment_id>', methods=['PUT'])
@@ -114,10 +231,29 @@ def update_appointment_status(appointment_id):
 
     # Cập nhật trạng thái của lịch hẹn
     appointment.status = new_status
-    db.session.commit()
+    if new_status == 'Canceled':
+        # Giải phóng slot để bệnh nhân khác có thể đặt
+        appointment.slot_start = None
+    elif appointment.slot_start is None:
+        # Lịch hẹn được khôi phục, chiếm lại slot (có thể đã bị người khác đặt)
+        appointment.slot_start = Appointment.slot_for(appointment.appointment_date, current_app.config['APPOINTMENT_SLOT_MINUTES'])
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return slot_conflict()
 
     return jsonify({"message": "Appointment status updated successfully"}), 200
 
+# API để chuyển trạng thái nhiều lịch hẹn cùng lúc, theo danh sách id hoặc bộ lọc:
+# {"status": "Completed", "ids": [1, 2]} hoặc
+# {"status": "Completed", "filter": {"doctor_id": 3, "date_from": "2024-05-01", "date_to": "2024-05-01", "status": "Scheduled"}}
+@bp.route('/appointments/bulk', methods=['PUT'])
+@token_required
+def update_appointments_status_bulk():
+    return transition_response(APPOINTMENT_TRANSITIONS)
+
 # API để xóa một lịch hẹn
 @bp.route('/appointments/<int:appointment_id>', methods=['DELETE'])
 @token_required
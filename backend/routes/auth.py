@@ -1,15 +1,20 @@
 from flask import Blueprint, request, jsonify
 from models import *
-from werkzeug.security import generate_password_hash, check_password_hash
-from utils import generate_token, token_required
+from utils import (generate_token, token_required, verify_jwt, hash_password, check_password,
+                   password_needs_rehash, HashingPoolBusy)
+from rate_limit import rate_limited
 import jwt
-import os
 
 # Tạo Blueprint cho các route liên quan đến Authentication
 bp = Blueprint('auth', __name__)
 
+# Phản hồi khi pool mã hóa mật khẩu đang quá tải
+def server_busy():
+    return jsonify({"message": "Server is busy, please try again later"}), 503, {'Retry-After': '1'}
+
 # API để đăng ký người dùng mới (Sign up)
 @bp.route('/signup', methods=['POST'])
+@rate_limited('signup')
 def signup():
     data = request.get_json()
 
@@ -25,8 +30,11 @@ def signup():
     if existing_user:
         return jsonify({"message": "Username already exists"}), 400
 
-    # Mã hóa mật khẩu và tạo người dùng mới
-    hashed_password = generate_password_hash(password)
+    # Mã hóa mật khẩu (trong pool mã hóa) và tạo người dùng mới
+    try:
+        hashed_password = hash_password(password)
+    except HashingPoolBusy:
+        return server_busy()
     new_user = User(
         username=username,
         password=hashed_password,
@@ -40,6 +48,7 @@ def signup():
 
 # API để đăng nhập người dùng (Sign in)
 @bp.route('/login', methods=['POST'])
+@rate_limited('login')
 def login():
     data = request.get_json()
 
@@ -52,9 +61,26 @@ def login():
     # Tìm người dùng theo username
     user = User.query.filter_by(username=username).first()
 
-    if not user or not check_password_hash(user.password, password):
+    if not user:
+        return jsonify({"message": "Invalid username or password"}), 401
+
+    try:
+        valid = check_password(user.password, password)
+    except HashingPoolBusy:
+        return server_busy()
+
+    if not valid:
         return jsonify({"message": "Invalid username or password"}), 401
 
+    # Mã hóa lại mật khẩu nếu đang dùng thuật toán/số vòng lặp cũ
+    # (nếu pool đang bận thì bỏ qua, sẽ thử lại ở lần đăng nhập sau)
+    if password_needs_rehash(user.password):
+        try:
+            user.password = hash_password(password)
+            db.session.commit()
+        except HashingPoolBusy:
+            pass
+
     # Tạo JWT token cho người dùng
     token = generate_token(user_id=user.user_id, role=user.role)
 
@@ -91,7 +117,8 @@ def verify_token():
         return jsonify({"message": "Token is missing"}), 400
 
     try:
-        decoded = jwt.decode(token, os.getenv('SECRET_KEY'), algorithms=['HS256'])
+        # Dùng chung secret key và cache token đã xác thực với token_required
+        decoded = verify_jwt(token)
         return jsonify({"message": "Token is valid", "user_id": decoded['user_id'], "role": decoded['role']}), 200
     except jwt.ExpiredSignatureError:
         return jsonify({"message": "Token has expired"}), 401
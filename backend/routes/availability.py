@@ -0,0 +1,51 @@
+from flask import Blueprint, request, jsonify, current_app
+from datetime import datetime, timedelta
+from utils import token_required
+from availability import get_availability_index
+
+# Tạo Blueprint cho các route liên quan đến tìm lịch trống của bác sĩ
+bp = Blueprint('availability', __name__)
+
+# API để tìm các slot trống sớm nhất theo bác sĩ hoặc chuyên khoa
+@bp.route('/availability', methods=['GET'])
+@token_required
+def get_availability():
+    config = current_app.config
+
+    doctor_id = request.args.get('doctor_id')
+    specialization = request.args.get('specialization')
+    start = request.args.get('start')
+    end = request.args.get('end')
+
+    try:
+        doctor_id = int(doctor_id) if doctor_id else None
+        limit = int(request.args.get('limit', '10'))
+    except ValueError:
+        return jsonify({"message": "Invalid doctor_id or limit"}), 400
+    if limit < 1:
+        return jsonify({"message": "Invalid doctor_id or limit"}), 400
+    limit = min(limit, config['AVAILABILITY_MAX_RESULTS'])
+
+    try:
+        # Chuyển đổi chuỗi thành datetime (mặc định tìm từ thời điểm hiện tại trong 7 ngày)
+        start = datetime.strptime(start, '%Y-%m-%d %H:%M') if start else datetime.now()
+        end = datetime.strptime(end, '%Y-%m-%d %H:%M') if end else start + timedelta(days=7)
+    except ValueError:
+        return jsonify({"message": "Invalid date format. Use YYYY-MM-DD HH:MM"}), 400
+
+    if end <= start:
+        return jsonify({"message": "End must be after start"}), 400
+    end = min(end, start + timedelta(days=config['AVAILABILITY_MAX_DAYS']))
+
+    index = get_availability_index()
+    slots = index.earliest_free(start, end, limit, doctor_id=doctor_id, specialization=specialization)
+
+    # Chuyển đổi kết quả thành JSON
+    slots_list = [{
+        "doctor_id": schedule.doctor_id,
+        "doctor_name": schedule.name,
+        "specialization": schedule.specialization,
+        "slot_start": slot.strftime('%Y-%m-%d %H:%M')
+    } for slot, schedule in slots]
+
+    return jsonify(slots_list), 200
@@ -0,0 +1,33 @@
+import click
+from flask import Blueprint, jsonify, current_app
+from models import *
+from utils import token_required
+from serializers import record_exists
+from ledger import reconcile_balances, serialize_balance
+
+# Tạo Blueprint cho các route liên quan đến công nợ (billing) của bệnh nhân
+bp = Blueprint('billing', __name__)
+
+# API để lấy công nợ hiện tại của một bệnh nhân (đọc từ sổ cái, không tính lại toàn bộ lịch sử)
+@bp.route('/patients/<int:patient_id>/balance', methods=['GET'])
+@token_required
+def get_patient_balance(patient_id):
+    if not record_exists(Patient.patient_id, patient_id):
+        return jsonify({"message": "Patient not found"}), 404
+
+    balance = db.session.get(PatientBalance, patient_id)
+
+    return jsonify(serialize_balance(patient_id, balance)), 200
+
+# Lệnh CLI đối soát sổ cái với kết quả tính lại từ đầu: flask billing reconcile [--fix]
+@bp.cli.command('reconcile')
+@click.option('--fix', is_flag=True, help='Ghi đè các dòng sổ cái bị sai lệch bằng giá trị tính lại.')
+@click.option('--chunk-size', type=int, default=None, help='Số bệnh nhân mỗi lô.')
+def reconcile_command(fix, chunk_size):
+    report = reconcile_balances(chunk_size or current_app.config['LEDGER_RECONCILE_CHUNK_SIZE'], fix=fix)
+
+    click.echo(f"Checked {report['checked']} patients, {report['mismatched']} mismatched, {report['fixed']} fixed.")
+    for mismatch in report['mismatches']:
+        click.echo(f"  patient {mismatch['patient_id']}: ledger={mismatch['ledger']} expected={mismatch['expected']}")
+    if report['mismatched'] and not fix:
+        raise SystemExit(1)
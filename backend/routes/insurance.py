@@ -1,6 +1,11 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy.exc import IntegrityError
 from models import *
 from utils import token_required
+from pagination import paginated_response
+from cache import catalog_response
+from serializers import record_exists, patient_insurances_query, serialize_patient_insurance
+from transitions import INSURANCE_TRANSITIONS, transition_response
 
 # Tạo Blueprint cho các route liên quan đến Insurance Services
 bp = Blueprint('insurance', __name__)
@@ -8,34 +13,37 @@ bp = Blueprint('insurance', __name__)
 # API để lấy danh sách tất cả các gói bảo hiểm
 @bp.route('/insurance', methods=['GET'])
 def get_all_insurance():
-    insurance_services = InsuranceService.query.all()
+    def build():
+        insurance_services = InsuranceService.query.all()
 
-    # Chuyển đổi kết quả thành JSON
-    insurance_list = [{
-        "insurance_id": insurance.insurance_id,
-        "insurance_name": insurance.insurance_name,
-        "coverage": insurance.coverage,
-        "price": float(insurance.price)
-    } for insurance in insurance_services]
+        # Chuyển đổi kết quả thành JSON
+        return [{
+            "insurance_id": insurance.insurance_id,
+            "insurance_name": insurance.insurance_name,
+            "coverage": insurance.coverage,
+            "price": float(insurance.price)
+        } for insurance in insurance_services]
 
-    return jsonify(insurance_list), 200
+    # Trả về từ cache danh mục (có ETag/304)
+    return catalog_response('insurance', build)
 
 # API để lấy thông tin chi tiết về một gói bảo hiểm dựa trên insurance_id
 @bp.route('/insurance/<int:insurance_id>', methods=['GET'])
 def get_insurance_by_id(insurance_id):
-    insurance = InsuranceService.query.get(insurance_id)
+    def build():
+        insurance = InsuranceService.query.get(insurance_id)
 
-    if not insurance:
-        return jsonify({"message": "Insurance not found"}), 404
+        if not insurance:
+            return None
 
-    insurance_info = {
-        "insurance_id": insurance.insurance_id,
-        "insurance_name": insurance.insurance_name,
-        "coverage": insurance.coverage,
-        "price": float(insurance.price)
-    }
+        return {
+            "insurance_id": insurance.insurance_id,
+            "insurance_name": insurance.insurance_name,
+            "coverage": insurance.coverage,
+            "price": float(insurance.price)
+        }
 
-    return jsonify(insurance_info), 200
+    return catalog_response(f'insurance/{insurance_id}', build, "Insurance not found")
 
 # API để đăng ký một gói bảo hiểm cho bệnh nhân
 @bp.route('/insurance/register', methods=['POST'])
@@ -58,11 +66,6 @@ def register_insurance():
     if not insurance:
         return jsonify({"message": "Insurance not found"}), 404
 
-    # Kiểm tra xem bệnh nhân đã đăng ký gói bảo hiểm này chưa
-    existing_registration = PatientInsurance.query.filter_by(patient_id=patient_id, insurance_id=insurance_id).first()
-    if existing_registration:
-        return jsonify({"message": "Insurance already registered for this patient"}), 400
-
     # Đăng ký gói bảo hiểm cho bệnh nhân
     new_registration = PatientInsurance(
         patient_id=patient_id,
@@ -70,8 +73,13 @@ def register_insurance():
         status='Active'  # Trạng thái ban đầu là Active
     )
 
+    # Ràng buộc unique (patient_id, insurance_id) chặn việc đăng ký trùng, kể cả khi có nhiều request đồng thời
     db.session.add(new_registration)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"message": "Insurance already registered for this patient"}), 400
 
     return jsonify({"message": "Insurance registered successfully"}), 201
 
@@ -79,22 +87,13 @@ def register_insurance():
 @bp.route('/insurance/patient/<int:patient_id>', methods=['GET'])
 @token_required
 def get_patient_insurances(patient_id):
-    patient = Patient.query.get(patient_id)
-
-    if not patient:
+    if not record_exists(Patient.patient_id, patient_id):
         return jsonify({"message": "Patient not found"}), 404
 
-    # Lấy danh sách các gói bảo hiểm mà bệnh nhân đã đăng ký
-    insurances = PatientInsurance.query.filter_by(patient_id=patient_id).all()
+    # Lấy danh sách các gói bảo hiểm mà bệnh nhân đã đăng ký (phân trang theo id)
+    insurances = patient_insurances_query(patient_id)
 
-    # Chuyển đổi kết quả thành JSON
-    insurance_list = [{
-        "insurance_id": insurance.insurance_id,
-        "insurance_name": insurance.insurance.insurance_name,
-        "status": insurance.status
-    } for insurance in insurances]
-
-    return jsonify(insurance_list), 200
+    return paginated_response(insurances, [PatientInsurance.id], serialize_patient_insurance)
 
 # API để cập nhật trạng thái của gói bảo hiểm đã đăng ký
 @bp.route('/insurance/<int:patient_insurance_id>', methods=['PUT'])
@@ -117,3 +116,9 @@ def update_patient_insurance_status(patient_insurance_id):
     db.session.commit()
 
     return jsonify({"message": "Insurance status updated successfully"}), 200
+
+# API để chuyển trạng thái nhiều gói bảo hiểm đã đăng ký cùng lúc (theo danh sách id hoặc bộ lọc patient_id, insurance_id)
+@bp.route('/insurance/bulk', methods=['PUT'])
+@token_required
+def update_patient_insurances_status_bulk():
+    return transition_response(INSURANCE_TRANSITIONS)
@@ -0,0 +1,32 @@
+from flask import Blueprint, request, jsonify, current_app
+from models import *
+from utils import token_required
+from pagination import PaginationError
+from overview import (OVERVIEW_SECTIONS, patient_summary_query, serialize_patient_summary,
+                      section_limits, section_query, serialize_section)
+
+# Tạo Blueprint cho các route tổng hợp theo bệnh nhân
+bp = Blueprint('patient', __name__)
+
+# API trang tổng quan của bệnh nhân: lịch hẹn, đơn thuốc, dịch vụ, bảo hiểm và thanh toán trong một request
+@bp.route('/patients/<int:patient_id>/overview', methods=['GET'])
+@token_required
+def get_patient_overview(patient_id):
+    try:
+        limits = section_limits(request.args, current_app.config)
+    except PaginationError as e:
+        return jsonify({"message": str(e)}), 400
+
+    # Lấy thông tin bệnh nhân, đồng thời là bước kiểm tra bệnh nhân tồn tại (chỉ một lần)
+    patient = db.session.execute(patient_summary_query(patient_id)).first()
+    if not patient:
+        return jsonify({"message": "Patient not found"}), 404
+
+    # Các truy vấn dùng chung một kết nối và một transaction của request
+    overview = {"patient": serialize_patient_summary(patient)}
+    for section in OVERVIEW_SECTIONS:
+        name = section[0]
+        rows = db.session.execute(section_query(section, patient_id, limits[name])).all()
+        overview[name] = serialize_section(section, rows, limits[name])
+
+    return jsonify(overview), 200
@@ -1,7 +1,11 @@
 from flask import Blueprint, request, jsonify
 from models import *
 from utils import token_required
+from pagination import paginated_response
+from serializers import (record_exists, patient_payments_query, serialize_patient_payment,
+                         payment_detail_query, serialize_payment_detail)
 from datetime import datetime
+from transitions import PAYMENT_TRANSITIONS, transition_response
 
 # Tạo Blueprint cho các route liên quan đến Payment
 bp = Blueprint('payment', __name__)
@@ -43,45 +47,24 @@ def create_payment():
 @bp.route('/payments/patient/<int:patient_id>', methods=['GET'])
 @token_required
 def get_patient_payments(patient_id):
-    patient = Patient.query.get(patient_id)
-
-    if not patient:
+    if not record_exists(Patient.patient_id, patient_id):
         return jsonify({"message": "Patient not found"}), 404
 
-    # Lấy danh sách các thanh toán của bệnh nhân
-    payments = Payment.query.filter_by(patient_id=patient_id).all()
-
-    # Chuyển đổi kết quả thành JSON
-    payments_list = [{
-        "payment_id": payment.payment_id,
-        "amount": float(payment.amount),
-        "payment_date": payment.payment_date.strftime('%Y-%m-%d %H:%M:%S'),
-        "description": payment.description,
-        "status": payment.status
-    } for payment in payments]
+    # Lấy danh sách các thanh toán của bệnh nhân (phân trang theo ngày thanh toán, id)
+    payments = patient_payments_query(patient_id)
 
-    return jsonify(payments_list), 200
+    return paginated_response(payments, [Payment.payment_date, Payment.payment_id], serialize_patient_payment)
 
 # API để lấy thông tin chi tiết về một thanh toán dựa trên payment_id
 @bp.route('/payments/<int:payment_id>', methods=['GET'])
 @token_required
 def get_payment_by_id(payment_id):
-    payment = Payment.query.get(payment_id)
+    payment = db.session.execute(payment_detail_query(payment_id)).first()
 
     if not payment:
         return jsonify({"message": "Payment not found"}), 404
 
-    payment_info = {
-        "payment_id": payment.payment_id,
-        "patient_id": payment.patient_id,
-        "patient_name": payment.patient.name,
-        "amount": float(payment.amount),
-        "payment_date": payment.payment_date.strftime('%Y-%m-%d %H:%M:%S'),
-        "description": payment.description,
-        "status": payment.status
-    }
-
-    return jsonify(payment_info), 200
+    return jsonify(serialize_payment_detail(payment)), 200
 
 # API để cập nhật trạng thái của thanh toán (ví dụ: 'Paid', 'Pending')
 @bp.route('/payments/<int:payment_id>', methods=['PUT'])
@@ -105,6 +88,12 @@ def update_payment_status(payment_id):
 
     return jsonify({"message": "Payment status updated successfully"}), 200
 
+# API để chuyển trạng thái nhiều thanh toán cùng lúc (theo danh sách id hoặc bộ lọc patient_id, date_from, date_to)
+@bp.route('/payments/bulk', methods=['PUT'])
+@token_required
+def update_payments_status_bulk():
+    return transition_response(PAYMENT_TRANSITIONS)
+
 # API để xóa một thanh toán
 @bp.route('/payments/<int:payment_id>', methods=['DELETE'])
 @token_required
@@ -1,6 +1,11 @@
-from flask import Blueprint, request, jsonify
+import click
+from flask import Blueprint, request, jsonify, current_app
 from models import *
 from utils import token_required
+from pagination import paginated_response
+from serializers import (record_exists, patient_prescriptions_query, serialize_patient_prescription,
+                         prescription_detail_query, serialize_prescription_detail)
+from importers import import_prescriptions, iter_csv_rows, iter_ndjson_rows
 
 # Tạo Blueprint cho các route liên quan đến Prescriptions
 bp = Blueprint('prescription', __name__)
@@ -33,7 +38,8 @@ def create_prescription():
         patient_id=patient_id,
         medication_id=medication_id,
         dosage=dosage,
-        quantity=quantity
+        quantity=quantity,
+        unit_price=medication.price  # Đơn giá tại thời điểm kê đơn
     )
 
     db.session.add(new_prescription)
@@ -41,48 +47,70 @@ def create_prescription():
 
     return jsonify({"message": "Prescription created successfully"}), 201
 
+# API để import đơn thuốc hàng loạt từ tệp CSV hoặc NDJSON (đọc dần từ body của request)
+@bp.route('/prescriptions/import', methods=['POST'])
+@token_required
+def import_prescriptions_file():
+    config = current_app.config
+
+    if request.mimetype == 'text/csv':
+        rows = iter_csv_rows(request.stream)
+    elif request.mimetype == 'application/x-ndjson':
+        rows = iter_ndjson_rows(request.stream)
+    else:
+        return jsonify({"message": "Unsupported content type. Use text/csv or application/x-ndjson"}), 415
+
+    try:
+        chunk_size = int(request.args.get('chunk_size', config['IMPORT_CHUNK_SIZE']))
+    except ValueError:
+        return jsonify({"message": "Invalid chunk_size"}), 400
+    if chunk_size < 1:
+        return jsonify({"message": "Invalid chunk_size"}), 400
+
+    report = import_prescriptions(rows, chunk_size, config['IMPORT_MAX_ERRORS'])
+
+    return jsonify(report.to_dict()), 200
+
+# Lệnh CLI để import đơn thuốc từ tệp: flask prescription import <tệp> [--format csv|ndjson]
+@bp.cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'ndjson']), default=None,
+              help='Định dạng tệp (mặc định đoán theo phần mở rộng).')
+@click.option('--chunk-size', type=int, default=None, help='Số dòng mỗi transaction.')
+def import_prescriptions_command(path, file_format, chunk_size):
+    config = current_app.config
+    file_format = file_format or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+
+    with open(path, 'rb') as f:
+        rows = iter_csv_rows(f) if file_format == 'csv' else iter_ndjson_rows(f)
+        report = import_prescriptions(rows, chunk_size or config['IMPORT_CHUNK_SIZE'], config['IMPORT_MAX_ERRORS'])
+
+    click.echo(f"Imported {report.imported} prescriptions, {report.failed} failed.")
+    for error in report.errors:
+        click.echo(f"  line {error['line']}: {error['message']}")
+
 # API để lấy danh sách các đơn thuốc của một bệnh nhân
 @bp.route('/prescriptions/patient/<int:patient_id>', methods=['GET'])
 @token_required
 def get_patient_prescriptions(patient_id):
-    patient = Patient.query.get(patient_id)
-
-    if not patient:
+    if not record_exists(Patient.patient_id, patient_id):
         return jsonify({"message": "Patient not found"}), 404
 
-    # Lấy danh sách các đơn thuốc của bệnh nhân
-    prescriptions = Prescription.query.filter_by(patient_id=patient_id).all()
-
-    # Chuyển đổi kết quả thành JSON
-    prescriptions_list = [{
-        "prescription_id": prescription.prescription_id,
-        "medication_name": prescription.medication.medication_name,
-        "dosage": prescription.dosage,
-        "quantity": prescription.quantity
-    } for prescription in prescriptions]
+    # Lấy danh sách các đơn thuốc của bệnh nhân (bảng không có cột ngày nên phân trang theo id)
+    prescriptions = patient_prescriptions_query(patient_id)
 
-    return jsonify(prescriptions_list), 200
+    return paginated_response(prescriptions, [Prescription.prescription_id], serialize_patient_prescription)
 
 # API để lấy thông tin chi tiết của một đơn thuốc dựa trên prescription_id
 @bp.route('/prescriptions/<int:prescription_id>', methods=['GET'])
 @token_required
 def get_prescription_by_id(prescription_id):
-    prescription = Prescription.query.get(prescription_id)
+    prescription = db.session.execute(prescription_detail_query(prescription_id)).first()
 
     if not prescription:
         return jsonify({"message": "Prescription not found"}), 404
 
-    prescription_info = {
-        "prescription_id": prescription.prescription_id,
-        "patient_id": prescription.patient_id,
-        "patient_name": prescription.patient.name,
-        "medication_id": prescription.medication_id,
-        "medication_name": prescription.medication.medication_name,
-        "dosage": prescription.dosage,
-        "quantity": prescription.quantity
-    }
-
-    return jsonify(prescription_info), 200
+    return jsonify(serialize_prescription_detail(prescription)), 200
 
 # API để cập nhật một đơn thuốc
 @bp.route('/prescriptions/<int:prescription_id>', methods=['PUT'])
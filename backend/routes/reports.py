@@ -0,0 +1,73 @@
+import click
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify, current_app
+from models import *
+from utils import token_required
+from revenue import (add_months, month_of, rebuild_revenue,
+                     daily_revenue_query, serialize_daily_revenue,
+                     monthly_revenue_query, serialize_monthly_revenue,
+                     revenue_by_status_query, serialize_revenue_by_status)
+
+# Tạo Blueprint cho các route báo cáo (chỉ đọc từ các bảng doanh thu tổng hợp, không quét bảng Payment)
+bp = Blueprint('reports', __name__)
+
+# Hàm đọc khoảng thời gian từ query string (?start=...&end=...), trả về None nếu không hợp lệ
+def parse_range(date_format, default_start, default_end):
+    try:
+        start = datetime.strptime(request.args['start'], date_format).date() if 'start' in request.args else default_start
+        end = datetime.strptime(request.args['end'], date_format).date() if 'end' in request.args else default_end
+    except ValueError:
+        return None
+    return (start, end) if start <= end else None
+
+# API doanh thu theo ngày: ?start=YYYY-MM-DD&end=YYYY-MM-DD&status=Paid (mặc định 30 ngày gần nhất)
+@bp.route('/reports/revenue/daily', methods=['GET'])
+@token_required
+def get_daily_revenue():
+    today = datetime.utcnow().date()
+    date_range = parse_range('%Y-%m-%d', today - timedelta(days=29), today)
+    if date_range is None:
+        return jsonify({"message": "Invalid date range. Use start/end in YYYY-MM-DD format"}), 400
+
+    start, end = date_range
+    if (end - start).days >= current_app.config['REVENUE_REPORT_MAX_DAYS']:
+        return jsonify({"message": f"Date range is limited to {current_app.config['REVENUE_REPORT_MAX_DAYS']} days"}), 400
+
+    rows = db.session.execute(daily_revenue_query(start, end, request.args.get('status')))
+
+    return jsonify([serialize_daily_revenue(row) for row in rows]), 200
+
+# API doanh thu theo tháng: ?start=YYYY-MM&end=YYYY-MM&status=Paid (mặc định 12 tháng gần nhất)
+@bp.route('/reports/revenue/monthly', methods=['GET'])
+@token_required
+def get_monthly_revenue():
+    this_month = month_of(datetime.utcnow().date())
+    date_range = parse_range('%Y-%m', add_months(this_month, -11), this_month)
+    if date_range is None:
+        return jsonify({"message": "Invalid date range. Use start/end in YYYY-MM format"}), 400
+
+    rows = db.session.execute(monthly_revenue_query(*date_range, request.args.get('status')))
+
+    return jsonify([serialize_monthly_revenue(row) for row in rows]), 200
+
+# API tổng doanh thu theo trạng thái thanh toán: ?start=YYYY-MM&end=YYYY-MM (mặc định 12 tháng gần nhất)
+@bp.route('/reports/revenue/status', methods=['GET'])
+@token_required
+def get_revenue_by_status():
+    this_month = month_of(datetime.utcnow().date())
+    date_range = parse_range('%Y-%m', add_months(this_month, -11), this_month)
+    if date_range is None:
+        return jsonify({"message": "Invalid date range. Use start/end in YYYY-MM format"}), 400
+
+    rows = db.session.execute(revenue_by_status_query(*date_range))
+
+    return jsonify([serialize_revenue_by_status(row) for row in rows]), 200
+
+# Lệnh CLI tính lại bảng doanh thu từ lịch sử thanh toán: flask reports rebuild-revenue [--chunk-months N]
+@bp.cli.command('rebuild-revenue')
+@click.option('--chunk-months', type=int, default=None, help='Số tháng mỗi transaction.')
+def rebuild_revenue_command(chunk_months):
+    config = current_app.config
+    report = rebuild_revenue(chunk_months or config['REVENUE_REBUILD_CHUNK_MONTHS'])
+
+    click.echo(f"Rebuilt revenue from {report['payments']} payments in {report['chunks']} chunks.")
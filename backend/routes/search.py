@@ -0,0 +1,57 @@
+import click
+from flask import Blueprint, request, jsonify, current_app
+from models import *
+from utils import token_required
+from pagination import PaginationError, parse_limit
+from search import SEARCH_KINDS, search, tokenize, rebuild_search_index
+
+# Tạo Blueprint cho các route tìm kiếm bệnh nhân, bác sĩ và thuốc (dùng bảng chỉ mục SearchToken)
+bp = Blueprint('search', __name__)
+
+# Hàm đọc câu tìm kiếm (?q=...) và số kết quả (?limit=...), trả về thông báo lỗi nếu không hợp lệ
+def parse_search_args():
+    query = request.args.get('q', '')
+    if not tokenize(query):
+        return None, None, "Missing search query"
+    config = current_app.config
+    try:
+        limit = parse_limit(request.args.get('limit'), config['SEARCH_LIMIT_DEFAULT'], config['SEARCH_LIMIT_MAX'])
+    except PaginationError as e:
+        return None, None, str(e)
+    return query, limit, None
+
+# API tìm kiếm trên nhiều loại đối tượng: ?q=nguyen van&types=patients,doctors&limit=10
+# Mặc định tìm trên bệnh nhân, bác sĩ và thuốc; mỗi loại tối đa 'limit' kết quả
+@bp.route('/search', methods=['GET'])
+@token_required
+def search_all():
+    query, limit, error = parse_search_args()
+    if error:
+        return jsonify({"message": error}), 400
+
+    kinds = [kind.strip() for kind in request.args.get('types', ','.join(SEARCH_KINDS)).split(',') if kind.strip()]
+    if not kinds or any(kind not in SEARCH_KINDS for kind in kinds):
+        return jsonify({"message": f"Invalid types. Use a comma-separated subset of: {', '.join(SEARCH_KINDS)}"}), 400
+
+    max_scan = current_app.config['SEARCH_MAX_SCAN']
+    return jsonify({kind: search(kind, query, limit, max_scan) for kind in kinds}), 200
+
+# API tìm kiếm một loại đối tượng: /api/search/patients?q=0912&limit=20
+@bp.route('/search/<kind>', methods=['GET'])
+@token_required
+def search_kind(kind):
+    if kind not in SEARCH_KINDS:
+        return jsonify({"message": "Not found"}), 404
+    query, limit, error = parse_search_args()
+    if error:
+        return jsonify({"message": error}), 400
+
+    return jsonify(search(kind, query, limit, current_app.config['SEARCH_MAX_SCAN'])), 200
+
+# Lệnh CLI xây dựng lại chỉ mục tìm kiếm từ các bảng gốc: flask search rebuild-index [--chunk-size N]
+@bp.cli.command('rebuild-index')
+@click.option('--chunk-size', type=int, default=None, help='Số đối tượng mỗi transaction.')
+def rebuild_index_command(chunk_size):
+    report = rebuild_search_index(chunk_size or current_app.config['SEARCH_REBUILD_CHUNK_SIZE'])
+
+    click.echo('Rebuilt search index: ' + ', '.join(f'{count} {kind}' for kind, count in report.items()) + '.')
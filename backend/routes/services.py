@@ -1,6 +1,11 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy.exc import IntegrityError
 from models import *
 from utils import token_required
+from pagination import paginated_response
+from cache import catalog_response
+from serializers import record_exists, patient_services_query, serialize_patient_service
+from transitions import SERVICE_TRANSITIONS, transition_response
 
 # Tạo Blueprint cho các route liên quan đến Medical Services
 bp = Blueprint('services', __name__)
@@ -8,34 +13,37 @@ bp = Blueprint('services', __name__)
 # API để lấy danh sách tất cả các dịch vụ khám chữa bệnh
 @bp.route('/services', methods=['GET'])
 def get_all_services():
-    services = MedicalService.query.all()
+    def build():
+        services = MedicalService.query.all()
 
-    # Chuyển đổi kết quả thành JSON
-    services_list = [{
-        "service_id": service.service_id,
-        "service_name": service.service_name,
-        "description": service.description,
-        "price": float(service.price)
-    } for service in services]
+        # Chuyển đổi kết quả thành JSON
+        return [{
+            "service_id": service.service_id,
+            "service_name": service.service_name,
+            "description": service.description,
+            "price": float(service.price)
+        } for service in services]
 
-    return jsonify(services_list), 200
+    # Trả về từ cache danh mục (có ETag/304)
+    return catalog_response('services', build)
 
 # API để lấy thông tin chi tiết về một dịch vụ dựa trên service_id
 @bp.route('/services/<int:service_id>', methods=['GET'])
 def get_service_by_id(service_id):
-    service = MedicalService.query.get(service_id)
+    def build():
+        service = MedicalService.query.get(service_id)
 
-    if not service:
-        return jsonify({"message": "Service not found"}), 404
+        if not service:
+            return None
 
-    service_info = {
-        "service_id": service.service_id,
-        "service_name": service.service_name,
-        "description": service.description,
-        "price": float(service.price)
-    }
+        return {
+            "service_id": service.service_id,
+            "service_name": service.service_name,
+            "description": service.description,
+            "price": float(service.price)
+        }
 
-    return jsonify(service_info), 200
+    return catalog_response(f'services/{service_id}', build, "Service not found")
 
 # API để đăng ký một dịch vụ khám chữa bệnh cho bệnh nhân
 @bp.route('/services/register', methods=['POST'])
@@ -58,20 +66,21 @@ def register_service():
     if not service:
         return jsonify({"message": "Service not found"}), 404
 
-    # Kiểm tra xem bệnh nhân đã đăng ký dịch vụ này chưa
-    existing_registration = PatientService.query.filter_by(patient_id=patient_id, service_id=service_id).first()
-    if existing_registration:
-        return jsonify({"message": "Service already registered for this patient"}), 400
-
     # Đăng ký dịch vụ cho bệnh nhân
     new_registration = PatientService(
         patient_id=patient_id,
         service_id=service_id,
-        status='Pending'  # Trạng thái ban đầu là Pending
+        status='Pending',  # Trạng thái ban đầu là Pending
+        price=service.price  # Giá tại thời điểm đăng ký
     )
 
+    # Ràng buộc unique (patient_id, service_id) chặn việc đăng ký trùng, kể cả khi có nhiều request đồng thời
     db.session.add(new_registration)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"message": "Service already registered for this patient"}), 400
 
     return jsonify({"message": "Service registered successfully"}), 201
 
@@ -79,22 +88,13 @@ def register_service():
 @bp.route('/services/patient/<int:patient_id>', methods=['GET'])
 @token_required
 def get_patient_services(patient_id):
-    patient = Patient.query.get(patient_id)
-
-    if not patient:
+    if not record_exists(Patient.patient_id, patient_id):
         return jsonify({"message": "Patient not found"}), 404
 
-    # Lấy danh sách các dịch vụ mà bệnh nhân đã đăng ký
-    services = PatientService.query.filter_by(patient_id=patient_id).all()
+    # Lấy danh sách các dịch vụ mà bệnh nhân đã đăng ký (phân trang theo id)
+    services = patient_services_query(patient_id)
 
-    # Chuyển đổi kết quả thành JSON
-    services_list = [{
-        "service_id": service.service_id,
-        "service_name": service.service.service_name,
-        "status": service.status
-    } for service in services]
-
-    return jsonify(services_list), 200
+    return paginated_response(services, [PatientService.id], serialize_patient_service)
 
 # API để cập nhật trạng thái của dịch vụ đã đăng ký
 @bp.route('/services/<int:patient_service_id>', methods=['PUT'])
@@ -117,3 +117,9 @@ def update_patient_service_status(patient_service_id):
     db.session.commit()
 
     return jsonify({"message": "Service status updated successfully"}), 200
+
+# API để chuyển trạng thái nhiều dịch vụ đã đăng ký cùng lúc (theo danh sách id hoặc bộ lọc patient_id, service_id)
+@bp.route('/services/bulk', methods=['PUT'])
+@token_required
+def update_patient_services_status_bulk():
+    return transition_response(SERVICE_TRANSITIONS)
@@ -0,0 +1,308 @@
+import itertools
+import re
+import unicodedata
+from sqlalchemy import event, select, func, and_, or_
+from sqlalchemy.orm import Session
+from models import db, Patient, Doctor, Medication, SearchToken
+from ledger import old_values
+from serializers import row_serializer
+
+# Độ dài tối đa của một từ khóa trong chỉ mục (từ dài hơn bị cắt, tìm theo tiền tố vẫn đúng)
+TOKEN_MAX_LENGTH = 64
+# Số từ tối đa được dùng trong một câu tìm kiếm
+MAX_QUERY_TERMS = 5
+# Tổ hợp 2 và 3 từ chỉ được lấy trong số các từ đầu tiên của mỗi cột (họ tên, tên thuốc... thường ngắn)
+COMBINATION_MAX_WORDS = 5
+# Các cột chỉ đánh chỉ mục từ đơn (không lưu tổ hợp từ)
+SINGLE_WORD_FIELDS = ('phone', 'email')
+# Số dòng tối đa được đếm khi ước lượng độ phổ biến của một từ
+COUNT_CAP = 500
+
+# Loại đối tượng tìm kiếm -> (model, tên cột khóa chính, các cột được đánh chỉ mục)
+SEARCH_KINDS = {
+    'patients': (Patient, 'patient_id', ('name', 'phone', 'email')),
+    'doctors': (Doctor, 'doctor_id', ('name', 'specialization')),
+    'medications': (Medication, 'medication_id', ('medication_name',)),
+}
+_KIND_OF_MODEL = {model: kind for kind, (model, _, _) in SEARCH_KINDS.items()}
+
+_WORD = re.compile(r'[a-z0-9]+')
+_NON_DIGIT = re.compile(r'\D')
+
+# Hàm chuẩn hóa chuỗi: bỏ dấu tiếng Việt ('Nguyễn Đức' -> 'nguyen duc') và chuyển về chữ thường
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text.replace('đ', 'd').replace('Đ', 'D'))
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+# Hàm tách chuỗi thành các từ khóa đã chuẩn hóa (chỉ gồm chữ cái Latin và chữ số)
+def tokenize(text):
+    if not text:
+        return []
+    return [word[:TOKEN_MAX_LENGTH] for word in _WORD.findall(normalize(text))]
+
+# Tổ hợp từ được lưu với kind riêng ('patients:2', 'patients:3') để không lẫn vào khoảng tìm kiếm của từ đơn
+def combination_kind(kind, size):
+    return kind if size == 1 else f'{kind}:{size}'
+
+# Các từ không nằm trong tổ hợp nào (số điện thoại, email, từ sau COMBINATION_MAX_WORDS từ đầu tiên)
+# được lưu với kind riêng ('patients:s'), nhờ đó biết được khi nào chỉ quét theo tổ hợp là đủ
+def standalone_kind(kind):
+    return f'{kind}:s'
+
+def _token_kinds(kind):
+    return [kind, standalone_kind(kind), combination_kind(kind, 2), combination_kind(kind, 3)]
+
+def _combination(words):
+    return ' '.join(words)[:TOKEN_MAX_LENGTH]
+
+def entity_tokens(kind, values):
+    """
+    Các từ khóa của một đối tượng từ giá trị các cột được đánh chỉ mục (theo thứ tự trong SEARCH_KINDS):
+    tập (kind, từ khóa) gồm các từ đơn và các tổ hợp 2, 3 từ theo thứ tự xuất hiện trong các cột không thuộc
+    SINGLE_WORD_FIELDS ('nguyen van minh' -> 'nguyen van', 'nguyen minh', 'van minh', 'nguyen van minh').
+    Họ, tên đệm và tên đều rất phổ biến nhưng tổ hợp của chúng thì không, nên câu tìm kiếm nhiều từ chỉ phải quét
+    các đối tượng khớp. Các từ không nằm trong tổ hợp nào được lưu với standalone_kind.
+    Số điện thoại được lưu thêm dạng chỉ gồm chữ số để tìm được cả '0912 345 678' lẫn '0912345678',
+    số có mã quốc gia (+84) được lưu thêm dạng số trong nước (0...).
+    """
+    tokens = set()
+    words = []  # các từ của các cột được lưu tổ hợp, theo thứ tự xuất hiện
+    for field, value in zip(SEARCH_KINDS[kind][2], values):
+        if field not in SINGLE_WORD_FIELDS:
+            words += tokenize(value)
+            continue
+        tokens.update((standalone_kind(kind), word) for word in tokenize(value))
+        if field == 'phone' and value:
+            digits = _NON_DIGIT.sub('', value)
+            if digits:
+                tokens.add((standalone_kind(kind), digits[:TOKEN_MAX_LENGTH]))
+            if digits.startswith('84'):
+                tokens.add((standalone_kind(kind), '0' + digits[2:TOKEN_MAX_LENGTH + 1]))
+    words = list(dict.fromkeys(words))
+    combined = words[:COMBINATION_MAX_WORDS]
+    tokens.update((kind, word) for word in combined)
+    tokens.update((standalone_kind(kind), word) for word in words[COMBINATION_MAX_WORDS:])
+    for size in (2, 3):
+        tokens.update((combination_kind(kind, size), _combination(combination))
+                      for combination in itertools.combinations(combined, size))
+    return tokens
+
+def _token_rows(entity_id, tokens):
+    return [{"kind": kind, "token": token, "entity_id": entity_id} for kind, token in tokens]
+
+def _delete_tokens(kind):
+    return SearchToken.__table__.delete().where(SearchToken.kind.in_(_token_kinds(kind)))
+
+# Cập nhật chỉ mục tìm kiếm ngay trong flush (cùng transaction) khi bệnh nhân, bác sĩ hoặc thuốc thay đổi
+@event.listens_for(Session, 'after_flush')
+def _update_search_tokens(session, flush_context):
+    stale = {}  # kind -> id các đối tượng cần xóa từ khóa cũ
+    rows = []
+    for obj in session.new:
+        kind = _KIND_OF_MODEL.get(type(obj))
+        if kind is not None:
+            _, key, fields = SEARCH_KINDS[kind]
+            rows += _token_rows(getattr(obj, key), entity_tokens(kind, [getattr(obj, f) for f in fields]))
+    for obj in session.dirty:
+        kind = _KIND_OF_MODEL.get(type(obj))
+        if kind is not None:
+            _, key, fields = SEARCH_KINDS[kind]
+            new = tuple(getattr(obj, f) for f in fields)
+            if old_values(obj, fields) != new:
+                stale.setdefault(kind, set()).add(getattr(obj, key))
+                rows += _token_rows(getattr(obj, key), entity_tokens(kind, new))
+    for obj in session.deleted:
+        kind = _KIND_OF_MODEL.get(type(obj))
+        if kind is not None:
+            stale.setdefault(kind, set()).add(getattr(obj, SEARCH_KINDS[kind][1]))
+
+    if not stale and not rows:
+        return
+    connection = session.connection()
+    for kind, entity_ids in stale.items():
+        connection.execute(_delete_tokens(kind).where(SearchToken.entity_id.in_(entity_ids)))
+    if rows:
+        connection.execute(SearchToken.__table__.insert(), rows)
+
+# Hàm xây dựng lại chỉ mục tìm kiếm từ các bảng gốc
+def rebuild_search_index(chunk_size=1000):
+    """
+    Xây dựng lại SearchToken theo từng lô 'chunk_size' đối tượng (theo thứ tự khóa chính), mỗi lô một transaction,
+    dùng sau khi dữ liệu được ghi trực tiếp bằng INSERT (không qua ORM session). Trả về số đối tượng theo loại.
+    """
+    report = {}
+    for kind, (model, key, fields) in SEARCH_KINDS.items():
+        id_column = getattr(model, key)
+        columns = [getattr(model, f) for f in fields]
+        report[kind] = 0
+        last_id = None
+        while True:
+            query = select(id_column, *columns).order_by(id_column).limit(chunk_size)
+            if last_id is not None:
+                query = query.where(id_column > last_id)
+            chunk = db.session.execute(query).all()
+
+            # Xóa từ khóa của cả khoảng id (kể cả các đối tượng đã bị xóa) rồi ghi lại
+            delete = _delete_tokens(kind)
+            if last_id is not None:
+                delete = delete.where(SearchToken.entity_id > last_id)
+            if len(chunk) == chunk_size:
+                delete = delete.where(SearchToken.entity_id <= chunk[-1][0])
+            db.session.execute(delete)
+
+            rows = []
+            for entity_id, *values in chunk:
+                rows += _token_rows(entity_id, entity_tokens(kind, values))
+            if rows:
+                db.session.execute(SearchToken.__table__.insert(), rows)
+            db.session.commit()
+
+            report[kind] += len(chunk)
+            if len(chunk) < chunk_size:
+                break
+            last_id = chunk[-1][0]
+    return report
+
+def _next(term):
+    # Chuỗi nhỏ nhất lớn hơn mọi chuỗi bắt đầu bằng 'term'
+    return term[:-1] + chr(ord(term[-1]) + 1)
+
+def _prefix(column, term):
+    # Điều kiện tìm theo tiền tố dạng khoảng [term, term kế tiếp) để database dùng được chỉ mục
+    return and_(column >= term, column < _next(term))
+
+def _match_count(ranges, cap):
+    # Số từ khóa khớp với các khoảng (kind, tiền tố), chỉ đếm tối đa 'cap' dòng
+    matches = select(SearchToken.entity_id).where(or_(*[
+        and_(SearchToken.kind == kind, _prefix(SearchToken.token, prefix)) for kind, prefix in ranges
+    ])).limit(cap)
+    return db.session.execute(select(func.count()).select_from(matches.subquery())).scalar()
+
+def _is_complete_word(kind, term):
+    # Không có tổ hợp nào bắt đầu bằng một từ dài hơn 'term' (từ khóa chỉ gồm [a-z0-9], '0' là ký tự nhỏ nhất),
+    # tức là mọi đối tượng khớp 'term' ở vị trí không phải cuối tổ hợp đều có đúng từ 'term'
+    return db.session.execute(select(SearchToken.token).where(
+        SearchToken.kind == combination_kind(kind, 2), SearchToken.token >= term + '0', SearchToken.token < _next(term)
+    ).limit(1)).first() is None
+
+def _options(kind, terms):
+    """
+    Các cách quét có thể dùng, mỗi cách là danh sách khoảng (kind, tiền tố) chứa mọi đối tượng khớp:
+    - từng từ: khoảng của từ đó trong kind và standalone_kind
+    - 2, 3 từ liền nhau trong câu tìm kiếm: khoảng của mọi hoán vị trong bảng tổ hợp (đối tượng có thể viết các từ
+      theo thứ tự khác) và khoảng của từng từ trong standalone_kind (đối tượng có từ đó ở cột không lưu tổ hợp).
+      Chỉ dùng khi các từ đều là từ hoàn chỉnh: 'thi' là tiền tố của 'thinh' nhưng 'thi hoa' không là tiền tố
+      của 'thinh hoa', nên quét theo tổ hợp sẽ bỏ sót đối tượng.
+    Trả về None nếu có từ không khớp với đối tượng nào.
+    """
+    options = []  # (số dòng khớp, -số từ, -độ dài, các khoảng)
+    complete = {}
+    for size in (1, 2, 3):
+        for i in range(len(terms) - size + 1):
+            words = terms[i:i + size]
+            if size == 1:
+                ranges = [(kind, words[0]), (standalone_kind(kind), words[0])]
+            else:
+                for word in words:
+                    if word not in complete:
+                        complete[word] = _is_complete_word(kind, word)
+                if not all(complete[word] for word in words):
+                    continue
+                ranges = [(combination_kind(kind, size), _combination(order))
+                          for order in itertools.permutations(words)]
+                ranges += [(standalone_kind(kind), word) for word in words]
+            count = _match_count(ranges, COUNT_CAP)
+            if count == 0 and size == 1:
+                return None
+            if count:
+                options.append((count, -size, -len(_combination(words)), ranges))
+    return options
+
+# Hàm tìm id các đối tượng khớp với tất cả các từ trong câu tìm kiếm
+def search_ids(kind, query, limit, max_scan):
+    """
+    Mỗi từ trong 'query' phải khớp với tiền tố của một từ khóa của đối tượng (không phân biệt hoa thường và dấu,
+    không phụ thuộc thứ tự các từ). Cách quét ít dòng nhất (xem _options) được quét theo chỉ mục
+    (kind, token, entity_id) từng lô, mọi từ trong câu tìm kiếm được kiểm tra cho cả lô bằng chỉ mục
+    (kind, entity_id, token). Chỉ quét tối đa 'max_scan' dòng nên thời gian trả lời có giới hạn, kể cả khi rất ít
+    đối tượng khớp đồng thời tất cả các từ (khi đó kết quả có thể thiếu).
+    """
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return []
+    options = _options(kind, terms)
+    if not options:
+        return []
+    ranges = min(options, key=lambda option: option[:3])[3]
+    word_kinds = (kind, standalone_kind(kind))
+
+    # Một đối tượng có thể có nhiều từ khóa cùng tiền tố nên đọc theo lô (keyset) và bỏ id trùng;
+    # lô sau lớn gấp đôi lô trước khi phần lớn id bị loại bởi các từ trong câu tìm kiếm
+    ids = {}
+    scanned = 0
+    batch = max(limit * 2, 50)
+    for driver_kind, driver in ranges:
+        base = select(SearchToken.token, SearchToken.entity_id).where(
+            SearchToken.kind == driver_kind, _prefix(SearchToken.token, driver)
+        ).order_by(SearchToken.token, SearchToken.entity_id)
+        last = None
+        while len(ids) < limit and scanned < max_scan:
+            batch = min(batch, max_scan - scanned)
+            page = base if last is None else base.where(or_(
+                SearchToken.token > last[0], and_(SearchToken.token == last[0], SearchToken.entity_id > last[1])))
+            rows = db.session.execute(page.limit(batch)).all()
+            scanned += len(rows)
+
+            candidates = list(dict.fromkeys(entity_id for _, entity_id in rows if entity_id not in ids))
+            for term in terms:
+                if not candidates:
+                    break
+                matched = set(db.session.execute(select(SearchToken.entity_id).where(
+                    SearchToken.kind.in_(word_kinds), SearchToken.entity_id.in_(candidates),
+                    _prefix(SearchToken.token, term)
+                )).scalars())
+                candidates = [entity_id for entity_id in candidates if entity_id in matched]
+            for entity_id in candidates:
+                ids.setdefault(entity_id, None)
+
+            if len(rows) < batch:
+                break
+            last = rows[-1]
+            batch *= 2
+    return list(ids)[:limit]
+
+# Truy vấn các đối tượng theo danh sách id tìm được
+def patients_by_ids_query(ids):
+    return select(Patient.patient_id, Patient.name, Patient.dob, Patient.gender, Patient.phone, Patient.email) \
+        .where(Patient.patient_id.in_(ids))
+
+serialize_patient_result = row_serializer(patients_by_ids_query([]))
+
+def doctors_by_ids_query(ids):
+    return select(Doctor.doctor_id, Doctor.name, Doctor.specialization, Doctor.phone, Doctor.email) \
+        .where(Doctor.doctor_id.in_(ids))
+
+serialize_doctor_result = row_serializer(doctors_by_ids_query([]))
+
+def medications_by_ids_query(ids):
+    return select(Medication.medication_id, Medication.medication_name, Medication.price) \
+        .where(Medication.medication_id.in_(ids))
+
+serialize_medication_result = row_serializer(medications_by_ids_query([]))
+
+# Loại đối tượng -> (hàm truy vấn theo id, hàm chuyển thành JSON)
+RESULT_QUERIES = {
+    'patients': (patients_by_ids_query, serialize_patient_result),
+    'doctors': (doctors_by_ids_query, serialize_doctor_result),
+    'medications': (medications_by_ids_query, serialize_medication_result),
+}
+
+# Hàm tìm kiếm và trả về kết quả theo thứ tự khớp
+def search(kind, query, limit, max_scan):
+    ids = search_ids(kind, query, limit, max_scan)
+    if not ids:
+        return []
+    by_ids_query, serialize = RESULT_QUERIES[kind]
+    key = SEARCH_KINDS[kind][1]
+    rows = {getattr(row, key): row for row in db.session.execute(by_ids_query(ids))}
+    return [serialize(rows[entity_id]) for entity_id in ids if entity_id in rows]
@@ -0,0 +1,162 @@
+from sqlalchemy import select, Date, DateTime, Numeric
+from models import *
+
+# Các truy vấn dưới đây chỉ lấy những cột cần thiết (projection) và join sẵn bảng liên quan,
+# mỗi API chỉ tốn một câu SQL dù trả về bao nhiêu dòng (không còn lazy load theo từng dòng).
+# Các hàm *_query trả về câu lệnh select(), dùng được cho cả session thường và AsyncSession (asgi.py).
+
+# Hàm kiểm tra bản ghi có tồn tại hay không
+def record_exists(pk_column, value):
+    """
+    Kiểm tra sự tồn tại của bản ghi chỉ bằng cột khóa chính,
+    không nạp toàn bộ đối tượng ORM (ví dụ: Patient.medical_history).
+    """
+    return db.session.execute(exists_query(pk_column, value)).first() is not None
+
+def exists_query(pk_column, value):
+    return select(pk_column).filter(pk_column == value).limit(1)
+
+# Định dạng ngày giờ mặc định của API và cách viết nhanh tương ứng (isoformat nhanh hơn strftime nhiều lần)
+DEFAULT_FORMATS = {DateTime: '%Y-%m-%d %H:%M:%S', Date: '%Y-%m-%d'}
+_FAST_FORMATS = {
+    (DateTime, '%Y-%m-%d %H:%M:%S'): "{}.isoformat(' ', 'seconds')",
+    (DateTime, '%Y-%m-%d %H:%M'): "{}.isoformat(' ', 'minutes')",
+    (Date, '%Y-%m-%d'): "{}.isoformat()",
+}
+
+# Hàm tạo hàm serialize cho các dòng của một câu select()
+def row_serializer(query, exclude=(), rename=None, formats=None):
+    """
+    Sinh (một lần, khi import) hàm chuyển một dòng kết quả của 'query' thành dict, dựa vào tên và kiểu của các cột:
+    Numeric -> float, DateTime/Date -> chuỗi theo DEFAULT_FORMATS hoặc 'formats' ({tên cột: định dạng strftime}).
+    Hàm sinh ra đọc các cột theo vị trí và dựng dict bằng một biểu thức duy nhất, không tra cứu thuộc tính
+    hay kiểu dữ liệu theo từng dòng. 'exclude' là các cột chỉ dùng để phân trang, 'rename' đổi tên khóa trong JSON.
+    """
+    rename = rename or {}
+    formats = formats or {}
+    names, items = [], []
+    for i, column in enumerate(query.selected_columns):
+        if column.key in exclude:
+            names.append('_')
+            continue
+        value = f'c{i}'
+        names.append(value)
+        expression = value
+        if isinstance(column.type, Numeric) and column.type.asdecimal:
+            expression = f'float({value})'
+        else:
+            for type_ in (DateTime, Date):
+                if isinstance(column.type, type_):
+                    fmt = formats.get(column.key, DEFAULT_FORMATS[type_])
+                    fast = _FAST_FORMATS.get((type_, fmt))
+                    expression = fast.format(value) if fast else f'{value}.strftime({fmt!r})'
+                    break
+        if expression != value and getattr(getattr(column, 'element', column), 'nullable', True):
+            expression = f'(None if {value} is None else {expression})'
+        items.append(f'{rename.get(column.key, column.key)!r}: {expression}')
+
+    # Sinh mã thay vì trả về closure lặp qua danh sách (tên, hàm chuyển đổi): với closure, mỗi dòng phải chạy
+    # một vòng lặp Python và một lời gọi hàm cho từng cột; hàm sinh ra chỉ unpack tuple và dựng một dict literal
+    source = f"def serialize(row):\n    {', '.join(names)}, = row\n    return {{{', '.join(items)}}}\n"
+    namespace = {}
+    exec(compile(source, f'<row_serializer {", ".join(c.key for c in query.selected_columns)}>', 'exec'), namespace)
+    return namespace['serialize']
+
+# Lịch hẹn của một bệnh nhân
+def patient_appointments_query(patient_id):
+    return select(
+        Appointment.appointment_id,
+        Appointment.doctor_id,
+        Doctor.name.label('doctor_name'),
+        Appointment.appointment_date,
+        Appointment.status
+    ).join(Doctor, Appointment.doctor_id == Doctor.doctor_id).filter(Appointment.patient_id == patient_id)
+
+serialize_patient_appointment = row_serializer(patient_appointments_query(0), formats={'appointment_date': '%Y-%m-%d %H:%M'})
+
+# Lịch hẹn của một bác sĩ
+def doctor_appointments_query(doctor_id):
+    return select(
+        Appointment.appointment_id,
+        Appointment.patient_id,
+        Patient.name.label('patient_name'),
+        Appointment.appointment_date,
+        Appointment.status
+    ).join(Patient, Appointment.patient_id == Patient.patient_id).filter(Appointment.doctor_id == doctor_id)
+
+serialize_doctor_appointment = row_serializer(doctor_appointments_query(0), formats={'appointment_date': '%Y-%m-%d %H:%M'})
+
+# Thanh toán của một bệnh nhân
+def patient_payments_query(patient_id):
+    return select(
+        Payment.payment_id,
+        Payment.amount,
+        Payment.payment_date,
+        Payment.description,
+        Payment.status
+    ).filter(Payment.patient_id == patient_id)
+
+serialize_patient_payment = row_serializer(patient_payments_query(0))
+
+# Chi tiết một thanh toán
+def payment_detail_query(payment_id):
+    return select(
+        Payment.payment_id,
+        Payment.patient_id,
+        Patient.name.label('patient_name'),
+        Payment.amount,
+        Payment.payment_date,
+        Payment.description,
+        Payment.status
+    ).join(Patient, Payment.patient_id == Patient.patient_id).filter(Payment.payment_id == payment_id)
+
+serialize_payment_detail = row_serializer(payment_detail_query(0))
+
+# Đơn thuốc của một bệnh nhân
+def patient_prescriptions_query(patient_id):
+    return select(
+        Prescription.prescription_id,
+        Medication.medication_name,
+        Prescription.dosage,
+        Prescription.quantity
+    ).join(Medication, Prescription.medication_id == Medication.medication_id).filter(Prescription.patient_id == patient_id)
+
+serialize_patient_prescription = row_serializer(patient_prescriptions_query(0))
+
+# Chi tiết một đơn thuốc
+def prescription_detail_query(prescription_id):
+    return select(
+        Prescription.prescription_id,
+        Prescription.patient_id,
+        Patient.name.label('patient_name'),
+        Prescription.medication_id,
+        Medication.medication_name,
+        Prescription.dosage,
+        Prescription.quantity
+    ).join(Patient, Prescription.patient_id == Patient.patient_id) \
+     .join(Medication, Prescription.medication_id == Medication.medication_id) \
+     .filter(Prescription.prescription_id == prescription_id)
+
+serialize_prescription_detail = row_serializer(prescription_detail_query(0))
+
+# Dịch vụ mà một bệnh nhân đã đăng ký
+def patient_services_query(patient_id):
+    return select(
+        PatientService.id,
+        PatientService.service_id,
+        MedicalService.service_name,
+        PatientService.status
+    ).join(MedicalService, PatientService.service_id == MedicalService.service_id).filter(PatientService.patient_id == patient_id)
+
+serialize_patient_service = row_serializer(patient_services_query(0), exclude=('id',))
+
+# Gói bảo hiểm mà một bệnh nhân đã đăng ký
+def patient_insurances_query(patient_id):
+    return select(
+        PatientInsurance.id,
+        PatientInsurance.insurance_id,
+        InsuranceService.insurance_name,
+        PatientInsurance.status
+    ).join(InsuranceService, PatientInsurance.insurance_id == InsuranceService.insurance_id).filter(PatientInsurance.patient_id == patient_id)
+
+serialize_patient_insurance = row_serializer(patient_insurances_query(0), exclude=('id',))
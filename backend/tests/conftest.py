@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, shutdown_app
+from models import db
+from utils import generate_token
+
+# Cấu hình chung của các test: database SQLite dạng tệp (dùng được từ nhiều thread/kết nối)
+def make_app(db_path, **config):
+    return create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'SECRET_KEY': 'test-secret-key-with-at-least-32-bytes',
+        'RATE_LIMIT_ENABLED': False,
+        'TESTING': True,
+        **config
+    })
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path / 'test.db')
+    with app.app_context():
+        db.create_all()
+    yield app
+    shutdown_app(app)
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def auth_headers(app):
+    with app.app_context():
+        return {'Authorization': 'Bearer ' + generate_token(1, 'Admin')}
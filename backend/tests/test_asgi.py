@@ -0,0 +1,113 @@
+import asyncio
+import json
+from datetime import date
+import pytest
+from a2wsgi import WSGIMiddleware
+from models import db, Patient, Doctor
+from async_api import AsyncAPI, ASYNC_LISTINGS, ASYNC_DETAILS
+from test_query_counts import add_rows
+
+# Mỗi API của AsyncAPI (và một số request được chuyển cho ứng dụng Flask): phản hồi phải giống hệt chế độ WSGI
+REQUESTS = [
+    ('/api/appointments/patient/1', 'limit=2'),
+    ('/api/appointments/doctor/1', 'limit=2'),
+    ('/api/payments/patient/1', 'limit=2'),
+    ('/api/prescriptions/patient/1', 'limit=2'),
+    ('/api/services/patient/1', 'limit=2'),
+    ('/api/insurance/patient/1', 'limit=2'),
+    ('/api/payments/1', ''),
+    ('/api/prescriptions/1', ''),
+    ('/api/patients/1/overview', 'appointments_limit=1'),
+    # Không có limit/cursor: toàn bộ danh sách
+    ('/api/appointments/patient/1', ''),
+    # Lỗi: không tìm thấy, cursor không hợp lệ
+    ('/api/appointments/patient/99', ''),
+    ('/api/payments/99', ''),
+    ('/api/payments/patient/1', 'cursor=abc'),
+    ('/api/patients/99/overview', ''),
+    # Chuyển cho ứng dụng Flask (a2wsgi): danh mục, NDJSON
+    ('/api/services', ''),
+    ('/api/appointments/patient/1', 'format=ndjson'),
+]
+
+@pytest.fixture
+def seeded(app):
+    with app.app_context():
+        db.session.add(Patient(patient_id=1, name='Nguyễn Văn An', dob=date(1990, 1, 1), gender='Male', phone='0',
+                               email='a@x'))
+        db.session.add(Doctor(doctor_id=1, name='Trần Thị Bình', specialization='Nội khoa', phone='0', email='d@x'))
+        add_rows(1, 3)
+    return app
+
+async def asgi_get(api, path, query='', headers=None):
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+        'headers': [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 50000),
+    }
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Event().wait()
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await api(scope, receive, send)
+    # Header lặp lại (ví dụ: hai header Vary) được gộp như trong HTTP
+    response_headers = {}
+    for name, value in messages[0]['headers']:
+        name, value = name.decode(), value.decode()
+        response_headers[name] = f'{response_headers[name]}, {value}' if name in response_headers else value
+    return messages[0]['status'], response_headers, b''.join(message.get('body', b'') for message in messages[1:])
+
+def run(api, requests):
+    async def main():
+        try:
+            return [await asgi_get(api, *request) for request in requests]
+        finally:
+            await api.flask_app.extensions['async_engine'].dispose()
+    return asyncio.run(main())
+
+def test_every_async_endpoint_is_covered():
+    paths = {path for path, _ in REQUESTS}
+    for name, (path, *_) in {**ASYNC_LISTINGS, **ASYNC_DETAILS}.items():
+        assert path.replace('<int:owner_id>', '1').replace('<int:record_id>', '1') in paths, name
+
+def test_asgi_responses_match_flask(seeded, auth_headers):
+    client = seeded.test_client()
+    api = AsyncAPI(seeded, WSGIMiddleware(seeded, workers=2))
+    headers = {**auth_headers, 'Origin': 'http://localhost:3000'}
+    responses = run(api, [(path, query, headers) for path, query in REQUESTS])
+
+    for (path, query), (status, response_headers, body) in zip(REQUESTS, responses):
+        expected = client.get(path, query_string=query, headers=headers)
+        assert status == expected.status_code, (path, query)
+        if response_headers['content-type'] == 'application/json':
+            assert json.loads(body) == expected.get_json(), (path, query)
+        else:
+            assert body == expected.get_data(), (path, query)
+        for name in ('X-Next-Cursor', 'Access-Control-Allow-Origin', 'Access-Control-Expose-Headers'):
+            assert response_headers.get(name.lower()) == expected.headers.get(name), (path, query, name)
+        vary = {value.strip() for value in response_headers.get('vary', '').split(',') if value.strip()}
+        assert vary == {value.strip() for value in ','.join(expected.headers.getlist('Vary')).split(',') if value.strip()}, \
+            (path, query)
+
+def test_asgi_exposes_the_same_cors_headers_as_flask(seeded, auth_headers):
+    api = AsyncAPI(seeded, WSGIMiddleware(seeded, workers=2))
+    [(status, headers, _)] = run(api, [('/api/payments/1', '', {**auth_headers, 'Origin': 'http://localhost:3000'})])
+    assert status == 200
+    assert set(headers['access-control-expose-headers'].split(', ')) == {'X-Next-Cursor', 'X-Last-Write'}
+
+def test_asgi_requires_token(seeded):
+    api = AsyncAPI(seeded, WSGIMiddleware(seeded, workers=2))
+    [(status, _, body)] = run(api, [('/api/payments/1', '', {})])
+    assert status == 401
+    assert seeded.test_client().get('/api/payments/1').get_json() == json.loads(body)
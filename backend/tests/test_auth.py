@@ -0,0 +1,102 @@
+import threading
+import pytest
+from app import shutdown_app
+from models import db, User
+from utils import HashingPool, HashingPoolBusy
+from conftest import make_app
+
+@pytest.fixture
+def auth_app(tmp_path):
+    # Số vòng lặp PBKDF2 nhỏ để test chạy nhanh
+    app = make_app(tmp_path / 'test.db', PASSWORD_HASH_ITERATIONS=1000, PASSWORD_HASH_WORKERS=1,
+                   PASSWORD_HASH_QUEUE_DEPTH=0)
+    with app.app_context():
+        db.create_all()
+    yield app
+    shutdown_app(app)
+
+def signup_and_login(client, password='secret'):
+    assert client.post('/api/signup', json={'username': 'an', 'password': password, 'role': 'Admin'}).status_code == 201
+    return client.post('/api/login', json={'username': 'an', 'password': password})
+
+def stored_hash(app):
+    with app.app_context():
+        return db.session.execute(db.select(User.password)).scalar_one()
+
+def test_signup_and_login_use_configured_cost(auth_app):
+    client = auth_app.test_client()
+    response = signup_and_login(client)
+    assert response.status_code == 200
+    assert response.get_json()['token']
+    assert stored_hash(auth_app).startswith('pbkdf2:sha256:1000$')
+    assert client.post('/api/login', json={'username': 'an', 'password': 'wrong'}).status_code == 401
+
+def test_login_rehashes_password_with_old_cost(auth_app):
+    client = auth_app.test_client()
+    signup_and_login(client)
+    auth_app.config['PASSWORD_HASH_ITERATIONS'] = 2000
+    # Mật khẩu sai không làm thay đổi hash đã lưu
+    assert client.post('/api/login', json={'username': 'an', 'password': 'wrong'}).status_code == 401
+    assert stored_hash(auth_app).startswith('pbkdf2:sha256:1000$')
+    assert client.post('/api/login', json={'username': 'an', 'password': 'secret'}).status_code == 200
+    assert stored_hash(auth_app).startswith('pbkdf2:sha256:2000$')
+    assert client.post('/api/login', json={'username': 'an', 'password': 'secret'}).status_code == 200
+
+def occupy(pool):
+    # Chiếm worker duy nhất của pool cho đến khi 'release' được set
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    def run():
+        try:
+            pool.run(block)
+        except HashingPoolBusy:
+            pass  # Pool có timeout ngắn: bên gọi bỏ cuộc nhưng worker vẫn bận
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert started.wait(5)
+    return release, thread
+
+def test_pool_rejects_work_when_full():
+    pool = HashingPool(workers=1, queue_depth=0, timeout=5)
+    release, thread = occupy(pool)
+    try:
+        with pytest.raises(HashingPoolBusy):
+            pool.run(lambda: None)
+    finally:
+        release.set()
+        thread.join()
+    # Chỗ được trả lại khi tác vụ kết thúc
+    assert pool.run(lambda: 42) == 42
+    pool.shutdown()
+
+def test_pool_gives_up_after_timeout():
+    pool = HashingPool(workers=1, queue_depth=1, timeout=0.05)
+    release, thread = occupy(pool)
+    try:
+        with pytest.raises(HashingPoolBusy):
+            pool.run(lambda: None)
+    finally:
+        release.set()
+        thread.join()
+    pool.shutdown()
+
+def test_login_returns_503_when_pool_is_busy(auth_app):
+    client = auth_app.test_client()
+    signup_and_login(client)
+    release, thread = occupy(auth_app.extensions['hashing_pool'])
+    try:
+        for path, body in (('/api/login', {'username': 'an', 'password': 'secret'}),
+                           ('/api/signup', {'username': 'binh', 'password': 'secret', 'role': 'Admin'})):
+            response = client.post(path, json=body)
+            assert response.status_code == 503
+            assert response.headers['Retry-After'] == '1'
+    finally:
+        release.set()
+        thread.join()
+    with auth_app.app_context():
+        assert db.session.execute(db.select(User.username)).scalars().all() == ['an']
@@ -0,0 +1,103 @@
+import threading
+from datetime import date, datetime
+import availability
+from models import db, Patient, Doctor, Appointment
+
+def seed():
+    db.session.add(Patient(patient_id=1, name='Nguyễn Văn An', dob=date(1990, 1, 1), gender='Male', phone='0', email='a@x'))
+    db.session.add(Doctor(doctor_id=1, name='Trần Thị Bình', specialization='Nội khoa', phone='0', email='d@x'))
+    db.session.commit()
+
+def free_slots(client, auth_headers):
+    response = client.get('/api/availability', query_string={
+        'doctor_id': 1, 'start': '2030-01-07 08:00', 'end': '2030-01-07 10:00'
+    }, headers=auth_headers)
+    assert response.status_code == 200
+    return [slot['slot_start'] for slot in response.get_json()]
+
+def book(client, auth_headers, when):
+    return client.post('/api/appointments', json={'patient_id': 1, 'doctor_id': 1, 'appointment_date': when},
+                       headers=auth_headers).status_code
+
+def test_completed_appointments_keep_their_slot(app, client, auth_headers):
+    with app.app_context():
+        seed()
+    assert book(client, auth_headers, '2030-01-07 08:30') == 201
+    assert book(client, auth_headers, '2030-01-07 09:00') == 201
+    assert free_slots(client, auth_headers) == ['2030-01-07 08:00', '2030-01-07 09:30']
+
+    # Hoàn thành: slot vẫn bị chiếm (đặt lại trả về 409 nên không được hiện là trống)
+    response = client.put('/api/appointments/bulk', json={'status': 'Completed', 'ids': [1]}, headers=auth_headers)
+    assert response.get_json()['updated'] == 1
+    assert free_slots(client, auth_headers) == ['2030-01-07 08:00', '2030-01-07 09:30']
+    assert book(client, auth_headers, '2030-01-07 08:30') == 409
+
+    # Hủy: slot được giải phóng
+    response = client.put('/api/appointments/bulk', json={'status': 'Canceled', 'ids': [2]}, headers=auth_headers)
+    assert response.get_json()['updated'] == 1
+    assert free_slots(client, auth_headers) == ['2030-01-07 08:00', '2030-01-07 09:00', '2030-01-07 09:30']
+
+def expire(app):
+    with app.app_context():
+        index = app.extensions['availability_index']
+        index.loaded_at -= app.config['AVAILABILITY_INDEX_TTL'] + 1
+        return index
+
+def test_index_is_rebuilt_after_ttl(app, client, auth_headers):
+    assert app.config['AVAILABILITY_INDEX_TTL'] > 0
+    with app.app_context():
+        seed()
+    assert free_slots(client, auth_headers) == ['2030-01-07 08:00', '2030-01-07 08:30', '2030-01-07 09:00',
+                                                '2030-01-07 09:30']
+
+    # Lịch hẹn được thêm bởi tiến trình khác (không qua chỉ mục của tiến trình này)
+    with app.app_context():
+        db.session.execute(Appointment.__table__.insert(), {
+            'patient_id': 1, 'doctor_id': 1, 'appointment_date': datetime(2030, 1, 7, 8, 0),
+            'slot_start': datetime(2030, 1, 7, 8, 0), 'status': 'Completed'
+        })
+        db.session.commit()
+    expire(app)
+    assert free_slots(client, auth_headers) == ['2030-01-07 08:30', '2030-01-07 09:00', '2030-01-07 09:30']
+
+def test_rebuild_loads_only_current_slots(app, client, auth_headers):
+    with app.app_context():
+        seed()
+        db.session.execute(Appointment.__table__.insert(), [
+            {'patient_id': 1, 'doctor_id': 1, 'appointment_date': when, 'slot_start': when, 'status': 'Completed'}
+            for when in (datetime(2020, 1, 6, 8, 0), datetime(2030, 1, 7, 9, 0))
+        ])
+        db.session.commit()
+    assert free_slots(client, auth_headers) == ['2030-01-07 08:00', '2030-01-07 08:30', '2030-01-07 09:30']
+    with app.app_context():
+        index = app.extensions['availability_index']
+        assert index.doctors[1].starts == [datetime(2030, 1, 7, 9, 0)]
+        # Không trả về slot trống trong quá khứ (các slot đó không được nạp vào chỉ mục)
+        assert index.earliest_free(datetime(2020, 1, 6, 8, 0), datetime(2030, 1, 8), 1)[0][0] >= index.since
+
+def test_commits_during_rebuild_are_not_blocked_or_lost(app, client, auth_headers, monkeypatch):
+    with app.app_context():
+        seed()
+    assert book(client, auth_headers, '2030-01-07 08:00') == 201
+    assert free_slots(client, auth_headers) == ['2030-01-07 08:30', '2030-01-07 09:00', '2030-01-07 09:30']
+    old = expire(app)
+
+    # Trong lúc chỉ mục mới được xây dựng (sau khi đã đọc database), một request khác đặt lịch và commit:
+    # commit không phải chờ lock của chỉ mục cũ, và thay đổi được áp dụng lại vào chỉ mục mới
+    load = availability.AvailabilityIndex.load
+    statuses = []
+
+    def load_with_concurrent_booking(index, doctors, bookings):
+        thread = threading.Thread(target=lambda: statuses.append(book(app.test_client(), auth_headers,
+                                                                       '2030-01-07 09:00')))
+        thread.start()
+        thread.join(timeout=10)
+        assert not thread.is_alive()
+        load(index, doctors, bookings)
+
+    monkeypatch.setattr(availability.AvailabilityIndex, 'load', load_with_concurrent_booking)
+    assert free_slots(client, auth_headers) == ['2030-01-07 08:30', '2030-01-07 09:30']
+    assert statuses == [201]
+    with app.app_context():
+        assert app.extensions['availability_index'] is not old
+        assert old.replaced_by is app.extensions['availability_index']
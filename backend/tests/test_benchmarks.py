@@ -0,0 +1,92 @@
+import json
+import os
+import random
+import subprocess
+import sys
+from datetime import date, datetime
+import pytest
+from sqlalchemy import create_engine, select
+from models import db, User
+from benchmarks.generate_data import appointments
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_script(name, db_path, *args):
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}', SECRET_KEY='test-secret-key-with-at-least-32-bytes',
+               RATE_LIMIT_ENABLED='false', PASSWORD_HASH_ITERATIONS='1000')
+    return subprocess.run([sys.executable, os.path.join(BACKEND_DIR, 'benchmarks', name), *map(str, args)],
+                          cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+
+def generate(tmp_path, name, seed=7):
+    result = run_script('generate_data.py', tmp_path / f'{name}.db', '--patients', 20, '--history-days', 30,
+                        '--future-days', 10, '--seed', seed, '--manifest', tmp_path / f'{name}.json')
+    assert result.returncode == 0, result.stderr
+    with open(tmp_path / f'{name}.json') as f:
+        return f'sqlite:///{tmp_path / f"{name}.db"}', json.load(f)
+
+def dump(url):
+    # Toàn bộ dữ liệu của database, trừ mật khẩu đã mã hóa (có salt ngẫu nhiên) và thời điểm tính lại sổ cái
+    engine = create_engine(url)
+    with engine.connect() as connection:
+        tables = {
+            table.name: connection.execute(
+                select(*(column for column in table.columns if column.name != 'updated_at'))
+                .order_by(*table.primary_key.columns)
+            ).all()
+            for table in db.metadata.sorted_tables if table.name != User.__tablename__
+        }
+    engine.dispose()
+    return tables
+
+@pytest.fixture(scope='module')
+def dataset(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp('bench')
+    return tmp_path, *generate(tmp_path, 'dataset')
+
+def test_same_seed_generates_same_data(tmp_path, dataset):
+    _, url, manifest = dataset
+    other_url, other_manifest = generate(tmp_path, 'again')
+    assert other_manifest['counts'] == manifest['counts']
+    tables = dump(url)
+    assert tables == dump(other_url)
+    for name, table in (('patients', 'Patient'), ('appointments', 'Appointment'), ('payments', 'Payment'),
+                        ('patient_services', 'PatientService')):
+        assert len(tables[table]) == manifest['counts'][name], name
+    # Bảng tổng hợp và chỉ mục tìm kiếm đã được tính lại
+    assert tables['PatientBalance'] and tables['RevenueDaily'] and tables['SearchToken']
+
+def test_appointments_never_share_a_slot():
+    rows = list(appointments(random.Random(1), 2000, 100, 5, 2.0, datetime(2030, 1, 1), 60, 30, 8, 17,
+                             date(2030, 2, 1)))
+    assert len(rows) == 2000
+    assert len({(row['doctor_id'], row['slot_start']) for row in rows}) == 2000
+    # Phân phối lệch: bác sĩ 1 có nhiều lịch hẹn nhất
+    per_doctor = [sum(row['doctor_id'] == i for row in rows) for i in range(1, 6)]
+    assert per_doctor[0] == max(per_doctor)
+    assert all(row['status'] != 'Scheduled' for row in rows if row['slot_start'].date() < date(2030, 2, 1))
+
+# API nội bộ (giám sát) không cần đo
+INTERNAL_ENDPOINTS = {'static', 'metrics', 'db_pool_health'}
+
+def test_bench_api_covers_every_route_and_detects_regressions(app, dataset):
+    tmp_path, url, _ = dataset
+    db_path = url[len('sqlite:///'):]
+    manifest = tmp_path / 'dataset.json'
+    result = run_script('bench_api.py', db_path, '--manifest', manifest, '--requests', 3, '--auth-requests', 1,
+                        '--warmup', 0, '--output', tmp_path / 'first.json')
+    assert result.returncode == 0, result.stderr
+    with open(tmp_path / 'first.json') as f:
+        first = json.load(f)
+    assert set(first['routes']) == {rule.endpoint for rule in app.url_map.iter_rules()} - INTERNAL_ENDPOINTS
+    assert {name: route['errors'] for name, route in first['routes'].items() if route['errors']} == {}
+
+    # Kết quả trước "nhanh hơn" nhiều lần ở một API: --compare báo hồi quy và thoát với mã lỗi
+    baseline = first['routes']['services.get_all_services']
+    baseline.update(p50_ms=baseline['p50_ms'] / 100, p95_ms=baseline['p95_ms'] / 100)
+    with open(tmp_path / 'baseline.json', 'w') as f:
+        json.dump(first, f)
+    result = run_script('bench_api.py', db_path, '--manifest', manifest, '--requests', 3, '--warmup', 0,
+                        '--only', 'services.get_all_services', '--output', tmp_path / 'second.json',
+                        '--compare', tmp_path / 'baseline.json')
+    assert result.returncode == 1
+    assert 'services.get_all_services' in result.stdout.splitlines()[-1]
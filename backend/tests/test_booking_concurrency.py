@@ -0,0 +1,35 @@
+import threading
+from datetime import date
+from models import db, Patient, Doctor, Appointment
+
+THREADS = 16
+
+def test_concurrent_bookings_of_one_slot(app, auth_headers):
+    with app.app_context():
+        db.session.add_all(Patient(patient_id=i, name=f'Bệnh nhân {i}', dob=date(1990, 1, 1), gender='Male',
+                                   phone='0', email=f'p{i}@x') for i in range(1, THREADS + 1))
+        db.session.add(Doctor(doctor_id=1, name='Trần Thị Bình', specialization='Nội khoa', phone='0', email='d@x'))
+        db.session.commit()
+
+    # Mọi thread gửi request cùng lúc (mỗi thread một client và một kết nối database riêng)
+    barrier = threading.Barrier(THREADS)
+    statuses = []
+
+    def book(patient_id):
+        client = app.test_client()
+        barrier.wait()
+        # Cùng một slot 30 phút, thời điểm trong slot khác nhau
+        response = client.post('/api/appointments', json={
+            'patient_id': patient_id, 'doctor_id': 1, 'appointment_date': f'2030-01-07 09:{patient_id % 30:02d}'
+        }, headers=auth_headers)
+        statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=book, args=(i,)) for i in range(1, THREADS + 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(statuses) == [201] + [409] * (THREADS - 1)
+    with app.app_context():
+        assert db.session.query(Appointment).count() == 1
@@ -0,0 +1,89 @@
+import json
+from datetime import date, datetime
+import pytest
+from models import db, Patient, Doctor, Appointment
+
+SLOT_TAKEN = "Doctor already has an appointment in this time slot"
+
+@pytest.fixture
+def seeded(app):
+    app.config['BULK_CHUNK_SIZE'] = 2
+    with app.app_context():
+        db.session.add(Patient(patient_id=1, name='Nguyễn Văn An', dob=date(1990, 1, 1), gender='Male', phone='0',
+                               email='a@x'))
+        db.session.add_all(Doctor(doctor_id=i, name=f'Bác sĩ {i}', specialization='Nội khoa', phone='0', email='d@x')
+                           for i in (1, 2))
+        db.session.add(Appointment(patient_id=1, doctor_id=2, appointment_date=datetime(2030, 1, 1, 9, 0),
+                                   slot_start=datetime(2030, 1, 1, 9, 0), status='Scheduled'))
+        db.session.commit()
+    return app
+
+def item(doctor_id=1, when='2030-01-01 08:00', patient_id=1):
+    return {'patient_id': patient_id, 'doctor_id': doctor_id, 'appointment_date': when}
+
+def bookings(app):
+    with app.app_context():
+        return db.session.execute(
+            db.select(Appointment.doctor_id, Appointment.slot_start).order_by(Appointment.appointment_id)
+        ).all()
+
+def test_bulk_reports_each_invalid_item(seeded, client, auth_headers):
+    items = [
+        item(),
+        'not an object',
+        {'patient_id': 1, 'doctor_id': 1},
+        item(patient_id='x'),
+        item(when='01/01/2030 08:00'),
+        item(patient_id=99),
+        item(doctor_id=99),
+        # Cùng slot 30 phút với phần tử 0
+        item(when='2030-01-01 08:15'),
+        # Slot đã được đặt trong database
+        item(doctor_id=2, when='2030-01-01 09:10'),
+        item(doctor_id=2, when='2030-01-01 09:30'),
+    ]
+    response = client.post('/api/appointments/bulk', json=items, headers=auth_headers)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['created'], body['failed']) == (2, 8)
+    assert [(result['index'], result['status'], result['message']) for result in body['results']] == [
+        (0, 201, "Appointment scheduled successfully"),
+        (1, 400, "Invalid item"),
+        (2, 400, "Missing required fields"),
+        (3, 400, "Invalid patient_id or doctor_id"),
+        (4, 400, "Invalid date format. Use YYYY-MM-DD HH:MM"),
+        (5, 404, "Patient not found"),
+        (6, 404, "Doctor not found"),
+        (7, 409, SLOT_TAKEN),
+        (8, 409, SLOT_TAKEN),
+        (9, 201, "Appointment scheduled successfully"),
+    ]
+    assert bookings(seeded) == [
+        (2, datetime(2030, 1, 1, 9, 0)),
+        (1, datetime(2030, 1, 1, 8, 0)),
+        (2, datetime(2030, 1, 1, 9, 30)),
+    ]
+
+def test_bulk_accepts_ndjson(seeded, client, auth_headers):
+    body = '\n'.join(json.dumps(item(when=f'2030-01-02 {hour:02d}:00')) for hour in (8, 9, 10)) + '\n\n'
+    response = client.post('/api/appointments/bulk', data=body, content_type='application/x-ndjson',
+                           headers=auth_headers)
+    assert response.get_json()['created'] == 3
+    assert len(bookings(seeded)) == 4
+
+@pytest.mark.parametrize('kwargs, message', [
+    ({'json': {'patient_id': 1}}, "Expected a JSON array of items"),
+    ({'data': 'not json', 'content_type': 'application/json'}, "Expected a JSON array of items"),
+    ({'data': '{"patient_id": 1}\n{oops}\n', 'content_type': 'application/x-ndjson'}, "Invalid JSON on line 2"),
+    ({'json': [item()] * 4}, "Too many items (max 3)"),
+])
+def test_bulk_rejects_invalid_requests(seeded, client, auth_headers, kwargs, message):
+    seeded.config['BULK_MAX_ITEMS'] = 3
+    response = client.post('/api/appointments/bulk', headers=auth_headers, **kwargs)
+    assert response.status_code == 400
+    assert response.get_json() == {'message': message}
+    # Không có lịch hẹn nào được tạo
+    assert len(bookings(seeded)) == 1
+
+def test_bulk_requires_token(seeded, client):
+    assert client.post('/api/appointments/bulk', json=[item()]).status_code == 401
@@ -0,0 +1,52 @@
+from decimal import Decimal
+from cache import CatalogCache
+from models import db, MedicalService
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_catalog_reloads_changes_made_outside_the_process(app, client):
+    clock = FakeClock()
+    app.extensions['catalog_cache'] = CatalogCache(app.config['CATALOG_CACHE_TTL'], clock=clock)
+    with app.app_context():
+        db.session.add(MedicalService(service_id=1, service_name='Khám tổng quát', price=Decimal('150000')))
+        db.session.commit()
+    first = client.get('/api/services')
+    assert first.get_json()[0]['price'] == 150000
+
+    # Thay đổi bằng SQL trực tiếp (như worker khác, CLI hoặc migration): không đi qua ORM session của tiến trình này
+    with app.app_context():
+        db.session.execute(MedicalService.__table__.update().values(price=Decimal('200000')))
+        db.session.commit()
+    assert client.get('/api/services').get_json()[0]['price'] == 150000
+
+    clock.now += app.config['CATALOG_CACHE_TTL'] + 1
+    second = client.get('/api/services', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.get_json()[0]['price'] == 200000
+
+def test_catalog_changes_through_orm_are_visible_immediately(app, client):
+    with app.app_context():
+        db.session.add(MedicalService(service_id=1, service_name='Khám tổng quát', price=Decimal('150000')))
+        db.session.commit()
+    etag = client.get('/api/services').headers['ETag']
+    assert client.get('/api/services', headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        db.session.get(MedicalService, 1).price = Decimal('180000')
+        db.session.commit()
+    assert client.get('/api/services', headers={'If-None-Match': etag}).get_json()[0]['price'] == 180000
+
+def test_expired_catalog_with_unchanged_data_keeps_its_etag(app, client):
+    clock = FakeClock()
+    app.extensions['catalog_cache'] = CatalogCache(app.config['CATALOG_CACHE_TTL'], clock=clock)
+    with app.app_context():
+        db.session.add(MedicalService(service_id=1, service_name='Khám tổng quát', price=Decimal('150000')))
+        db.session.commit()
+    etag = client.get('/api/services').headers['ETag']
+    clock.now += app.config['CATALOG_CACHE_TTL'] + 1
+    assert client.get('/api/services', headers={'If-None-Match': etag}).status_code == 304
@@ -0,0 +1,117 @@
+import gzip
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import brotli
+import pytest
+from compression import Compression
+from models import db, Patient, Payment, MedicalService
+
+def decode(response):
+    # Giải nén body theo Content-Encoding của phản hồi
+    data = response.get_data()
+    encoding = response.headers.get('Content-Encoding')
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    if encoding == 'br':
+        return brotli.decompress(data)
+    assert encoding is None
+    return data
+
+def vary(response):
+    return {value.strip() for value in ','.join(response.headers.getlist('Vary')).split(',') if value.strip()}
+
+@pytest.mark.parametrize('accept_encoding, size, expected', [
+    ('gzip', 2000, 'gzip'),
+    ('gzip, deflate, br', 2000, 'br'),
+    ('br;q=0.5, gzip', 2000, 'gzip'),
+    ('gzip;q=0, br', 2000, 'br'),
+    ('*', 2000, 'br'),
+    ('identity', 2000, None),
+    ('deflate', 2000, None),
+    (None, 2000, None),
+    # Nhỏ hơn min_size: không nén
+    ('gzip, br', 1023, None),
+])
+def test_negotiate(accept_encoding, size, expected):
+    compression = Compression(True, 1024, {'br': 4, 'gzip': 6}, ['application/json'], 16384)
+    assert compression.negotiate(accept_encoding, size) == expected
+    assert Compression(False, 1024, {'br': 4, 'gzip': 6}, ['application/json'], 16384) \
+        .negotiate(accept_encoding, size) is None
+
+@pytest.fixture
+def payments(app):
+    with app.app_context():
+        db.session.add(Patient(patient_id=1, name='Nguyễn Văn An', dob=date(1990, 1, 1), gender='Male', phone='0',
+                               email='a@x'))
+        db.session.add(Patient(patient_id=2, name='Trần Thị Bình', dob=date(1990, 1, 1), gender='Female', phone='0',
+                               email='b@x'))
+        db.session.execute(Payment.__table__.insert(), [
+            {'patient_id': 1, 'amount': Decimal('150000.50'), 'payment_date': datetime(2030, 1, 1) + timedelta(hours=i),
+             'description': 'Viện phí', 'status': 'Paid'} for i in range(200)
+        ])
+        db.session.execute(Payment.__table__.insert(), {'patient_id': 2, 'amount': 1, 'status': 'Paid',
+                                                        'payment_date': datetime(2030, 1, 1), 'description': '-'})
+        db.session.commit()
+
+@pytest.mark.parametrize('encoding', ['gzip', 'br'])
+def test_large_json_is_compressed(client, auth_headers, payments, encoding):
+    plain = client.get('/api/payments/patient/1', headers=auth_headers)
+    assert 'Content-Encoding' not in plain.headers
+    response = client.get('/api/payments/patient/1', headers={**auth_headers, 'Accept-Encoding': encoding})
+    assert response.headers['Content-Encoding'] == encoding
+    assert 'Accept-Encoding' in vary(response) and 'Accept-Encoding' in vary(plain)
+    assert len(response.get_data()) < len(plain.get_data()) / 5
+    assert json.loads(decode(response)) == plain.get_json()
+
+def test_small_responses_are_not_compressed(client, auth_headers, payments):
+    response = client.get('/api/payments/patient/2', headers={**auth_headers, 'Accept-Encoding': 'gzip, br'})
+    assert len(response.get_data()) < 1024
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in vary(response)
+    assert response.get_json()[0]['amount'] == 1
+
+def test_ndjson_stream_is_compressed_in_parts(app, client, auth_headers, payments):
+    app.extensions['compression'].stream_flush_size = 1024
+    plain = client.get('/api/payments/patient/1?format=ndjson', headers=auth_headers)
+    response = client.get('/api/payments/patient/1?format=ndjson', headers={**auth_headers, 'Accept-Encoding': 'gzip'},
+                          buffered=False)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    # Mỗi phần đã nén giải nén được ngay (Z_SYNC_FLUSH), không phải chờ hết stream
+    decompressor, parts = gzip.zlib.decompressobj(31), []
+    for chunk in response.response:
+        if chunk:
+            parts.append(decompressor.decompress(chunk))
+    response.close()
+    assert sum(1 for part in parts if part) > 1
+    assert b''.join(parts) == plain.get_data()
+
+def test_catalog_is_compressed_once_with_its_own_etag(app, client):
+    with app.app_context():
+        db.session.add_all(MedicalService(service_id=i, service_name=f'Dịch vụ khám chữa bệnh số {i}',
+                                          price=Decimal('150000')) for i in range(1, 60))
+        db.session.commit()
+    plain = client.get('/api/services')
+    response = client.get('/api/services', headers={'Accept-Encoding': 'br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert response.headers['ETag'] == plain.headers['ETag'][:-1] + '-br"'
+    assert decode(response) == plain.get_data()
+
+    again = client.get('/api/services', headers={'Accept-Encoding': 'br'})
+    assert again.get_data() == response.get_data()
+    assert list(app.extensions['catalog_cache']._entries.values())[0].compressed.keys() == {'br'}
+
+    # ETag của bản nén chỉ khớp với cùng cách nén
+    assert client.get('/api/services', headers={'Accept-Encoding': 'br',
+                                                'If-None-Match': response.headers['ETag']}).status_code == 304
+    mismatch = client.get('/api/services', headers={'Accept-Encoding': 'gzip',
+                                                    'If-None-Match': response.headers['ETag']})
+    assert mismatch.status_code == 200
+    assert mismatch.headers['Content-Encoding'] == 'gzip'
+
+def test_compression_can_be_disabled(app, client, auth_headers, payments):
+    app.extensions['compression'].enabled = False
+    response = client.get('/api/payments/patient/1', headers={**auth_headers, 'Accept-Encoding': 'gzip, br'})
+    assert 'Content-Encoding' not in response.headers
+    assert len(response.get_json()) == 200
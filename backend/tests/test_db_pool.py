@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import exc, text
+from app import shutdown_app
+from db_pool import InstrumentedQueuePool, engine_options
+from models import db
+from conftest import make_app
+
+def test_engine_options_from_env(monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '3')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '0')
+    monkeypatch.setenv('DB_POOL_TIMEOUT', '0.5')
+    monkeypatch.setenv('DB_POOL_PRE_PING', 'off')
+    options = engine_options('mysql+pymysql://user:pass@db/healthcare')
+    assert options['poolclass'] is InstrumentedQueuePool
+    assert (options['pool_size'], options['max_overflow'], options['pool_timeout']) == (3, 0, 0.5)
+    assert options['pool_recycle'] == 1800
+    assert options['pool_pre_ping'] is False
+    # SQLite trong bộ nhớ giữ pool mặc định của SQLAlchemy
+    assert engine_options('sqlite://') == {}
+    assert engine_options('sqlite:///:memory:') == {}
+
+@pytest.fixture
+def small_pool_app(tmp_path, monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '1')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '0')
+    monkeypatch.setenv('DB_POOL_TIMEOUT', '0.05')
+    app = make_app(tmp_path / 'test.db')
+    yield app
+    shutdown_app(app)
+
+def test_pool_health_reports_checkouts_and_timeouts(small_pool_app):
+    client = small_pool_app.test_client()
+    with small_pool_app.app_context():
+        assert isinstance(db.engine.pool, InstrumentedQueuePool)
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+            # Pool chỉ có một kết nối và đang được dùng: lần lấy tiếp theo hết thời gian chờ
+            with pytest.raises(exc.TimeoutError):
+                db.engine.connect()
+            status = client.get('/health/db-pool').get_json()
+            assert (status['size'], status['checked_out'], status['max_overflow']) == (1, 1, 0)
+            assert status['timeouts'] == 1
+
+    status = client.get('/health/db-pool').get_json()
+    assert status['pool'] == 'InstrumentedQueuePool'
+    assert (status['checked_out'], status['checked_in']) == (0, 1)
+    assert status['checkouts'] == 1
+    assert status['connects'] == 1
+    assert status['checkout_wait_max_ms'] >= 0
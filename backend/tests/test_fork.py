@@ -0,0 +1,72 @@
+import json
+import os
+import pytest
+from sqlalchemy import text
+from app import reset_after_fork, shutdown_app
+from models import db
+from utils import get_hashing_pool
+from conftest import make_app
+
+@pytest.fixture
+def forked_app(tmp_path):
+    app = make_app(tmp_path / 'test.db', SQLALCHEMY_REPLICA_URIS=[f'sqlite:///{tmp_path / "test.db"}'])
+    yield app
+    shutdown_app(app)
+
+def use_connections(app):
+    # Mở kết nối tới primary và replica, tạo pool mã hóa mật khẩu và ghi một request vào số liệu
+    with app.app_context():
+        db.session.execute(text('SELECT 1'))
+        db.session.remove()
+        get_hashing_pool()
+    with app.extensions['replicas'].replicas[0].engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+    metrics = app.extensions['metrics']
+    metrics.finish_request(metrics.start_request(), 'GET', 'services.get_all_services', 200)
+
+def pools(app):
+    with app.app_context():
+        return db.engine.pool, app.extensions['replicas'].replicas[0].engine.pool
+
+def test_reset_after_fork_disposes_engines(forked_app):
+    use_connections(forked_app)
+    primary, replica = pools(forked_app)
+    assert (primary.checkedin(), replica.checkedin()) == (1, 1)
+
+    reset_after_fork(forked_app)
+    new_primary, new_replica = pools(forked_app)
+    # Pool mới, không còn kết nối kế thừa; pool mã hóa và số liệu được tạo lại
+    assert new_primary is not primary and new_replica is not replica
+    assert (new_primary.checkedin(), new_replica.checkedin()) == (0, 0)
+    assert 'hashing_pool' not in forked_app.extensions
+    assert not forked_app.extensions['metrics'].snapshot()['requests']
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires os.fork')
+def test_forked_worker_opens_its_own_connections(forked_app):
+    use_connections(forked_app)
+    primary, _ = pools(forked_app)
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # Tiến trình con (như một worker của gunicorn)
+        code = 1
+        try:
+            reset_after_fork(forked_app)
+            use_connections(forked_app)
+            child_primary, _ = pools(forked_app)
+            os.write(write, json.dumps({'same_pool': child_primary is primary,
+                                        'connects': child_primary.stats.connects}).encode())
+            code = 0
+        finally:
+            os._exit(code)
+
+    os.close(write)
+    with os.fdopen(read) as pipe:
+        child = json.loads(pipe.read())
+    assert os.waitpid(pid, 0)[1] == 0
+    assert child == {'same_pool': False, 'connects': 1}
+    # Kết nối của tiến trình cha không bị tiến trình con đóng
+    assert pools(forked_app)[0] is primary
+    with forked_app.app_context():
+        assert db.session.execute(text('SELECT 1')).scalar() == 1
+    assert primary.stats.connects == 1
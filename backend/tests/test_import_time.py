@@ -0,0 +1,18 @@
+import os
+from benchmarks.check_import_time import measure_import, measure_create_app
+
+# Ngân sách thời gian khởi động (cold start), ghi đè bằng biến môi trường như benchmarks/check_import_time.py
+IMPORT_BUDGET_MS = float(os.getenv('IMPORT_BUDGET_MS', '1000'))
+CREATE_APP_BUDGET_MS = float(os.getenv('CREATE_APP_BUDGET_MS', '300'))
+RUNS = 3
+
+def test_import_and_create_app_within_budget():
+    # Chạy 'python -X importtime -c "import app"' trong tiến trình con (không dùng module đã import của pytest),
+    # lấy giá trị nhỏ nhất của nhiều lần chạy để giảm nhiễu
+    env = dict(os.environ, DATABASE_URL='sqlite://')
+    import_us, packages = min((measure_import(env, 5) for _ in range(RUNS)), key=lambda sample: sample[0])
+    create_us = min(measure_create_app(env) for _ in range(RUNS))
+
+    slowest = ', '.join(f'{name} {cumulative / 1000:.0f} ms' for cumulative, name in packages)
+    assert import_us / 1000 <= IMPORT_BUDGET_MS, f'import app: {import_us / 1000:.0f} ms ({slowest})'
+    assert create_us / 1000 <= CREATE_APP_BUDGET_MS, f'create_app(): {create_us / 1000:.0f} ms'
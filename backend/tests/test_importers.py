@@ -0,0 +1,82 @@
+import os
+import time
+from datetime import date
+from models import db, Patient, Medication, Prescription
+from ledger import reconcile_balances
+
+def seed():
+    db.session.add(Patient(patient_id=1, name='Nguyễn Văn An', dob=date(1990, 1, 1), gender='Male', phone='0', email='a@x'))
+    db.session.add(Medication(medication_id=1, medication_name='Paracetamol', price=1000))
+    db.session.commit()
+
+def import_file(client, auth_headers, body, mimetype, **params):
+    return client.post('/api/prescriptions/import', data=body, query_string=params,
+                       headers={**auth_headers, 'Content-Type': mimetype})
+
+def test_csv_bad_rows_are_reported_without_aborting(app, client, auth_headers):
+    with app.app_context():
+        seed()
+    body = b'\n'.join([
+        b'patient_id,medication_id,dosage,quantity',
+        b'1,1,2 vien/ngay,10',
+        b'1,1,\xff\xfe invalid utf-8,10',
+        b'1,1,2 vien/ngay,99999999999999999999',
+        b'1,1,2 vien/ngay,0',
+        b'1,1,' + b'x' * 101 + b',5',
+        b'99999999999,1,2 vien/ngay,5',
+        b'1,Paracetamol,1 vien,3',
+        b'1,1,1 vien,7',
+    ]) + b'\n'
+    response = import_file(client, auth_headers, body, 'text/csv', chunk_size=2)
+
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report['imported'] == 2
+    assert [error['line'] for error in report['errors']] == [3, 4, 5, 6, 7, 8]
+    assert report['errors'][0]['message'] == 'Invalid UTF-8'
+    with app.app_context():
+        assert db.session.query(Prescription).count() == 2
+
+def test_ndjson_bad_rows_are_reported_without_aborting(app, client, auth_headers):
+    with app.app_context():
+        seed()
+    body = b'\n'.join([
+        b'{"patient_id": 1, "medication_id": 1, "dosage": "1 vien", "quantity": 1}',
+        b'{"patient_id": 1, "medication_id": 1, "dosage": "\xc3\x28", "quantity": 1}',
+        b'{"patient_id": 1, "medication_id": 1, "dosage": "1 vien", "quantity": 99999999999999999999}',
+        b'not json',
+        b'{"patient_id": 1, "medication_name": "paracetamol", "dosage": "1 vien", "quantity": 2}',
+    ])
+    response = import_file(client, auth_headers, body, 'application/x-ndjson')
+
+    assert response.status_code == 200
+    report = response.get_json()
+    assert report['imported'] == 2
+    assert [(error['line'], error['message']) for error in report['errors']] == [
+        (2, 'Invalid UTF-8'),
+        (3, 'Quantity must be between 1 and 2147483647'),
+        (4, 'Invalid row'),
+    ]
+
+# Số dòng mỗi giây tối thiểu khi import vào SQLite (ghi đè bằng biến môi trường trên máy chậm)
+IMPORT_MIN_ROWS_PER_SECOND = float(os.getenv('IMPORT_MIN_ROWS_PER_SECOND', '10000'))
+THROUGHPUT_ROWS = 50000
+
+def test_import_throughput(app, client, auth_headers):
+    with app.app_context():
+        seed()
+        db.session.add_all(Patient(patient_id=i, name=f'Bệnh nhân {i}', dob=date(1990, 1, 1), gender='Male',
+                                   phone='0', email=f'p{i}@x') for i in range(2, 101))
+        db.session.commit()
+    body = 'patient_id,medication_name,dosage,quantity\n' + ''.join(
+        f'{i % 100 + 1},Paracetamol,{i % 3 + 1} vien/ngay,{i % 30 + 1}\n' for i in range(THROUGHPUT_ROWS))
+
+    start = time.perf_counter()
+    response = import_file(client, auth_headers, body.encode('utf-8'), 'text/csv')
+    elapsed = time.perf_counter() - start
+
+    assert response.get_json()['imported'] == THROUGHPUT_ROWS
+    assert THROUGHPUT_ROWS / elapsed >= IMPORT_MIN_ROWS_PER_SECOND, f'{THROUGHPUT_ROWS / elapsed:.0f} rows/s'
+    with app.app_context():
+        # Sổ cái được cộng theo từng lô trong cùng transaction với các đơn thuốc
+        assert reconcile_balances()['mismatched'] == 0
@@ -0,0 +1,30 @@
+from datetime import datetime
+import pytest
+from models import db, Appointment, Payment, Prescription, PatientService, PatientInsurance
+from pagination import keyset_query, encode_cursor
+from serializers import (patient_appointments_query, doctor_appointments_query, patient_payments_query,
+                         patient_prescriptions_query, patient_services_query, patient_insurances_query)
+
+# Các danh sách phân trang: (câu truy vấn, cột sắp xếp, chỉ mục phải được dùng cho cả lọc và sắp xếp)
+LISTINGS = [
+    (patient_appointments_query, [Appointment.appointment_date, Appointment.appointment_id], 'ix_appointment_patient_date'),
+    (doctor_appointments_query, [Appointment.appointment_date, Appointment.appointment_id], 'ix_appointment_doctor_date'),
+    (patient_payments_query, [Payment.payment_date, Payment.payment_id], 'ix_payment_patient_date'),
+    (patient_prescriptions_query, [Prescription.prescription_id], 'ix_prescription_patient'),
+    (patient_services_query, [PatientService.id], 'ix_patient_service_patient'),
+    (patient_insurances_query, [PatientInsurance.id], 'ix_patient_insurance_patient'),
+]
+
+def explain(query):
+    sql = query.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    return [row[-1] for row in db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+@pytest.mark.parametrize('query, keys, index', LISTINGS, ids=[listing[2] for listing in LISTINGS])
+def test_listing_pages_use_index(app, query, keys, index):
+    # Trang đầu và trang tiếp theo (có cursor): không quét cả bảng và không sắp xếp lại trong bộ nhớ
+    cursor = encode_cursor([datetime(2030, 1, 1) if key.type.python_type is datetime else 10 for key in keys])
+    with app.app_context():
+        for page_cursor in (None, cursor):
+            plan = explain(keyset_query(query(1), keys, page_cursor).limit(101))
+            assert any(f'USING INDEX {index}' in step or f'USING COVERING INDEX {index}' in step for step in plan), plan
+            assert not any('TEMP B-TREE' in step for step in plan), plan
@@ -0,0 +1,80 @@
+from datetime import date
+from decimal import Decimal
+from sqlalchemy.orm import Session
+import ledger
+from models import db, Patient, MedicalService, Medication, Payment, PatientBalance
+from ledger import reconcile_balances, money
+
+def seed():
+    db.session.add(Patient(patient_id=1, name='Nguyễn Văn An', dob=date(1990, 1, 1), gender='Male', phone='0', email='a@x'))
+    db.session.add(MedicalService(service_id=1, service_name='Khám tổng quát', price=Decimal('150000')))
+    db.session.add(Medication(medication_id=1, medication_name='Paracetamol', price=Decimal('2000')))
+    db.session.commit()
+
+def test_balance_keeps_prices_charged_at_registration(app, client, auth_headers):
+    with app.app_context():
+        seed()
+    assert client.post('/api/services/register', json={'patient_id': 1, 'service_id': 1},
+                       headers=auth_headers).status_code == 201
+    assert client.post('/api/prescriptions', json={'patient_id': 1, 'medication_id': 1, 'dosage': '2 viên/ngày',
+                                                   'quantity': 10}, headers=auth_headers).status_code == 201
+    body = b'patient_id,medication_id,dosage,quantity\n1,1,1 vien,5\n'
+    response = client.post('/api/prescriptions/import', data=body,
+                           headers={**auth_headers, 'Content-Type': 'text/csv'})
+    assert response.get_json()['imported'] == 1
+
+    # Bảng giá thay đổi sau khi đã tính tiền: công nợ và kết quả đối soát giữ nguyên giá cũ
+    with app.app_context():
+        db.session.get(MedicalService, 1).price = Decimal('200000')
+        db.session.get(Medication, 1).price = Decimal('5000')
+        db.session.commit()
+    assert client.post('/api/prescriptions', json={'patient_id': 1, 'medication_id': 1, 'dosage': '1 viên/ngày',
+                                                   'quantity': 1}, headers=auth_headers).status_code == 201
+
+    balance = client.get('/api/patients/1/balance', headers=auth_headers).get_json()
+    assert balance['services_total'] == 150000
+    assert balance['prescriptions_total'] == 15 * 2000 + 5000
+    with app.app_context():
+        assert reconcile_balances()['mismatched'] == 0
+
+def test_money_rounds_half_up_like_mysql_decimal():
+    assert money(Decimal('0.125')) == Decimal('0.13')
+    assert money(Decimal('2.345')) == Decimal('2.35')
+    assert money(Decimal('-0.125')) == Decimal('-0.13')
+
+def test_reconcile_fix_keeps_updates_written_concurrently(app, client, auth_headers, monkeypatch):
+    with app.app_context():
+        seed()
+        db.session.add(Patient(patient_id=2, name='Trần Thị Bình', dob=date(1990, 1, 1), gender='Female', phone='0',
+                               email='b@x'))
+        db.session.commit()
+    assert client.post('/api/services/register', json={'patient_id': 1, 'service_id': 1},
+                       headers=auth_headers).status_code == 201
+
+    with app.app_context():
+        # Sổ cái bị sai lệch: bệnh nhân 1 có số sai, bệnh nhân 2 chưa có dòng sổ cái
+        db.session.execute(PatientBalance.__table__.update().values(services_total=1))
+        db.session.commit()
+        report = reconcile_balances()
+        assert (report['mismatched'], report['fixed']) == (1, 0)
+
+        # Sau khi lần đối soát đã đọc dữ liệu, transaction khác ghi thanh toán cho cả hai bệnh nhân
+        # (tạo dòng sổ cái mới cho bệnh nhân 2): kết quả sửa không ghi đè các cập nhật đó
+        expected_and_ledger = ledger._expected_and_ledger
+
+        def read_then_concurrent_payments(patient_ids):
+            result = expected_and_ledger(patient_ids)
+            with Session(db.engine) as other:
+                other.add_all(Payment(patient_id=patient_id, amount=Decimal('10000.50'), status='Paid')
+                              for patient_id in (1, 2))
+                other.commit()
+            return result
+
+        monkeypatch.setattr(ledger, '_expected_and_ledger', read_then_concurrent_payments)
+        report = reconcile_balances(fix=True)
+        assert (report['mismatched'], report['fixed']) == (1, 1)
+        monkeypatch.undo()
+
+        assert reconcile_balances()['mismatched'] == 0
+        balances = {row.patient_id: (row.services_total, row.paid_total) for row in db.session.query(PatientBalance)}
+        assert balances == {1: (Decimal('150000'), Decimal('10000.50')), 2: (Decimal('0'), Decimal('10000.50'))}
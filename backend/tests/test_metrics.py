@@ -0,0 +1,40 @@
+import threading
+from conftest import make_app
+from app import shutdown_app
+from metrics import Metrics
+
+def test_shards_of_finished_threads_are_folded():
+    metrics = Metrics()
+
+    def handle_request():
+        metrics.finish_request(metrics.start_request(), 'GET', 'services.get_all_services', 200)
+
+    # Mỗi request một thread mới (như werkzeug dev server hoặc worker tạo thread theo kết nối)
+    for _ in range(50):
+        thread = threading.Thread(target=handle_request)
+        thread.start()
+        thread.join()
+    handle_request()
+
+    snapshot = metrics.snapshot()
+    assert snapshot["requests"][('GET', 'services.get_all_services', '200')] == 51
+    assert snapshot["in_flight"] == 0
+    assert len(metrics._shards) == 1
+    # Số liệu đã gộp không bị đếm lại ở lần xuất tiếp theo
+    assert metrics.snapshot()["requests"][('GET', 'services.get_all_services', '200')] == 51
+
+def test_internal_endpoints_only_from_loopback(client):
+    for url in ('/metrics', '/health/db-pool'):
+        assert client.get(url).status_code == 200
+        assert client.get(url, environ_base={'REMOTE_ADDR': '10.0.0.5'}).status_code == 403
+
+def test_internal_endpoints_with_token(tmp_path):
+    app = make_app(tmp_path / 'test.db', INTERNAL_API_TOKEN='metrics-token')
+    client = app.test_client()
+    for url in ('/metrics', '/health/db-pool'):
+        assert client.get(url).status_code == 401
+        assert client.get(url, headers={'Authorization': 'Bearer wrong'}).status_code == 401
+        response = client.get(url, headers={'Authorization': 'Bearer metrics-token'},
+                              environ_base={'REMOTE_ADDR': '10.0.0.5'})
+        assert response.status_code == 200
+    shutdown_app(app)
@@ -0,0 +1,87 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+from flask_migrate import upgrade
+from sqlalchemy import text, DateTime
+from app import shutdown_app
+from models import db
+from conftest import make_app
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+# Phiên bản trước khi có slot_start và các ràng buộc unique
+BEFORE_SLOTS = 'fe4a59b2a70b'
+
+@pytest.fixture
+def old_app(tmp_path):
+    app = make_app(tmp_path / 'test.db')
+    with app.app_context():
+        upgrade(MIGRATIONS_DIR, BEFORE_SLOTS)
+        db.session.execute(text("INSERT INTO Patient (patient_id, name, dob, gender, phone, email) "
+                                "VALUES (1, 'An', '1990-01-01', 'Male', '0', 'a@x')"))
+        db.session.execute(text("INSERT INTO Doctor (doctor_id, name, specialization, phone, email) "
+                                "VALUES (1, 'Bình', 'Nội khoa', '0', 'd@x'), (2, 'Chi', 'Nội khoa', '0', 'c@x')"))
+        db.session.commit()
+    yield app
+    shutdown_app(app)
+
+def add_appointments(*rows):
+    db.session.execute(text("INSERT INTO Appointment (appointment_id, patient_id, doctor_id, appointment_date, status) "
+                            "VALUES (:id, 1, :doctor_id, :date, :status)"),
+                       [{'id': i, 'doctor_id': doctor_id, 'date': date, 'status': status}
+                        for i, doctor_id, date, status in rows])
+    db.session.commit()
+
+def appointments():
+    return db.session.execute(text("SELECT appointment_id, status, slot_start FROM Appointment "
+                                   "ORDER BY appointment_id").columns(slot_start=DateTime)).all()
+
+def version():
+    return db.session.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+CONFLICTS = [
+    (3, 1, datetime(2030, 1, 7, 8, 20), 'Scheduled'),
+    (5, 1, datetime(2030, 1, 7, 8, 10), 'Scheduled'),
+    (9, 1, datetime(2030, 1, 7, 8, 0), 'Completed'),
+    (6, 1, datetime(2030, 1, 7, 9, 0), 'Canceled'),
+    (7, 1, datetime(2030, 1, 7, 9, 10), 'Scheduled'),
+    (8, 2, datetime(2030, 1, 7, 8, 10), 'Scheduled'),
+]
+
+def test_conflicting_appointments_stop_the_upgrade(old_app, capsys):
+    with old_app.app_context():
+        add_appointments(*CONFLICTS)
+        with pytest.raises(SystemExit):
+            upgrade(MIGRATIONS_DIR)
+        # Dừng trước mọi thay đổi schema, không sửa dữ liệu
+        assert version() == BEFORE_SLOTS
+        assert [status for _, status in db.session.execute(text(
+            "SELECT appointment_id, status FROM Appointment ORDER BY appointment_id"))] == \
+            ['Scheduled', 'Scheduled', 'Canceled', 'Scheduled', 'Scheduled', 'Completed']
+    errors = capsys.readouterr().err
+    assert "Appointment: 1 (doctor_id, slot_start) slots booked more than once, e.g. " \
+           "(doctor_id=1, slot_start=2030-01-07 08:00: keep id=3, conflicting ids=5, 9)" in errors
+    assert 'cancel_conflicting_appointments=true' in errors
+
+def test_conflicting_appointments_can_be_canceled(old_app):
+    with old_app.app_context():
+        add_appointments(*CONFLICTS)
+        upgrade(MIGRATIONS_DIR, x_arg=['cancel_conflicting_appointments=true'])
+        assert appointments() == [
+            (3, 'Scheduled', datetime(2030, 1, 7, 8, 0)),
+            (5, 'Canceled', None),
+            (6, 'Canceled', None),
+            (7, 'Scheduled', datetime(2030, 1, 7, 9, 0)),
+            (8, 'Scheduled', datetime(2030, 1, 7, 8, 0)),
+            (9, 'Canceled', None),
+        ]
+
+def test_backfill_assigns_every_slot(old_app):
+    # Nhiều hơn một lô (1000 dòng), không có lịch trùng
+    start = datetime(2030, 1, 1, 8, 0)
+    rows = [(i, 1 + i % 2, start + timedelta(minutes=30 * (i // 2)), 'Canceled' if i % 7 == 0 else 'Scheduled')
+            for i in range(1, 2501)]
+    with old_app.app_context():
+        add_appointments(*rows)
+        upgrade(MIGRATIONS_DIR)
+        result = appointments()
+    assert [(i, status, None if status == 'Canceled' else date) for i, _, date, status in rows] == result
@@ -0,0 +1,52 @@
+import pytest
+from test_query_counts import seeded
+
+SECTIONS = {
+    'appointments': '/api/appointments/patient/1',
+    'prescriptions': '/api/prescriptions/patient/1',
+    'services': '/api/services/patient/1',
+    'insurances': '/api/insurance/patient/1',
+    'payments': '/api/payments/patient/1',
+}
+
+def test_overview_sections_match_list_endpoints(seeded, client, auth_headers):
+    response = client.get('/api/patients/1/overview', query_string={'limit': 1, 'payments_limit': 5},
+                          headers=auth_headers)
+    assert response.status_code == 200
+    overview = response.get_json()
+    assert overview['patient'] == {'patient_id': 1, 'name': 'Nguyễn Văn An', 'dob': '1990-01-01', 'gender': 'Male',
+                                   'phone': '0', 'email': 'a@x'}
+
+    for name, path in SECTIONS.items():
+        limit = 5 if name == 'payments' else 1
+        expected = client.get(path, query_string={'limit': limit}, headers=auth_headers)
+        section = overview[name]
+        assert section['items'] == expected.get_json(), name
+        assert section['next_cursor'] == expected.headers.get('X-Next-Cursor'), name
+
+def test_overview_cursor_continues_with_list_endpoint(seeded, client, auth_headers):
+    overview = client.get('/api/patients/1/overview', query_string={'appointments_limit': 3},
+                          headers=auth_headers).get_json()
+    section = overview['appointments']
+    assert len(section['items']) == 3
+    rest = client.get(SECTIONS['appointments'], query_string={'cursor': section['next_cursor']},
+                      headers=auth_headers).get_json()
+    everything = client.get(SECTIONS['appointments'], headers=auth_headers).get_json()
+    assert section['items'] + rest == everything
+
+def test_overview_default_limit_covers_small_sections(seeded, client, auth_headers):
+    overview = client.get('/api/patients/1/overview', headers=auth_headers).get_json()
+    assert [len(overview[name]['items']) for name in SECTIONS] == [4, 2, 2, 2, 2]
+    assert all(overview[name]['next_cursor'] is None for name in SECTIONS)
+
+@pytest.mark.parametrize('query', [{'limit': 'x'}, {'limit': 0}, {'payments_limit': -1}])
+def test_overview_rejects_invalid_limits(seeded, client, auth_headers, query):
+    response = client.get('/api/patients/1/overview', query_string=query, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json() == {'message': 'Invalid limit'}
+
+def test_overview_of_unknown_patient(seeded, client, auth_headers):
+    response = client.get('/api/patients/99/overview', headers=auth_headers)
+    assert response.status_code == 404
+    assert response.get_json() == {'message': 'Patient not found'}
+    assert client.get('/api/patients/1/overview').status_code == 401
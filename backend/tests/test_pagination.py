@@ -0,0 +1,46 @@
+from datetime import date, datetime, timedelta
+import pytest
+from models import db, Patient, Payment
+from pagination import encode_cursor
+
+@pytest.fixture
+def payments(app):
+    with app.app_context():
+        db.session.add(Patient(patient_id=1, name='Nguyễn Văn An', dob=date(1990, 1, 1), gender='Male', phone='0',
+                               email='a@x'))
+        db.session.execute(Payment.__table__.insert(), [
+            {'patient_id': 1, 'amount': 10, 'payment_date': datetime(2030, 1, 1) + timedelta(hours=i),
+             'description': '-', 'status': 'Paid'} for i in range(150)
+        ])
+        db.session.commit()
+
+def test_without_limit_or_cursor_returns_everything(app, client, auth_headers, payments):
+    response = client.get('/api/payments/patient/1', headers=auth_headers)
+    assert response.status_code == 200
+    assert len(response.get_json()) == 150
+    assert 'X-Next-Cursor' not in response.headers
+
+def test_pages_follow_cursor(app, client, auth_headers, payments):
+    response = client.get('/api/payments/patient/1?limit=60', headers=auth_headers)
+    ids = [item['payment_id'] for item in response.get_json()]
+    while 'X-Next-Cursor' in response.headers:
+        # Chỉ có cursor: dùng PAGE_SIZE_DEFAULT dòng mỗi trang
+        response = client.get('/api/payments/patient/1', query_string={'cursor': response.headers['X-Next-Cursor']},
+                              headers=auth_headers)
+        page = response.get_json()
+        assert len(page) <= app.config['PAGE_SIZE_DEFAULT']
+        ids += [item['payment_id'] for item in page]
+    assert ids == list(range(1, 151))
+
+@pytest.mark.parametrize('values', [
+    ['2030-01-01T00:00:00', 2 ** 70],
+    ['2030-01-01T00:00:00', -1],
+    ['2030-01-01T00:00:00', True],
+    ['2030-01-01T00:00:00', '1'],
+    ['not a date', 1],
+])
+def test_invalid_cursor_is_rejected(client, auth_headers, payments, values):
+    response = client.get('/api/payments/patient/1', query_string={'cursor': encode_cursor(values)},
+                          headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json() == {"message": "Invalid cursor"}
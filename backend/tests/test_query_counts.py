@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+import pytest
+from sqlalchemy import event
+from models import (db, Patient, Doctor, Appointment, MedicalService, PatientService, InsuranceService,
+                    PatientInsurance, Medication, Prescription, Payment)
+
+# Các API danh sách và chi tiết: số câu SQL không được tăng theo số dòng (không có truy vấn N+1)
+ENDPOINTS = [
+    '/api/appointments/patient/1',
+    '/api/appointments/doctor/1',
+    '/api/services/patient/1',
+    '/api/insurance/patient/1',
+    '/api/prescriptions/patient/1',
+    '/api/prescriptions/1',
+    '/api/payments/patient/1',
+    '/api/payments/1',
+    '/api/patients/1/overview',
+    '/api/patients/1/balance',
+]
+
+def add_rows(start, count):
+    # Thêm 'count' dòng mỗi loại cho bệnh nhân 1 (id từ 'start'), mỗi dòng một dịch vụ/bảo hiểm/thuốc/bác sĩ riêng
+    ids = range(start, start + count)
+    first = datetime(2030, 1, 1, 8, 0)
+    db.session.add_all(Doctor(doctor_id=i, name=f'Bác sĩ {i}', specialization='Nội khoa', phone='0', email='d@x')
+                       for i in ids if i > 1)
+    db.session.add_all(MedicalService(service_id=i, service_name=f'Dịch vụ {i}', price=100) for i in ids)
+    db.session.add_all(InsuranceService(insurance_id=i, insurance_name=f'Bảo hiểm {i}', price=100) for i in ids)
+    db.session.add_all(Medication(medication_id=i, medication_name=f'Thuốc {i}', price=10) for i in ids)
+    db.session.flush()
+    for i in ids:
+        when = first + timedelta(hours=i)
+        db.session.add(Appointment(patient_id=1, doctor_id=1, appointment_date=when, slot_start=when, status='Scheduled'))
+        db.session.add(Appointment(patient_id=1, doctor_id=i, appointment_date=when - timedelta(days=1),
+                                   slot_start=when - timedelta(days=1), status='Completed'))
+        db.session.add(PatientService(patient_id=1, service_id=i, status='Pending', price=100))
+        db.session.add(PatientInsurance(patient_id=1, insurance_id=i, status='Active'))
+        db.session.add(Prescription(patient_id=1, medication_id=i, dosage='1 viên', quantity=1, unit_price=10))
+        db.session.add(Payment(patient_id=1, amount=50, payment_date=when, description='-', status='Paid'))
+    db.session.commit()
+
+@contextmanager
+def count_queries(engine):
+    statements = []
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+@pytest.fixture
+def seeded(app):
+    with app.app_context():
+        db.session.add(Patient(patient_id=1, name='Nguyễn Văn An', dob=date(1990, 1, 1), gender='Male', phone='0',
+                               email='a@x'))
+        db.session.add(Doctor(doctor_id=1, name='Trần Thị Bình', specialization='Nội khoa', phone='0', email='d@x'))
+        add_rows(1, 2)
+    return app
+
+def request_query_counts(app, client, auth_headers):
+    counts = {}
+    with app.app_context():
+        engine = db.engine
+    for url in ENDPOINTS:
+        with count_queries(engine) as statements:
+            response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200, url
+        counts[url] = len(statements)
+    return counts
+
+def test_query_count_does_not_grow_with_rows(seeded, client, auth_headers):
+    request_query_counts(seeded, client, auth_headers)  # lần đầu: nạp cache token, ...
+    small = request_query_counts(seeded, client, auth_headers)
+    with seeded.app_context():
+        add_rows(3, 40)
+    large = request_query_counts(seeded, client, auth_headers)
+    assert large == small
@@ -0,0 +1,124 @@
+import pytest
+import rate_limit
+from rate_limit import RateLimit, MemoryBucketStore, RedisBucketStore
+from app import shutdown_app
+from models import db
+from conftest import make_app
+
+class FakeRedis:
+    """
+    Redis giả cho RedisBucketStore: chạy cùng thuật toán với script Lua _REDIS_CONSUME trên dict,
+    trả kết quả giống redis-py (số nguyên và bytes), đồng hồ ('now') do test điều khiển.
+    """
+
+    def __init__(self):
+        self.hashes = {}
+        self.expires = {}
+        self.now = 1000.0
+        self.down = False
+
+    def register_script(self, source):
+        assert source == rate_limit._REDIS_CONSUME
+
+        def run(keys, args):
+            if self.down:
+                raise ConnectionError('Redis is down')
+            capacity, rate = float(args[0]), float(args[1])
+            tokens, updated_at = self.hashes.get(keys[0], (capacity, self.now))
+            tokens = min(capacity, tokens + max(0, self.now - updated_at) * rate)
+            allowed = 0
+            if tokens >= 1:
+                tokens -= 1
+                allowed = 1
+            self.hashes[keys[0]] = (tokens, self.now)
+            self.expires[keys[0]] = capacity / rate
+            return [allowed, repr(tokens).encode()]
+
+        return run
+
+@pytest.mark.parametrize('value', ['abc/minute', '10', '0/minute', '-1/minute', '10/fortnight', '1.5/second', '/'])
+def test_parse_rejects_malformed_limits(value):
+    with pytest.raises(ValueError, match="Invalid rate limit.*<count>/<second\\|minute\\|hour\\|day>"):
+        RateLimit.parse(value)
+
+def test_parse():
+    limit = RateLimit.parse(' 30 / minute ')
+    assert (limit.capacity, limit.rate) == (30, 0.5)
+
+def consume_all(store, now, limit=RateLimit.parse('3/minute')):
+    return [store.consume('login:user:an', limit, now=now) for _ in range(4)]
+
+def test_memory_store_allows_burst_then_refills():
+    store = MemoryBucketStore(maxsize=10)
+    limit = RateLimit.parse('3/minute')
+    assert consume_all(store, 0.0) == [(True, 0)] * 3 + [(False, 20.0)]
+    # Sau 20 giây hồi lại đúng một request
+    assert store.consume('login:user:an', limit, now=20.0) == (True, 0)
+    assert store.consume('login:user:an', limit, now=20.0) == (False, 20.0)
+    # Không hồi quá 'capacity'
+    assert consume_all(store, 1000.0) == [(True, 0)] * 3 + [(False, 20.0)]
+    # Bucket khác không bị ảnh hưởng
+    assert store.consume('login:user:binh', limit, now=1000.0) == (True, 0)
+
+def test_memory_store_evicts_least_recently_used_buckets():
+    store = MemoryBucketStore(maxsize=2)
+    limit = RateLimit.parse('1/minute')
+    for key in ('a', 'b', 'a', 'c'):
+        store.consume(key, limit, now=0.0)
+    assert len(store) == 2
+    # 'a' vẫn đang bị giới hạn, 'b' (ít dùng nhất) đã bị bỏ nên có lại bucket đầy
+    assert store.consume('a', limit, now=0.0)[0] is False
+    assert store.consume('b', limit, now=0.0) == (True, 0)
+
+def test_redis_store_allows_burst_then_refills():
+    client = FakeRedis()
+    store = RedisBucketStore(client, ConnectionError)
+    limit = RateLimit.parse('3/minute')
+    assert [store.consume('login:ip:1.2.3.4', limit) for _ in range(4)] == [(True, 0)] * 3 + [(False, 20.0)]
+    assert list(client.hashes) == ['ratelimit:login:ip:1.2.3.4']
+    # Bucket hết hạn sau thời gian hồi đầy (3 request, 1 request mỗi 20 giây)
+    assert client.expires['ratelimit:login:ip:1.2.3.4'] == 60
+
+    client.now += 10
+    assert store.consume('login:ip:1.2.3.4', limit) == (False, pytest.approx(10.0))
+    client.now += 10
+    assert store.consume('login:ip:1.2.3.4', limit) == (True, 0)
+
+def test_redis_store_allows_requests_when_redis_is_down(app):
+    client = FakeRedis()
+    store = RedisBucketStore(client, ConnectionError)
+    limit = RateLimit.parse('1/minute')
+    assert store.consume('login:ip:1.2.3.4', limit) == (True, 0)
+    client.down = True
+    with app.app_context():
+        assert store.consume('login:ip:1.2.3.4', limit) == (True, 0)
+
+@pytest.fixture
+def limited_app(tmp_path):
+    app = make_app(tmp_path / 'test.db', RATE_LIMIT_ENABLED=True, LOGIN_RATE_LIMIT_PER_IP='4/minute',
+                   LOGIN_RATE_LIMIT_PER_USERNAME='2/minute')
+    with app.app_context():
+        db.create_all()
+    yield app
+    shutdown_app(app)
+
+def test_login_returns_429_with_retry_after(limited_app):
+    client = limited_app.test_client()
+
+    def login(username):
+        return client.post('/api/login', json={'username': username, 'password': 'wrong'})
+
+    # Username ' An ' và 'an' dùng chung bucket; request bị từ chối không chạm tới database
+    assert [login(name).status_code for name in ('an', ' An ')] == [401, 401]
+    response = login('an')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '30'
+    # IP còn một lượt cho username khác, sau đó chính IP bị giới hạn
+    assert login('binh').status_code == 401
+    response = login('cuong')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '15'
+
+def test_invalid_limit_in_config_fails_at_startup(tmp_path):
+    with pytest.raises(ValueError, match="Invalid rate limit 'abc/minute'"):
+        make_app(tmp_path / 'test.db', LOGIN_RATE_LIMIT_PER_IP='abc/minute')
@@ -0,0 +1,92 @@
+from datetime import date, datetime
+import pytest
+from sqlalchemy import create_engine, event, select
+from models import db, Patient, Doctor, Appointment
+from utils import generate_token
+from conftest import make_app
+from app import shutdown_app
+
+def seed(connection, appointment_date):
+    db.metadata.create_all(connection)
+    connection.execute(Patient.__table__.insert(), {'patient_id': 1, 'name': 'Nguyễn Văn An', 'dob': date(1990, 1, 1),
+                                                    'gender': 'Male', 'phone': '0', 'email': 'a@x'})
+    connection.execute(Doctor.__table__.insert(), {'doctor_id': 1, 'name': 'Trần Thị Bình', 'specialization': 'Nội khoa',
+                                                   'phone': '0', 'email': 'd@x'})
+    connection.execute(Appointment.__table__.insert(), {'patient_id': 1, 'doctor_id': 1, 'status': 'Scheduled',
+                                                        'appointment_date': appointment_date,
+                                                        'slot_start': appointment_date})
+
+@pytest.fixture
+def replicated_app(tmp_path):
+    # Primary và replica là hai tệp SQLite khác nhau (replica "chậm": chỉ có dữ liệu cũ, khác primary)
+    for name, appointment_date in (('primary.db', datetime(2030, 1, 7, 8, 0)), ('replica.db', datetime(2030, 1, 7, 9, 0))):
+        engine = create_engine(f'sqlite:///{tmp_path / name}')
+        with engine.begin() as connection:
+            seed(connection, appointment_date)
+        engine.dispose()
+    app = make_app(tmp_path / 'primary.db', SQLALCHEMY_REPLICA_URIS=[f'sqlite:///{tmp_path / "replica.db"}'])
+    yield app
+    shutdown_app(app)
+
+@pytest.fixture
+def headers(replicated_app):
+    with replicated_app.app_context():
+        return {'Authorization': 'Bearer ' + generate_token(1, 'Admin')}
+
+def stored_dates(path):
+    # Ngày của các lịch hẹn đang có trong tệp database 'path' (đọc trực tiếp, không qua ứng dụng)
+    engine = create_engine(f'sqlite:///{path}')
+    with engine.connect() as connection:
+        dates = sorted(row[0] for row in connection.execute(select(Appointment.appointment_date)))
+    engine.dispose()
+    return [value.strftime('%Y-%m-%d %H:%M') for value in dates]
+
+def statement_binds(app):
+    # Danh sách database (primary/replica) mà từng câu SQL được gửi tới
+    binds = []
+    replica = app.extensions['replicas'].replicas[0].engine
+    with app.app_context():
+        primary = db.engine
+    for engine, name in ((primary, 'primary'), (replica, 'replica')):
+        event.listen(engine, 'before_cursor_execute', lambda *args, name=name: binds.append(name))
+    return binds
+
+def appointment_dates(client, headers):
+    response = client.get('/api/appointments/patient/1', headers=headers)
+    assert response.status_code == 200
+    return sorted(item['appointment_date'] for item in response.get_json())
+
+def test_reads_go_to_replica_until_client_writes(replicated_app, headers, tmp_path):
+    client = replicated_app.test_client()
+    binds = statement_binds(replicated_app)
+    assert appointment_dates(client, headers) == ['2030-01-07 09:00']
+    assert set(binds) == {'replica'}
+
+    binds.clear()
+    response = client.post('/api/appointments', json={'patient_id': 1, 'doctor_id': 1,
+                                                      'appointment_date': '2030-01-07 10:00'}, headers=headers)
+    assert response.status_code == 201
+    assert set(binds) == {'primary'}
+    assert stored_dates(tmp_path / 'primary.db') == ['2030-01-07 08:00', '2030-01-07 10:00']
+    assert stored_dates(tmp_path / 'replica.db') == ['2030-01-07 09:00']
+    last_write = response.headers['X-Last-Write']
+
+    # Cookie của client vừa ghi: đọc từ primary (thấy lịch hẹn vừa tạo)
+    assert appointment_dates(client, headers) == ['2030-01-07 08:00', '2030-01-07 10:00']
+    # Client khác (hoặc worker khác) nhận thời điểm ghi qua header
+    other = replicated_app.test_client()
+    assert appointment_dates(other, {**headers, 'X-Last-Write': last_write}) == ['2030-01-07 08:00', '2030-01-07 10:00']
+    assert appointment_dates(other, headers) == ['2030-01-07 09:00']
+    # Thời điểm ghi đã quá hạn hoặc không hợp lệ: đọc lại từ replica
+    assert appointment_dates(other, {**headers, 'X-Last-Write': '1000.0'}) == ['2030-01-07 09:00']
+    assert appointment_dates(other, {**headers, 'X-Last-Write': 'abc'}) == ['2030-01-07 09:00']
+
+def test_replica_error_is_retried_on_primary(replicated_app, headers):
+    replicas = replicated_app.extensions['replicas']
+    client = replicated_app.test_client()
+    assert appointment_dates(client, headers) == ['2030-01-07 09:00']
+
+    with replicas.replicas[0].engine.begin() as connection:
+        connection.exec_driver_sql('DROP TABLE "Appointment"')
+    assert appointment_dates(client, headers) == ['2030-01-07 08:00']
+    assert replicas.choose() is None
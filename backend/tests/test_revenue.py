@@ -0,0 +1,79 @@
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy.orm import Session
+import revenue
+from models import db, Patient, Payment, RevenueDaily, RevenueMonthly
+from revenue import rebuild_revenue
+
+def seed():
+    db.session.add(Patient(patient_id=1, name='Nguyễn Văn An', dob=date(1990, 1, 1), gender='Male', phone='0', email='a@x'))
+    db.session.add_all([
+        Payment(patient_id=1, amount=Decimal('100000'), payment_date=datetime(2030, 1, 5, 9, 0), status='Paid'),
+        Payment(patient_id=1, amount=Decimal('50000.50'), payment_date=datetime(2030, 1, 5, 15, 0), status='Paid'),
+        Payment(patient_id=1, amount=Decimal('20000'), payment_date=datetime(2030, 2, 1, 8, 0), status='Pending'),
+    ])
+    db.session.commit()
+
+def rollups():
+    daily = {(row.day, row.status): (row.total, row.payment_count) for row in db.session.query(RevenueDaily)}
+    monthly = {(row.month, row.status): (row.total, row.payment_count) for row in db.session.query(RevenueMonthly)}
+    return daily, monthly
+
+def assert_consistent():
+    # Không còn chênh lệch giữa bảng doanh thu và Payment
+    daily, monthly, _ = revenue._revenue_corrections(date(2000, 1, 1), date(2100, 1, 1))
+    assert not any(total or count for total, count in [*daily.values(), *monthly.values()])
+
+def test_rebuild_fixes_rollups(app):
+    with app.app_context():
+        seed()
+        expected = rollups()
+        assert expected[0][(date(2030, 1, 5), 'Paid')] == (Decimal('150000.50'), 2)
+        assert_consistent()
+
+        # Làm sai lệch bảng doanh thu: sửa một dòng, xóa một dòng, thêm dòng của tháng không có thanh toán
+        db.session.execute(RevenueDaily.__table__.update().values(total=1, payment_count=7))
+        db.session.execute(RevenueMonthly.__table__.delete().where(RevenueMonthly.status == 'Pending'))
+        db.session.execute(RevenueMonthly.__table__.insert().values(month=date(2029, 6, 1), status='Paid', total=5,
+                                                                    payment_count=1))
+        db.session.commit()
+
+        assert rebuild_revenue() == {"chunks": 9, "payments": 3}
+        assert rollups() == expected
+        assert_consistent()
+
+def test_rebuild_keeps_payments_written_concurrently(app, monkeypatch):
+    with app.app_context():
+        seed()
+        db.session.execute(RevenueDaily.__table__.delete())
+        db.session.commit()
+
+        # Thanh toán của một ngày chưa có dòng doanh thu được ghi (và commit) bởi transaction khác
+        # sau khi lần tính lại đã đọc dữ liệu: dòng doanh thu vừa được tạo không bị xóa hay ghi đè
+        corrections = revenue._revenue_corrections
+
+        def corrections_then_concurrent_payment(start, end):
+            result = corrections(start, end)
+            if start == date(2030, 1, 1):
+                with Session(db.engine) as other:
+                    other.add(Payment(patient_id=1, amount=Decimal('30000'), payment_date=datetime(2030, 1, 20, 10, 0),
+                                      status='Paid'))
+                    other.commit()
+            return result
+
+        monkeypatch.setattr(revenue, '_revenue_corrections', corrections_then_concurrent_payment)
+        rebuild_revenue()
+        daily, monthly = rollups()
+        assert daily[(date(2030, 1, 20), 'Paid')] == (Decimal('30000'), 1)
+        assert monthly[(date(2030, 1, 1), 'Paid')] == (Decimal('180000.50'), 3)
+        assert_consistent()
+
+def test_revenue_reports(app, client, auth_headers):
+    with app.app_context():
+        seed()
+    response = client.get('/api/reports/revenue/monthly', query_string={'start': '2030-01', 'end': '2030-02'},
+                          headers=auth_headers)
+    assert response.get_json() == [
+        {'month': '2030-01', 'status': 'Paid', 'total': 150000.5, 'count': 2},
+        {'month': '2030-02', 'status': 'Pending', 'total': 20000.0, 'count': 1},
+    ]
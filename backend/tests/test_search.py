@@ -0,0 +1,63 @@
+from datetime import date
+from models import db, Patient, Doctor
+from search import search_ids
+
+def add_patients(*names, email='p@example.com'):
+    for i, name in enumerate(names, start=1):
+        db.session.add(Patient(patient_id=i, name=name, dob=date(1990, 1, 1), gender='Female', phone='0912345678',
+                               email=email))
+    db.session.commit()
+
+def find(kind, query):
+    return sorted(search_ids(kind, query, 20, 5000))
+
+def test_word_order_does_not_matter(app):
+    with app.app_context():
+        add_patients('Trần Thị Hoa', 'Trần Thịnh Hoa', 'Hoa Thị Lan', 'Lê Văn Hoà')
+        assert find('patients', 'thi hoa') == [1, 2, 3]
+        assert find('patients', 'hoa thi') == [1, 2, 3]
+        assert find('patients', 'hoa tran thi') == [1, 2]
+        assert find('patients', 'thi tran hoa') == [1, 2]
+
+def test_complete_words_in_any_order(app):
+    with app.app_context():
+        add_patients('Nguyễn Văn Minh', 'Minh Nguyễn', 'Nguyễn Minh Văn', 'Nguyễn Văn An')
+        assert find('patients', 'nguyen minh') == [1, 2, 3]
+        assert find('patients', 'minh nguyen') == [1, 2, 3]
+        assert find('patients', 'van nguyen minh') == [1, 3]
+
+def test_prefix_only_queries(app):
+    with app.app_context():
+        add_patients('Nguyễn Văn Minh', 'Nguyên Vân Mịch', 'Ngô Văn Mai', 'Phạm Văn Minh')
+        assert find('patients', 'ng v mi') == [1, 2]
+        assert find('patients', 'mi ng') == [1, 2]
+        assert find('patients', 'nguy') == [1, 2]
+        assert find('patients', 'nguyen vanx') == []
+
+def test_words_can_match_across_fields(app):
+    with app.app_context():
+        add_patients('Nguyễn Văn Minh', 'Hoa Văn Minh', email='nguyen.hoa@example.com')
+        # Cả hai bệnh nhân có 'nguyen' và 'hoa' (ở tên hoặc email), dù chỉ bệnh nhân 1 có tổ hợp 'nguyen ... minh'
+        assert find('patients', 'nguyen minh') == [1, 2]
+        assert find('patients', 'hoa nguyen') == [1, 2]
+        assert find('patients', 'minh 0912345') == [1, 2]
+
+        db.session.add(Doctor(doctor_id=1, name='Trần Văn Bình', specialization='Tim mạch', phone='0', email='d@x'))
+        db.session.add(Doctor(doctor_id=2, name='Tim Văn Bình', specialization='Nội khoa', phone='0', email='d@x'))
+        db.session.commit()
+        assert find('doctors', 'binh tim') == [1, 2]
+        assert find('doctors', 'mach binh') == [1]
+
+def test_words_beyond_the_combination_limit(app):
+    with app.app_context():
+        add_patients('Tôn Nữ Thị Hồng Hoa Lan', 'Hoa Lan')
+        assert find('patients', 'lan ton') == [1]
+        assert find('patients', 'hoa lan') == [1, 2]
+
+def test_search_endpoint_uses_the_index(app, client, auth_headers):
+    with app.app_context():
+        add_patients('Trần Thị Hoa', 'Trần Thịnh Hoa')
+    response = client.get('/api/search/patients', query_string={'q': 'thi hoa'}, headers=auth_headers)
+    assert response.status_code == 200
+    assert sorted(row['patient_id'] for row in response.get_json()) == [1, 2]
+    assert client.get('/api/search/patients', query_string={'q': ' '}, headers=auth_headers).status_code == 400
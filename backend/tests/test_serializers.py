@@ -0,0 +1,121 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+import pytest
+from sqlalchemy import select, func, DateTime, Numeric
+import overview
+import revenue
+import search
+import serializers
+from models import db, Patient, Doctor, Medication, Payment
+from serializers import row_serializer
+from test_query_counts import add_rows
+
+# Mọi hàm serialize sinh bởi row_serializer: (hàm, câu truy vấn có dữ liệu, tham số đã dùng khi sinh hàm)
+SERIALIZERS = [
+    (serializers.serialize_patient_appointment, serializers.patient_appointments_query(1),
+     {'formats': {'appointment_date': '%Y-%m-%d %H:%M'}}),
+    (serializers.serialize_doctor_appointment, serializers.doctor_appointments_query(1),
+     {'formats': {'appointment_date': '%Y-%m-%d %H:%M'}}),
+    (serializers.serialize_patient_payment, serializers.patient_payments_query(1), {}),
+    (serializers.serialize_payment_detail, serializers.payment_detail_query(3), {}),
+    (serializers.serialize_patient_prescription, serializers.patient_prescriptions_query(1), {}),
+    (serializers.serialize_prescription_detail, serializers.prescription_detail_query(1), {}),
+    (serializers.serialize_patient_service, serializers.patient_services_query(1), {'exclude': ('id',)}),
+    (serializers.serialize_patient_insurance, serializers.patient_insurances_query(1), {'exclude': ('id',)}),
+    (overview.serialize_patient_summary, overview.patient_summary_query(1), {}),
+    (search.serialize_patient_result, search.patients_by_ids_query([1]), {}),
+    (search.serialize_doctor_result, search.doctors_by_ids_query([1, 2]), {}),
+    (search.serialize_medication_result, search.medications_by_ids_query([1, 2]), {}),
+    (revenue.serialize_daily_revenue, revenue.daily_revenue_query(date.min, date.max),
+     {'rename': {'payment_count': 'count'}}),
+    (revenue.serialize_monthly_revenue, revenue.monthly_revenue_query(date.min, date.max),
+     {'rename': {'payment_count': 'count'}, 'formats': {'month': '%Y-%m'}}),
+]
+
+def to_dict(query, row, exclude=(), rename=None, formats=None):
+    # Cách viết tay trước đây: đọc từng cột theo tên, chuyển theo kiểu của giá trị (float, strftime)
+    rename, formats = rename or {}, formats or {}
+    result = {}
+    for column in query.selected_columns:
+        if column.key in exclude:
+            continue
+        value = row._mapping[column.key]
+        if isinstance(value, Decimal):
+            value = float(value)
+        elif isinstance(value, datetime):
+            value = value.strftime(formats.get(column.key, '%Y-%m-%d %H:%M:%S'))
+        elif isinstance(value, date):
+            value = value.strftime(formats.get(column.key, '%Y-%m-%d'))
+        result[rename.get(column.key, column.key)] = value
+    return result
+
+@pytest.fixture
+def seeded(app):
+    with app.app_context():
+        db.session.add(Patient(patient_id=1, name='Nguyễn Văn "An"', dob=date(1990, 1, 1), gender='Male', phone='0',
+                               email='a@x'))
+        db.session.add(Doctor(doctor_id=1, name='Trần Thị Bình', specialization='Nội khoa', phone='0', email='d@x'))
+        add_rows(1, 2)
+        # Số tiền lẻ, giây khác 0 và mô tả NULL
+        db.session.add(Payment(payment_id=3, patient_id=1, amount=Decimal('50000.55'),
+                               payment_date=datetime(2030, 1, 31, 23, 59, 7), description=None, status='Pending'))
+        db.session.commit()
+    return app
+
+def test_every_generated_serializer_is_covered():
+    covered = {serialize for serialize, *_ in SERIALIZERS}
+    for module in (serializers, overview, search, revenue):
+        for name, value in vars(module).items():
+            if getattr(getattr(value, '__code__', None), 'co_filename', '').startswith('<row_serializer'):
+                assert value in covered, f'{module.__name__}.{name}'
+
+@pytest.mark.parametrize('serialize, query, options', SERIALIZERS,
+                         ids=[serialize.__code__.co_filename for serialize, *_ in SERIALIZERS])
+def test_generated_serializers_match_to_dict(seeded, serialize, query, options):
+    with seeded.app_context():
+        rows = db.session.execute(query).all()
+    assert rows
+    for row in rows:
+        assert serialize(row) == to_dict(query, row, **options)
+
+def test_payments_keep_none_decimal_and_datetime_values(seeded):
+    with seeded.app_context():
+        row = db.session.execute(serializers.payment_detail_query(3)).one()
+    assert serializers.serialize_payment_detail(row) == {
+        'payment_id': 3, 'patient_id': 1, 'patient_name': 'Nguyễn Văn "An"', 'amount': 50000.55,
+        'payment_date': '2030-01-31 23:59:07', 'description': None, 'status': 'Pending',
+    }
+
+def test_nullable_expressions_stay_none(seeded):
+    # Cột tính toán (có thể NULL) được kiểm tra None trước khi chuyển kiểu
+    query = select(
+        Patient.patient_id,
+        func.sum(Payment.amount, type_=Numeric(12, 2)).label('total'),
+        func.max(Payment.payment_date, type_=DateTime).label('last_payment'),
+    ).outerjoin(Payment, (Payment.patient_id == Patient.patient_id) & (Payment.status == 'Refunded')) \
+     .group_by(Patient.patient_id)
+    serialize = row_serializer(query, formats={'last_payment': '%d/%m/%Y'})
+    with seeded.app_context():
+        row = db.session.execute(query).one()
+    assert serialize(row) == to_dict(query, row, formats={'last_payment': '%d/%m/%Y'}) == \
+        {'patient_id': 1, 'total': None, 'last_payment': None}
+    assert serialize((2, Decimal('0.10'), datetime(2030, 5, 6, 7, 8))) == \
+        {'patient_id': 2, 'total': 0.1, 'last_payment': '06/05/2030'}
+
+def test_json_provider_encodes_decimal_and_datetime(seeded):
+    with seeded.app_context():
+        body = seeded.json.dumps({'amount': Decimal('50000.55'), 'at': datetime(2030, 1, 31, 23, 59, 7),
+                                  'day': date(2030, 1, 31), 'name': 'Bình', 'none': None})
+    assert 'Bình' in body
+    assert json.loads(body) == {'amount': 50000.55, 'at': '2030-01-31 23:59:07', 'day': '2030-01-31', 'name': 'Bình',
+                                'none': None}
+
+def test_payment_endpoint_matches_to_dict(seeded, client, auth_headers):
+    response = client.get('/api/payments/patient/1', headers=auth_headers)
+    assert response.status_code == 200
+    with seeded.app_context():
+        query = serializers.patient_payments_query(1)
+        expected = [to_dict(query, row) for row in db.session.execute(query)]
+    assert sorted(response.get_json(), key=lambda row: row['payment_id']) == \
+        sorted(expected, key=lambda row: row['payment_id'])
@@ -0,0 +1,101 @@
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from models import db, Appointment, PatientService, PatientInsurance, Payment, PatientBalance
+from ledger import reconcile_balances
+from test_query_counts import seeded
+from test_revenue import assert_consistent
+
+def statuses(app, model, key):
+    with app.app_context():
+        return dict(db.session.execute(db.select(key, model.status).order_by(key)).all())
+
+def put(client, auth_headers, path, body):
+    return client.put(path, json=body, headers=auth_headers)
+
+def test_appointments_by_ids(seeded, client, auth_headers):
+    # Lịch hẹn 1, 3: Scheduled; 2, 4: Completed
+    response = put(client, auth_headers, '/api/appointments/bulk', {'status': 'Canceled', 'ids': [1, 2, 3, 99, 1]})
+    assert response.status_code == 200
+    assert response.get_json() == {'status': 'Canceled', 'updated': 2, 'skipped': 1, 'not_found': 1}
+    assert statuses(seeded, Appointment, Appointment.appointment_id) == \
+        {1: 'Canceled', 2: 'Completed', 3: 'Canceled', 4: 'Completed'}
+    with seeded.app_context():
+        # Lịch hẹn bị hủy giải phóng slot
+        assert db.session.get(Appointment, 1).slot_start is None
+        assert db.session.get(Appointment, 2).slot_start is not None
+
+def test_appointments_by_filter(seeded, client, auth_headers):
+    response = put(client, auth_headers, '/api/appointments/bulk', {
+        'status': 'Completed', 'filter': {'doctor_id': 1, 'date_from': '2030-01-01', 'date_to': '2030-01-01 09:00'}
+    })
+    assert response.get_json() == {'status': 'Completed', 'updated': 1}
+    assert statuses(seeded, Appointment, Appointment.appointment_id) == \
+        {1: 'Completed', 2: 'Completed', 3: 'Scheduled', 4: 'Completed'}
+
+@pytest.mark.parametrize('body, message', [
+    # Chuyển trạng thái không được phép
+    ({'status': 'Scheduled', 'ids': [2]}, "Invalid status. Choose from 'Completed', 'Canceled'"),
+    ({'status': 'Canceled', 'filter': {'patient_id': 1, 'status': 'Completed'}},
+     "Cannot change status from 'Completed' to 'Canceled'"),
+    # Yêu cầu không hợp lệ
+    ([1, 2], "Expected a JSON object"),
+    ({'status': 'Canceled'}, "Provide either 'ids' or 'filter'"),
+    ({'status': 'Canceled', 'ids': [1], 'filter': {'patient_id': 1}}, "Provide either 'ids' or 'filter'"),
+    ({'status': 'Canceled', 'ids': [1, '2']}, "'ids' must be a list of integers"),
+    ({'status': 'Canceled', 'ids': [True]}, "'ids' must be a list of integers"),
+    ({'status': 'Canceled', 'filter': {}}, "Filter needs at least one of: patient_id, doctor_id, date_from, date_to"),
+    ({'status': 'Canceled', 'filter': {'status': 'Scheduled'}},
+     "Filter needs at least one of: patient_id, doctor_id, date_from, date_to"),
+    ({'status': 'Canceled', 'filter': {'patient_id': 1, 'room': 2}}, "Unknown filter fields: room"),
+    ({'status': 'Canceled', 'filter': {'patient_id': '1'}}, "Invalid patient_id"),
+    ({'status': 'Canceled', 'filter': {'date_from': '01/01/2030'}},
+     "Invalid date format. Use YYYY-MM-DD HH:MM or YYYY-MM-DD"),
+])
+def test_rejected_transitions(seeded, client, auth_headers, body, message):
+    before = statuses(seeded, Appointment, Appointment.appointment_id)
+    response = put(client, auth_headers, '/api/appointments/bulk', body)
+    assert response.status_code == 400
+    assert response.get_json() == {'message': message}
+    assert statuses(seeded, Appointment, Appointment.appointment_id) == before
+
+def test_too_many_ids(seeded, client, auth_headers):
+    seeded.config['BULK_MAX_ITEMS'] = 2
+    response = put(client, auth_headers, '/api/appointments/bulk', {'status': 'Canceled', 'ids': [1, 2, 3]})
+    assert response.get_json() == {'message': 'Too many items (max 2)'}
+
+def test_services_and_insurances(seeded, client, auth_headers):
+    response = put(client, auth_headers, '/api/services/bulk', {'status': 'Completed', 'filter': {'service_id': 2}})
+    assert response.get_json() == {'status': 'Completed', 'updated': 1}
+    assert statuses(seeded, PatientService, PatientService.id) == {1: 'Pending', 2: 'Completed'}
+    # Dịch vụ đã hoàn thành không thể hủy
+    response = put(client, auth_headers, '/api/services/bulk', {'status': 'Canceled', 'ids': [1, 2]})
+    assert response.get_json() == {'status': 'Canceled', 'updated': 1, 'skipped': 1, 'not_found': 0}
+
+    response = put(client, auth_headers, '/api/insurance/bulk', {'status': 'Expired', 'filter': {'patient_id': 1}})
+    assert response.get_json() == {'status': 'Expired', 'updated': 2}
+    response = put(client, auth_headers, '/api/insurance/bulk', {'status': 'Active', 'ids': [1]})
+    assert response.status_code == 400
+    assert statuses(seeded, PatientInsurance, PatientInsurance.id) == {1: 'Expired', 2: 'Expired'}
+
+def test_payments_update_ledger_and_revenue(seeded, client, auth_headers):
+    seeded.config['BULK_CHUNK_SIZE'] = 2
+    with seeded.app_context():
+        db.session.add_all(Payment(patient_id=1, amount=Decimal('1000.50'), payment_date=datetime(2030, 2, day, 10),
+                                   description='-', status='Pending') for day in (1, 2, 3))
+        db.session.commit()
+
+    response = put(client, auth_headers, '/api/payments/bulk', {'status': 'Paid', 'filter': {'patient_id': 1}})
+    assert response.get_json() == {'status': 'Paid', 'updated': 3}
+    assert set(statuses(seeded, Payment, Payment.payment_id).values()) == {'Paid'}
+    with seeded.app_context():
+        balance = db.session.get(PatientBalance, 1)
+        assert (balance.paid_total, balance.pending_total) == (Decimal('3101.50'), 0)
+        assert reconcile_balances()['mismatched'] == 0
+        assert_consistent()
+
+    # Đã 'Paid' hết: không còn dòng nào được chuyển
+    response = put(client, auth_headers, '/api/payments/bulk', {'status': 'Paid', 'ids': [3, 4]})
+    assert response.get_json() == {'status': 'Paid', 'updated': 0, 'skipped': 2, 'not_found': 0}
+    response = put(client, auth_headers, '/api/payments/bulk', {'status': 'Pending', 'ids': [3]})
+    assert response.status_code == 400
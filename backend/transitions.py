@@ -0,0 +1,230 @@
+from datetime import datetime, timedelta
+from flask import request, jsonify, current_app
+from sqlalchemy import select
+from models import db, Appointment, PatientService, PatientInsurance, Payment
+from bulk import chunked
+from ledger import LedgerChanges
+from revenue import RevenueChanges
+from availability import release_bookings
+
+# Lỗi khi yêu cầu chuyển trạng thái hàng loạt không hợp lệ
+class TransitionError(ValueError):
+    pass
+
+class StatusTransitions:
+    """
+    Quy tắc chuyển trạng thái hàng loạt của một bảng:
+    - transitions: {trạng thái mới: các trạng thái hiện tại được phép chuyển sang}
+    - filters: {tên trường trong 'filter': hàm nhận giá trị và trả về điều kiện SQL}
+    - columns: các cột cần đọc thêm để cập nhật dữ liệu phụ thuộc (sổ cái, doanh thu, lịch trống)
+    - values(trạng thái mới): các cột khác được gán cùng câu UPDATE
+    - before_commit(connection, rows, trạng thái mới): cập nhật dữ liệu phụ thuộc trong cùng transaction
+    - after_commit(rows, trạng thái mới): cập nhật dữ liệu trong bộ nhớ sau khi commit
+    Các thay đổi này không đi qua ORM session nên không kích hoạt các sự kiện after_flush.
+    """
+
+    def __init__(self, model, key, transitions, filters, columns=(), values=None, before_commit=None, after_commit=None):
+        self.model = model
+        self.key = key
+        self.transitions = transitions
+        self.filters = filters
+        self.columns = columns
+        self.values = values or (lambda status: {})
+        self.before_commit = before_commit
+        self.after_commit = after_commit
+
+    def rows_query(self, *conditions):
+        return select(self.key, self.model.status, *self.columns).where(*conditions)
+
+# Các hàm tạo điều kiện lọc từ giá trị trong 'filter'
+def _equals(column):
+    def condition(value):
+        if isinstance(value, bool) or not isinstance(value, int):
+            raise TransitionError(f"Invalid {column.key}")
+        return column == value
+    return condition
+
+def _parse_time(value):
+    # 'YYYY-MM-DD HH:MM' hoặc 'YYYY-MM-DD' (cả ngày)
+    for fmt in ('%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt), fmt == '%Y-%m-%d'
+        except (ValueError, TypeError):
+            pass
+    raise TransitionError("Invalid date format. Use YYYY-MM-DD HH:MM or YYYY-MM-DD")
+
+def _since(column):
+    return lambda value: column >= _parse_time(value)[0]
+
+def _until(column):
+    def condition(value):
+        moment, whole_day = _parse_time(value)
+        # Chỉ có ngày: lấy đến hết ngày đó
+        return column < moment + timedelta(days=1) if whole_day else column <= moment
+    return condition
+
+# Giải phóng slot trong chỉ mục lịch trống của các lịch hẹn bị hủy (lịch hẹn đã hoàn thành vẫn giữ slot)
+def _release_appointment_slots(rows, status):
+    if status != 'Canceled':
+        return
+    release_bookings([(row.doctor_id, row.slot_start) for row in rows if row.slot_start is not None])
+
+# Chuyển số tiền của các thanh toán sang cột/dòng của trạng thái mới trong sổ cái và bảng doanh thu
+def _record_payment_transitions(connection, rows, status):
+    ledger, revenue = LedgerChanges(), RevenueChanges()
+    for row in rows:
+        ledger.payment(row.patient_id, row.amount, row.status, -1)
+        ledger.payment(row.patient_id, row.amount, status, 1)
+        revenue.add(row.payment_date, row.amount, row.status, -1)
+        revenue.add(row.payment_date, row.amount, status, 1)
+    ledger.apply(connection)
+    revenue.apply(connection)
+
+APPOINTMENT_TRANSITIONS = StatusTransitions(
+    Appointment, Appointment.appointment_id,
+    # Khôi phục lịch hẹn đã hủy cần chiếm lại slot (có thể đã bị đặt) nên chỉ làm được từng lịch hẹn một
+    transitions={'Completed': ('Scheduled',), 'Canceled': ('Scheduled',)},
+    filters={
+        'patient_id': _equals(Appointment.patient_id),
+        'doctor_id': _equals(Appointment.doctor_id),
+        'date_from': _since(Appointment.appointment_date),
+        'date_to': _until(Appointment.appointment_date),
+    },
+    columns=(Appointment.doctor_id, Appointment.slot_start),
+    # Lịch hẹn bị hủy giải phóng slot để bệnh nhân khác có thể đặt
+    values=lambda status: {'slot_start': None} if status == 'Canceled' else {},
+    after_commit=_release_appointment_slots,
+)
+
+SERVICE_TRANSITIONS = StatusTransitions(
+    PatientService, PatientService.id,
+    transitions={'Completed': ('Pending',), 'Canceled': ('Pending',)},
+    filters={
+        'patient_id': _equals(PatientService.patient_id),
+        'service_id': _equals(PatientService.service_id),
+    },
+)
+
+INSURANCE_TRANSITIONS = StatusTransitions(
+    PatientInsurance, PatientInsurance.id,
+    transitions={'Expired': ('Active',)},
+    filters={
+        'patient_id': _equals(PatientInsurance.patient_id),
+        'insurance_id': _equals(PatientInsurance.insurance_id),
+    },
+)
+
+PAYMENT_TRANSITIONS = StatusTransitions(
+    Payment, Payment.payment_id,
+    transitions={'Paid': ('Pending',)},
+    filters={
+        'patient_id': _equals(Payment.patient_id),
+        'date_from': _since(Payment.payment_date),
+        'date_to': _until(Payment.payment_date),
+    },
+    columns=(Payment.patient_id, Payment.amount, Payment.payment_date),
+    before_commit=_record_payment_transitions,
+)
+
+# Hàm chuyển trạng thái một lô dòng đã được khóa (SELECT ... FOR UPDATE) bằng một câu UPDATE
+def _apply_chunk(spec, rows, status, status_from):
+    if not rows:
+        db.session.commit()
+        return 0
+    result = db.session.execute(
+        spec.model.__table__.update()
+        .where(spec.key.in_([row[0] for row in rows]), spec.model.status.in_(status_from))
+        .values(status=status, **spec.values(status))
+    )
+    if spec.before_commit is not None:
+        spec.before_commit(db.session.connection(), rows, status)
+    db.session.commit()
+    if spec.after_commit is not None:
+        spec.after_commit(rows, status)
+    return result.rowcount
+
+# Hàm chuyển trạng thái các dòng theo danh sách id
+def transition_ids(spec, status, ids, chunk_size):
+    """
+    Chuyển các dòng có id trong 'ids' sang trạng thái 'status', mỗi lô 'chunk_size' id một transaction.
+    Trả về số dòng đã chuyển, bỏ qua (trạng thái hiện tại không được phép chuyển) và không tìm thấy.
+    """
+    status_from = spec.transitions[status]
+    report = {"updated": 0, "skipped": 0, "not_found": 0}
+    for chunk in chunked(dict.fromkeys(ids), chunk_size):
+        found = db.session.execute(
+            spec.rows_query(spec.key.in_(chunk)).with_for_update()
+        ).all()
+        rows = [row for row in found if row.status in status_from]
+        report["updated"] += _apply_chunk(spec, rows, status, status_from)
+        report["skipped"] += len(found) - len(rows)
+        report["not_found"] += len(chunk) - len(found)
+    return report
+
+# Hàm chuyển trạng thái các dòng theo bộ lọc
+def transition_matching(spec, status, conditions, chunk_size):
+    """
+    Chuyển các dòng thỏa mãn 'conditions' và có trạng thái được phép sang 'status',
+    đọc theo thứ tự khóa chính từng lô 'chunk_size' dòng (keyset), mỗi lô một transaction.
+    """
+    status_from = spec.transitions[status]
+    query = spec.rows_query(spec.model.status.in_(status_from), *conditions) \
+        .order_by(spec.key).limit(chunk_size).with_for_update()
+    report = {"updated": 0}
+    last_id = None
+    while True:
+        rows = db.session.execute(query if last_id is None else query.where(spec.key > last_id)).all()
+        if not rows:
+            db.session.commit()
+            return report
+        report["updated"] += _apply_chunk(spec, rows, status, status_from)
+        last_id = rows[-1][0]
+
+# Hàm đọc và kiểm tra yêu cầu chuyển trạng thái: {"status": ..., "ids": [...]} hoặc {"status": ..., "filter": {...}}
+def parse_transition_request(spec, data, max_items):
+    if not isinstance(data, dict):
+        raise TransitionError("Expected a JSON object")
+
+    status = data.get('status')
+    if status not in spec.transitions:
+        raise TransitionError(f"Invalid status. Choose from {', '.join(repr(s) for s in spec.transitions)}")
+
+    ids, criteria = data.get('ids'), data.get('filter')
+    if (ids is None) == (criteria is None):
+        raise TransitionError("Provide either 'ids' or 'filter'")
+
+    if ids is not None:
+        if not isinstance(ids, list) or any(isinstance(i, bool) or not isinstance(i, int) for i in ids):
+            raise TransitionError("'ids' must be a list of integers")
+        if len(ids) > max_items:
+            raise TransitionError(f"Too many items (max {max_items})")
+        return status, ids, None
+
+    if not isinstance(criteria, dict):
+        raise TransitionError("'filter' must be an object")
+    unknown = set(criteria) - set(spec.filters) - {'status'}
+    if unknown:
+        raise TransitionError(f"Unknown filter fields: {', '.join(sorted(unknown))}")
+    # Không cho phép chuyển trạng thái của cả bảng chỉ vì quên bộ lọc
+    if not set(criteria) & set(spec.filters):
+        raise TransitionError(f"Filter needs at least one of: {', '.join(spec.filters)}")
+    conditions = [spec.filters[name](value) for name, value in criteria.items() if name != 'status']
+    if 'status' in criteria:
+        if criteria['status'] not in spec.transitions[status]:
+            raise TransitionError(f"Cannot change status from {criteria['status']!r} to {status!r}")
+        conditions.append(spec.model.status == criteria['status'])
+    return status, None, conditions
+
+# Hàm trả về phản hồi của các API chuyển trạng thái hàng loạt
+def transition_response(spec):
+    config = current_app.config
+    try:
+        status, ids, conditions = parse_transition_request(spec, request.get_json(silent=True), config['BULK_MAX_ITEMS'])
+    except TransitionError as e:
+        return jsonify({"message": str(e)}), 400
+
+    if ids is not None:
+        report = transition_ids(spec, status, ids, config['BULK_CHUNK_SIZE'])
+    else:
+        report = transition_matching(spec, status, conditions, config['BULK_CHUNK_SIZE'])
+    return jsonify({"status": status, **report}), 200
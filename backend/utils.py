@@ -1,29 +1,142 @@
 import jwt
 import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask import jsonify
-from dotenv import load_dotenv
+from flask import jsonify, current_app
 
-# Tải các biến môi trường từ tệp .env
-load_dotenv()
+class TokenCache:
+    """
+    Cache LRU (có giới hạn kích thước) cho các JWT token đã được xác thực.
+    Khóa là digest SHA-256 của token, mỗi entry tự hết hạn tại thời điểm 'exp' của token.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _key(token):
+        if isinstance(token, str):
+            token = token.encode('utf-8')
+        return hashlib.sha256(token).digest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            payload, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def put(self, token, payload):
+        expires_at = payload.get('exp')
+        if expires_at is None or self.maxsize <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (payload, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# Hàm khởi tạo cache token cho ứng dụng
+def init_token_cache(app):
+    app.extensions['token_cache'] = TokenCache(app.config['TOKEN_CACHE_SIZE'])
+
+# Lỗi khi pool mã hóa mật khẩu đã đầy (hoặc chờ quá lâu)
+class HashingPoolBusy(Exception):
+    pass
+
+class HashingPool:
+    """
+    Pool thread riêng cho việc mã hóa/kiểm tra mật khẩu (PBKDF2 rất tốn CPU).
+    Số tác vụ đang chạy và đang chờ bị giới hạn; khi đầy sẽ ném HashingPoolBusy ngay lập tức.
+    """
 
-# Secret key cho JWT
-SECRET_KEY = os.getenv('SECRET_KEY', 'your_secret_key')
+    def __init__(self, workers, queue_depth, timeout):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise HashingPoolBusy()
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+_hashing_pool_lock = threading.Lock()
+
+def get_hashing_pool():
+    """
+    Khởi tạo (một lần, khi cần đến) pool mã hóa mật khẩu theo cấu hình của ứng dụng.
+    """
+    pool = current_app.extensions.get('hashing_pool')
+    if pool is None:
+        with _hashing_pool_lock:
+            pool = current_app.extensions.get('hashing_pool')
+            if pool is None:
+                config = current_app.config
+                pool = HashingPool(
+                    config['PASSWORD_HASH_WORKERS'],
+                    config['PASSWORD_HASH_QUEUE_DEPTH'],
+                    config['PASSWORD_HASH_TIMEOUT']
+                )
+                current_app.extensions['hashing_pool'] = pool
+    return pool
+
+# Hàm trả về phương thức mã hóa mật khẩu hiện tại, ví dụ: 'pbkdf2:sha256:600000'
+def password_hash_method():
+    config = current_app.config
+    return f"pbkdf2:{config['PASSWORD_HASH_ALGORITHM']}:{config['PASSWORD_HASH_ITERATIONS']}"
 
 # Hàm mã hóa mật khẩu
 def hash_password(password):
     """
-    Mã hóa mật khẩu sử dụng bcrypt thông qua werkzeug.
+    Mã hóa mật khẩu bằng PBKDF2 (werkzeug) trong pool mã hóa, theo thuật toán và số vòng lặp trong Config.
+    Ném HashingPoolBusy nếu pool đã đầy.
     """
-    return generate_password_hash(password)
+    return get_hashing_pool().run(generate_password_hash, password, password_hash_method())
 
 # Hàm kiểm tra mật khẩu đã mã hóa
 def check_password(hashed_password, password):
     """
-    So sánh mật khẩu người dùng nhập với mật khẩu đã được mã hóa.
+    So sánh mật khẩu người dùng nhập với mật khẩu đã được mã hóa (chạy trong pool mã hóa).
+    Ném HashingPoolBusy nếu pool đã đầy.
+    """
+    return get_hashing_pool().run(check_password_hash, hashed_password, password)
+
+# Hàm kiểm tra mật khẩu đã mã hóa có dùng tham số cũ hay không
+def password_needs_rehash(hashed_password):
+    """
+    Trả về True nếu mật khẩu được mã hóa bằng thuật toán/số vòng lặp khác với cấu hình hiện tại.
     """
-    return check_password_hash(hashed_password, password)
+    return hashed_password.split('$', 1)[0] != password_hash_method()
 
 # Hàm tạo JWT token
 def generate_token(user_id, role, expires_in=24):
@@ -36,23 +149,59 @@ def generate_token(user_id, role, expires_in=24):
         'user_id': user_id,
         'role': role,
         'exp': expiration
-    }, SECRET_KEY, algorithm='HS256')
+    }, current_app.config['SECRET_KEY'], algorithm='HS256')
     
     return token
 
+# Hàm xác thực JWT token (có dùng cache)
+def verify_jwt(token):
+    """
+    Xác thực và giải mã JWT token, ưu tiên lấy kết quả từ cache các token đã xác thực.
+    Ném jwt.ExpiredSignatureError hoặc jwt.InvalidTokenError nếu token không hợp lệ.
+    """
+    token_cache = current_app.extensions['token_cache']
+    decoded_token = token_cache.get(token)
+    if decoded_token is None:
+        decoded_token = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
+        token_cache.put(token, decoded_token)
+    return decoded_token
+
 # Hàm kiểm tra và giải mã JWT token
 def decode_token(token):
     """
     Giải mã JWT token. Nếu token không hợp lệ hoặc hết hạn, trả về None.
     """
     try:
-        decoded_token = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-        return decoded_token
+        return verify_jwt(token)
     except jwt.ExpiredSignatureError:
         return None  # Token đã hết hạn
     except jwt.InvalidTokenError:
         return None  # Token không hợp lệ
 
+# Hàm xác thực header Authorization ('Bearer <token>')
+def authenticate(authorization):
+    """
+    Trả về (dữ liệu trong token, None) nếu token hợp lệ, ngược lại trả về (None, thông báo lỗi).
+    Dùng chung cho token_required và các view bất đồng bộ (asgi.py).
+    """
+    token = None
+    # Lấy token từ header
+    if authorization:
+        parts = authorization.split(" ")  # 'Bearer <token>'
+        if len(parts) == 2:
+            token = parts[1]
+
+    if not token:
+        return None, 'Token is missing!'
+
+    try:
+        data = decode_token(token)
+        if not data:
+            return None, 'Token is invalid!'
+    except Exception as e:
+        return None, 'Token is invalid!'
+    return data, None
+
 # Hàm trả về lỗi nếu token không hợp lệ
 def token_required(f):
     """
@@ -63,25 +212,14 @@ def token_required(f):
 
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        # Lấy token từ header
-        if 'Authorization' in request.headers:
-            token = request.headers['Authorization'].split(" ")[1]  # 'Bearer <token>'
-
-        if not token:
-            return jsonify({'message': 'Token is missing!'}), 401
-        
-        try:
-            data = decode_token(token)
-            if not data:
-                return jsonify({'message': 'Token is invalid!'}), 401
-        except Exception as e:
-            return jsonify({'message': 'Token is invalid!'}), 401
-        
+        data, error = authenticate(request.headers.get('Authorization'))
+        if error:
+            return jsonify({'message': error}), 401
+
         # Thêm thông tin người dùng vào request để sử dụng trong route
         request.user_id = data['user_id']
         request.user_role = data['role']
-        
+
         return f(*args, **kwargs)
 
     return decorated
@@ -101,3 +239,29 @@ def role_required(required_role):
         return f(*args, **kwargs)
 
     return decorated
+
+# Các địa chỉ được gọi API nội bộ (/metrics, /health/...) khi không cấu hình INTERNAL_API_TOKEN
+LOOPBACK_ADDRESSES = ('127.0.0.1', '::1')
+
+# Hàm kiểm tra quyền truy cập các API nội bộ (giám sát, kiểm tra trạng thái)
+def internal_only(f):
+    """
+    Decorator chỉ cho phép gọi route từ hệ thống giám sát: cần header 'Authorization: Bearer <INTERNAL_API_TOKEN>'
+    nếu có cấu hình INTERNAL_API_TOKEN, nếu không thì chỉ nhận request từ chính máy chủ (loopback).
+    """
+    import hmac
+    from functools import wraps
+    from flask import request
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        token = current_app.config['INTERNAL_API_TOKEN']
+        if token:
+            provided = request.headers.get('Authorization', '')
+            if not hmac.compare_digest(provided.encode('utf-8'), f'Bearer {token}'.encode('utf-8')):
+                return jsonify({'message': 'Internal API token is missing or invalid!'}), 401
+        elif request.remote_addr not in LOOPBACK_ADDRESSES:
+            return jsonify({'message': 'Permission denied: internal endpoint'}), 403
+        return f(*args, **kwargs)
+
+    return decorated
@@ -0,0 +1,9 @@
+import os
+from app import create_app, reset_after_fork
+
+# Điểm vào WSGI cho môi trường production, ví dụ:
+#     gunicorn -c gunicorn.conf.py wsgi:app
+app = create_app()
+
+# Mỗi tiến trình con (worker) phải dùng kết nối database riêng, kể cả khi ứng dụng được tạo trước khi fork
+os.register_at_fork(after_in_child=lambda: reset_after_fork(app))